@@ -1,5 +1,6 @@
-import paramiko
 import os
+import logging
+from sftp_sync import SFTPConnectionPool, SyncManifest, paramiko_connector, sync_directory
 
 # --- CONFIG ---
 hostname = "44.217.138.250"
@@ -8,30 +9,27 @@ username = "ec2-user"  # change if you create a different SFTP user
 key_path = "/Users/sandeepmalkanoor/Downloads/sftp-key.pem"  # <- update to correct path
 remote_dir = "/home/hoteluser/uploads"  # <- or wherever your PDFs are uploaded
 local_dir = "/Users/sandeepmalkanoor/Documents/Python/data"  # <- change to your Mac ETL folder
+workers = 4  # parallel transfers, each on its own SFTP session
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 # --- Prepare local directory ---
 os.makedirs(local_dir, exist_ok=True)
 
-# --- Load private key ---
-key = paramiko.RSAKey.from_private_key_file(key_path)
-
-# --- Connect using key ---
-transport = paramiko.Transport((hostname, port))
-transport.connect(username=username, pkey=key)
-sftp = paramiko.SFTPClient.from_transport(transport)
-
 # --- Download PDFs ---
-for filename in sftp.listdir(remote_dir):
-    if filename.endswith(".pdf"):
-        local_path = os.path.join(local_dir, filename)
-        remote_path = f"{remote_dir}/{filename}"
-
-        if not os.path.exists(local_path):
-            print(f"⬇️ Downloading: {filename}")
-            sftp.get(remote_path, local_path)
-
-# --- Cleanup ---
-sftp.close()
-transport.close()
-
-print("✅ All PDFs downloaded.")
+# Only files new or changed since the last run (per the local manifest) are fetched;
+# interrupted ones resume from their .part file
+pool = SFTPConnectionPool(paramiko_connector(hostname, port, username, key_path), size=workers)
+manifest = SyncManifest.for_directory(local_dir)
+try:
+    results = sync_directory(pool, remote_dir, local_dir, workers=workers, manifest=manifest)
+finally:
+    # --- Cleanup ---
+    manifest.close()
+    pool.close()
+
+failed = [r.name for r in results if r.status == "FAILED"]
+if failed:
+    print(f"❌ {len(failed)} PDFs failed to download: {', '.join(failed)}")
+else:
+    print("✅ All PDFs downloaded.")
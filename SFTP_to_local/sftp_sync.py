@@ -0,0 +1,335 @@
+import os
+import glob
+import stat
+import queue
+import socket
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+import paramiko
+
+
+logger = logging.getLogger("night_audit_etl.sftp")
+
+# Bytes per read; paramiko's prefetch keeps many of these requests in flight at once.
+CHUNK_SIZE = 256 * 1024
+PART_SUFFIX = ".part"
+MANIFEST_NAME = ".sftp_manifest.sqlite3"
+
+RemoteFile = namedtuple("RemoteFile", ["name", "size", "mtime"])
+# `data` holds the file's bytes when it was fetched into memory instead of onto disk;
+# `remote` is the listing entry, for recording a FETCHED file once it is safe (SyncManifest.record)
+SyncResult = namedtuple("SyncResult", ["name", "status", "bytes", "error", "sha256", "data", "remote"],
+                        defaults=(0, None, None, None, None))
+
+
+class OwnedSFTPClient(paramiko.SFTPClient):
+    """SFTP client that closes its SSH transport with it: one session per client."""
+
+    def close(self):
+        transport = self.get_channel().get_transport()
+        super().close()
+        transport.close()
+
+
+def paramiko_connector(hostname, port, username, key_path):
+    """Factory for SFTPConnectionPool opening a fresh SSH session per client.
+
+    Separate sessions rather than channels on one transport: a single transport
+    encrypts everything on one thread and becomes the bottleneck.
+    """
+    key = paramiko.RSAKey.from_private_key_file(key_path)
+
+    def connect():
+        transport = paramiko.Transport((hostname, port))
+        transport.connect(username=username, pkey=key)
+        return OwnedSFTPClient.from_transport(transport)
+
+    return connect
+
+
+class SFTPConnectionPool:
+    """At most `size` SFTP clients, opened on first use and reused across files."""
+
+    def __init__(self, connect, size=4):
+        self.connect = connect
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._open = []
+        self.stats = {"connects": 0, "discarded": 0}
+
+    @contextmanager
+    def client(self):
+        with self._slots:
+            try:
+                sftp = self._idle.get_nowait()
+            except queue.Empty:
+                sftp = self.connect()
+                with self._lock:
+                    self._open.append(sftp)
+                    self.stats["connects"] += 1
+            try:
+                yield sftp
+            except (EOFError, socket.error, paramiko.SSHException):
+                # The session itself is gone; the next checkout reconnects
+                self._discard(sftp)
+                raise
+            except BaseException:
+                self._idle.put(sftp)
+                raise
+            else:
+                self._idle.put(sftp)
+
+    def _discard(self, sftp):
+        with self._lock:
+            if sftp in self._open:
+                self._open.remove(sftp)
+            self.stats["discarded"] += 1
+        try:
+            sftp.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            clients, self._open = self._open, []
+        for sftp in clients:
+            try:
+                sftp.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing SFTP session: {e}")
+        self._idle = queue.LifoQueue()
+
+
+def list_remote(sftp, remote_dir, suffix=".pdf"):
+    """RemoteFile entries for the regular files in `remote_dir`, from a single listdir_attr."""
+    files = []
+    for attr in sftp.listdir_attr(remote_dir):
+        if attr.filename.endswith(suffix) and not stat.S_ISDIR(attr.st_mode or 0):
+            files.append(RemoteFile(attr.filename, attr.st_size, int(attr.st_mtime)))
+    return files
+
+
+def is_current(local_path, remote):
+    """True if `local_path` is a complete copy of `remote`: same size and mtime."""
+    try:
+        st = os.stat(local_path)
+    except FileNotFoundError:
+        return False
+    return st.st_size == remote.size and int(st.st_mtime) == remote.mtime
+
+
+class SyncManifest:
+    """What earlier runs fetched: remote name, size and mtime plus the local file's SHA-256.
+
+    Kept in SQLite next to the downloads. A run lists the remote directory once
+    with listdir_attr and only touches the files whose size or mtime differ
+    from their manifest row, so the work follows the nightly delta rather than
+    the size of the archive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS remote_files (
+                name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                sha256 TEXT,
+                synced_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self._conn.commit()
+
+    @classmethod
+    def for_directory(cls, local_dir):
+        return cls(os.path.join(local_dir, MANIFEST_NAME))
+
+    def changed(self, remote_files):
+        """The entries of `remote_files` that are new or differ in size or mtime from the manifest."""
+        with self._lock:
+            known = {name: (size, mtime) for name, size, mtime in self._conn.execute("SELECT name, size, mtime FROM remote_files")}
+        return [r for r in remote_files if known.get(r.name) != (r.size, r.mtime)]
+
+    def record(self, remote, sha256):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO remote_files (name, size, mtime, sha256, synced_at) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(name) DO UPDATE SET size = excluded.size, mtime = excluded.mtime,
+                    sha256 = excluded.sha256, synced_at = excluded.synced_at
+            """, (remote.name, remote.size, remote.mtime, sha256))
+
+    def checksum(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM remote_files WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self._conn.close()
+
+
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def part_path_for(local_dir, remote):
+    # The remote mtime is part of the name, so a partial copy of an older version is never resumed
+    return os.path.join(local_dir, f"{remote.name}.{remote.mtime}{PART_SUFFIX}")
+
+
+def download_file(sftp, remote_dir, remote, local_dir, chunk_size=CHUNK_SIZE):
+    """Fetch one file into a `.part` file, resuming from its current length, then rename it into place.
+
+    Returns (bytes transferred, SHA-256 of the local file). The local copy gets
+    the remote mtime, so is_current() recognises it on the next run.
+    """
+    local_path = os.path.join(local_dir, remote.name)
+    part_path = part_path_for(local_dir, remote)
+    for stale in glob.glob(glob.escape(local_path) + ".*" + PART_SUFFIX):
+        if stale != part_path:
+            os.remove(stale)
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset > remote.size:
+        offset = 0  # the remote file was replaced by a shorter one
+
+    digest = hashlib.sha256()
+    if offset:
+        with open(part_path, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                digest.update(block)
+    transferred = 0
+    with sftp.open(f"{remote_dir}/{remote.name}", "rb") as src, open(part_path, "ab" if offset else "wb") as dst:
+        src.seek(offset)
+        if remote.size > offset:
+            src.prefetch(remote.size)  # pipelines reads from the current offset up to this size
+        while True:
+            data = src.read(chunk_size)
+            if not data:
+                break
+            dst.write(data)
+            digest.update(data)
+            transferred += len(data)
+
+    size = os.path.getsize(part_path)
+    if size != remote.size:
+        raise IOError(f"{remote.name}: got {size} of {remote.size} bytes")
+    os.utime(part_path, (remote.mtime, remote.mtime))
+    os.replace(part_path, local_path)
+    return transferred, digest.hexdigest()
+
+
+def read_file(sftp, remote_dir, remote, chunk_size=CHUNK_SIZE):
+    """The whole remote file as bytes, never staged on local disk."""
+    buffer = bytearray()
+    with sftp.open(f"{remote_dir}/{remote.name}", "rb") as src:
+        if remote.size:
+            src.prefetch(remote.size)
+        while True:
+            data = src.read(chunk_size)
+            if not data:
+                break
+            buffer += data
+    if len(buffer) != remote.size:
+        raise IOError(f"{remote.name}: got {len(buffer)} of {remote.size} bytes")
+    return bytes(buffer)
+
+
+def sync_file(pool, remote_dir, remote, local_dir, retries=3, max_memory_bytes=None):
+    """Download `remote` unless the local copy is current, retrying and resuming on failure.
+
+    Files no larger than `max_memory_bytes` are read into memory instead
+    (status FETCHED, bytes in `data`); bigger ones still go through disk.
+    """
+    local_path = os.path.join(local_dir, remote.name)
+    if is_current(local_path, remote):
+        # Same size and mtime is enough; hashing every current file would reread the archive each run
+        return SyncResult(remote.name, "SKIPPED")
+    if max_memory_bytes and remote.size <= max_memory_bytes:
+        return fetch_file(pool, remote_dir, remote, retries)
+    resumed = os.path.exists(part_path_for(local_dir, remote))
+    error = None
+    for attempt in range(1, retries + 1):
+        try:
+            with pool.client() as sftp:
+                transferred, sha256 = download_file(sftp, remote_dir, remote, local_dir)
+            logger.info(f"⬇️ Downloaded {remote.name} ({transferred:,} bytes{', resumed' if resumed else ''})")
+            return SyncResult(remote.name, "RESUMED" if resumed else "DOWNLOADED", transferred, sha256=sha256)
+        except Exception as e:
+            error = e
+            resumed = True
+            logger.warning(f"⚠️ Attempt {attempt}/{retries} for {remote.name} failed: {e}")
+    logger.error(f"❌ Giving up on {remote.name}: {error}")
+    return SyncResult(remote.name, "FAILED", 0, str(error))
+
+
+def fetch_file(pool, remote_dir, remote, retries=3):
+    error = None
+    for attempt in range(1, retries + 1):
+        try:
+            with pool.client() as sftp:
+                data = read_file(sftp, remote_dir, remote)
+            logger.info(f"📥 Fetched {remote.name} into memory ({len(data):,} bytes)")
+            return SyncResult(remote.name, "FETCHED", len(data), sha256=hashlib.sha256(data).hexdigest(), data=data)
+        except Exception as e:
+            error = e
+            logger.warning(f"⚠️ Attempt {attempt}/{retries} for {remote.name} failed: {e}")
+    logger.error(f"❌ Giving up on {remote.name}: {error}")
+    return SyncResult(remote.name, "FAILED", 0, str(error))
+
+
+def sync_directory(pool, remote_dir, local_dir, workers=4, suffix=".pdf", retries=3, manifest=None, on_file=None,
+                   max_memory_bytes=None):
+    """Mirror the `suffix` files of `remote_dir` into `local_dir` over up to `workers` parallel transfers.
+
+    With a SyncManifest only new or changed remote files are considered, and
+    only those appear in the returned results. `on_file(result)` is called from
+    the transfer thread as soon as each file is done; if it blocks, that thread
+    stops downloading, which is how a slow consumer holds the transfers back.
+    With `max_memory_bytes`, small files reach `on_file` as bytes only (see
+    sync_file); the returned results don't keep those bytes. Those FETCHED
+    files are left out of the manifest: they exist nowhere on disk yet, so the
+    consumer records them once they are loaded or written out.
+    """
+    os.makedirs(local_dir, exist_ok=True)
+    with pool.client() as sftp:
+        remote_files = list_remote(sftp, remote_dir, suffix)
+    if manifest is not None:
+        listed = len(remote_files)
+        remote_files = manifest.changed(remote_files)
+        logger.info(f"📒 Manifest: {len(remote_files)} of {listed} remote files new or changed")
+    # Largest first, so one big file doesn't start last and hold up the run
+    remote_files.sort(key=lambda r: r.size, reverse=True)
+
+    def fetch(remote):
+        result = sync_file(pool, remote_dir, remote, local_dir, retries, max_memory_bytes)._replace(remote=remote)
+        if manifest is not None and result.status == "SKIPPED":
+            # Only a manifest entry needs the checksum of a copy that was already current
+            result = result._replace(sha256=file_sha256(os.path.join(local_dir, remote.name)))
+        if on_file is not None:
+            on_file(result)
+        return result
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(fetch, remote) for remote in remote_files]
+        for future in as_completed(futures):
+            result = future.result()
+            if manifest is not None and result.status not in ("FAILED", "FETCHED"):
+                manifest.record(result.remote, result.sha256)
+            results.append(result._replace(data=None))
+    downloaded = sum(1 for r in results if r.status in ("DOWNLOADED", "RESUMED", "FETCHED"))
+    failed = sum(1 for r in results if r.status == "FAILED")
+    logger.info(f"✅ SFTP sync: {downloaded} downloaded, {len(results) - downloaded - failed} current, {failed} failed")
+    return results
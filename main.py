@@ -1,21 +1,37 @@
 import os
+import argparse
+import functools
 from datetime import datetime
-from night_audit_etl_pipeline.logger import setup_logger
 from multiprocessing import freeze_support
-from night_audit_etl_pipeline.logger import setup_logger
+from night_audit_etl_pipeline.logger import init_worker_logging, setup_logger, start_log_listener
 from night_audit_etl_pipeline.config_loader import config
 from night_audit_etl_pipeline.processor import process_pdf_folder
 from night_audit_etl_pipeline.db_utils import *
 from night_audit_etl_pipeline.helpers import *
 
-    # 🔧 Define multiprocessing logger initializer
-def init_worker_logger():
-    setup_logger("night_audit_etl")
+    # 🔧 Define multiprocessing logger initializer: workers send records to this process
+def init_worker_logger(log_queue):
+    init_worker_logging(log_queue, "night_audit_etl")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load night audit PDFs")
+    parser.add_argument("--sink", choices=["mysql", "parquet", "null"], default=None,
+                        help="where parsed rows go; parquet and null never touch the database (default: etl.sink in config, else mysql)")
+    parser.add_argument("--parquet-dir", default=None, help="output directory for --sink parquet")
+    parser.add_argument("--sync", action="store_true",
+                        help="download new PDFs over SFTP (config 'sftp') and parse each as soon as it lands")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and load new PDFs as they land in pdf_folder (config etl.daemon); stop with SIGTERM")
+    parser.add_argument("--log-json", action="store_true",
+                        help="also write the log as JSON lines next to the text log (.jsonl)")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
     
     freeze_support()
+    args = parse_args()
 
     # 🔧 Set log path for this run
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -23,15 +39,34 @@ if __name__ == "__main__":
     os.environ["LOG_FILE_PATH"] = log_path
 
     # 🔧 Setup main logger
-    logger = setup_logger("night_audit_etl")
+    logger = setup_logger("night_audit_etl", json_lines=args.log_json)
+    log_queue, log_listener = start_log_listener("night_audit_etl")
+    worker_logger = functools.partial(init_worker_logger, log_queue)
     logger.info("🚀 ETL started")
 
 
     config_dict = config()
     pdf_folder = config_dict.get("pdf_folder")
     mysql_conn_str = config_dict.get("mysql_conn")
+    etl_options = dict(config_dict.get("etl", {}))
+    sink_options = dict(etl_options.get("sink") or {})
+    if args.sink:
+        sink_options["type"] = args.sink
+    if args.parquet_dir:
+        sink_options["dir"] = args.parquet_dir
+    etl_options["sink"] = sink_options
+    needs_db = sink_options.get("type", "mysql") == "mysql"
 
-    if not pdf_folder or not mysql_conn_str:
-        logger.error("❌ Missing PDF folder path or MySQL connection string")
-    else:
-        process_pdf_folder(pdf_folder, mysql_conn_str, init_worker_logger)
+    try:
+        if not pdf_folder or (needs_db and not mysql_conn_str):
+            logger.error("❌ Missing PDF folder path or MySQL connection string")
+        elif args.sync:
+            from night_audit_etl_pipeline.pipeline import run_pipeline
+            run_pipeline(pdf_folder, mysql_conn_str, config_dict["sftp"], worker_logger, options=etl_options)
+        elif args.daemon:
+            from night_audit_etl_pipeline.daemon import run_daemon
+            run_daemon(pdf_folder, mysql_conn_str, worker_logger, options=etl_options)
+        else:
+            process_pdf_folder(pdf_folder, mysql_conn_str, worker_logger, options=etl_options)
+    finally:
+        log_listener.stop()
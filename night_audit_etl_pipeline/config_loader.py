@@ -1,10 +1,20 @@
 import os
+import copy
 import json
+import functools
 from dotenv import load_dotenv
 
-load_dotenv()
+# config.json next to this module; NIGHT_AUDIT_CONFIG points somewhere else
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
 
-def config(path="/Users/sandeepmalkanoor/Documents/Python/Night_Audit_DataEngineering_Project/night_audit_etl_pipeline/config.json"):
+
+def config_path():
+    return os.getenv("NIGHT_AUDIT_CONFIG", DEFAULT_CONFIG_PATH)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_config(path):
+    load_dotenv()
     with open(path) as f:
         raw_config = json.load(f)
 
@@ -17,4 +27,14 @@ def config(path="/Users/sandeepmalkanoor/Documents/Python/Night_Audit_DataEngine
 
     return env_substitute(raw_config)
 
-log_file_path = os.getenv("LOG_FILE_PATH", config().get("log_file"))
+
+def config(path=None):
+    """The parsed config with ${VARS} expanded; read once per path, callers get their own copy."""
+    return copy.deepcopy(_load_config(path or config_path()))
+
+
+def __getattr__(name):
+    # log_file_path used to be computed at import, reading the config in every process
+    if name == "log_file_path":
+        return os.getenv("LOG_FILE_PATH", config().get("log_file"))
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
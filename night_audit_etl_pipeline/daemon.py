@@ -0,0 +1,118 @@
+import os
+import time
+import signal
+import logging
+import threading
+from multiprocessing import cpu_count
+from night_audit_etl_pipeline.processor import (
+    fetch_processed, is_audit_pdf, process_pdf_task, send_run_summary, tracker_engine, worker_pool
+)
+from night_audit_etl_pipeline.metrics import write_run_report
+from night_audit_etl_pipeline.scheduler import makespan_report, plan_schedule
+from night_audit_etl_pipeline.watcher import FolderWatcher
+
+
+logger = logging.getLogger("night_audit_etl")
+
+DEFAULT_POLL_SECONDS = 5
+DEFAULT_SETTLE_SECONDS = 10
+DEFAULT_SHUTDOWN_TIMEOUT_SECONDS = 300
+
+
+def stop_on_signals(stop, signals=(signal.SIGTERM, signal.SIGINT)):
+    """Set `stop` on any of `signals`; returns the previous handlers for restore_signals.
+
+    Forked workers and writers inherit the handler and so ignore the signal
+    too: a SIGTERM sent to the whole process group doesn't cut a file short,
+    the parent stops them once their current file is done.
+    """
+    owner = os.getpid()
+
+    def handle(signum, frame):
+        if os.getpid() != owner:
+            return
+        logger.info(f"🛑 Received {signal.Signals(signum).name}, finishing files in progress...")
+        stop.set()
+    return {sig: signal.signal(sig, handle) for sig in signals}
+
+
+def restore_signals(previous):
+    for sig, handler in previous.items():
+        signal.signal(sig, handler)
+
+
+def run_daemon(pdf_folder, mysql_conn_str, logger_initializer=None, options=None, stop=None):
+    """Watch `pdf_folder` and load each new audit as soon as it has finished arriving.
+
+    The worker pool, with each worker's engine and imports, stays up between
+    files. Files are picked up once `daemon.settle_seconds` have passed without
+    them changing. Every burst of files (the pool going idle again) gets its own
+    summary email. On SIGTERM or SIGINT no new files are started; the ones in
+    progress get `daemon.shutdown_timeout_seconds` to finish and the rest are
+    picked up again on the next start.
+    """
+    options = options or {}
+    daemon_opts = options.get("daemon") or {}
+    poll_seconds = daemon_opts.get("poll_seconds", DEFAULT_POLL_SECONDS)
+    shutdown_timeout = daemon_opts.get("shutdown_timeout_seconds", DEFAULT_SHUTDOWN_TIMEOUT_SECONDS)
+    watcher = FolderWatcher(pdf_folder, daemon_opts.get("settle_seconds", DEFAULT_SETTLE_SECONDS), accept=is_audit_pdf)
+    num_workers = max(1, cpu_count())
+    stop = stop or threading.Event()
+    previous_handlers = stop_on_signals(stop)
+
+    batch = None  # {"started", "plan", "results", "skipped"} for the current burst of files
+
+    def collect(tasks):
+        for task in tasks:
+            filename = task.args[1]
+            if task.status == "ERROR":
+                logger.error(f"❌ {filename} failed in worker:\n{task.value}")
+                batch["results"].append({"filename": filename, "status": "FAIL", "rows": 0})
+            elif task.value:
+                batch["results"].append(task.value)
+
+    def finish_batch():
+        makespan = makespan_report(batch["plan"], batch["results"], num_workers, time.perf_counter() - batch["started"])
+        write_run_report(batch["skipped"] + batch["results"], options, makespan["actual_seconds"])
+        send_run_summary(batch["skipped"] + batch["results"], makespan)
+
+    logger.info(f"👀 Watching {pdf_folder} every {poll_seconds}s with {num_workers} workers")
+    try:
+        with tracker_engine(mysql_conn_str, options) as tracker, \
+                worker_pool(num_workers, mysql_conn_str, logger_initializer, options) as pool:
+            while not stop.is_set():
+                ready = watcher.poll()
+                if ready:
+                    processed = fetch_processed(tracker, ready)
+                    planned = plan_schedule(pdf_folder, [f for f in ready if f not in processed], options)
+                    if processed:
+                        logger.info(f"⏭️ Skipping {len(processed)} already processed files")
+                    if planned:
+                        if batch is None:
+                            batch = {"started": time.perf_counter(), "plan": [], "results": [], "skipped": []}
+                        batch["plan"].extend(planned)
+                        batch["skipped"].extend({"filename": f, "status": "SKIPPED", "rows": 0} for f in sorted(processed))
+                        logger.info(f"📥 {len(planned)} new files: {', '.join(p.filename for p in planned)}")
+                        for p in planned:
+                            pool.submit(process_pdf_task, (pdf_folder, p.filename, mysql_conn_str, options))
+
+                if pool.outstanding:
+                    collect(pool.poll(timeout=poll_seconds))
+                    continue
+                if batch is not None:
+                    finish_batch()
+                    batch = None
+                stop.wait(poll_seconds)
+
+            deadline = time.monotonic() + shutdown_timeout
+            if pool.outstanding:
+                logger.info(f"⏳ Waiting up to {shutdown_timeout}s for {pool.outstanding} files in progress")
+            while pool.outstanding and time.monotonic() < deadline:
+                collect(pool.poll(timeout=1.0))
+            if pool.outstanding:
+                logger.warning(f"⚠️ {pool.outstanding} files still running at shutdown; they load on the next start")
+            if batch is not None:
+                finish_batch()
+    finally:
+        restore_signals(previous_handlers)
+    logger.info("👋 Daemon stopped")
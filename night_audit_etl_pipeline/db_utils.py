@@ -1,28 +1,104 @@
 # db_utils.py
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
 from datetime import datetime
 import pandas as pd
+import os
 import time
+import tempfile
 import traceback
 import logging
+from night_audit_etl_pipeline.schemas import apply_schema, sql_dtypes
 
-logger = logging.getLogger(__name__)
+logger = logging.getLogger("night_audit_etl")
 
-# def create_db_engine(mysql_conn_str):
-#     return create_engine(mysql_conn_str)
+# Frames at or above this size go through LOAD DATA LOCAL INFILE; smaller ones use
+# multi-row INSERTs, where the temp-file round trip isn't worth it.
+BULK_LOAD_MIN_ROWS = 2000
+# Upper bound on bound values (rows x columns) per multi-row INSERT statement.
+INSERT_MAX_VALUES = 20000
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that counts connects, checkouts and checkouts that had to wait."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = {"connects": 0, "checkouts": 0, "waits": 0, "wait_seconds": 0.0}
+
+    def _do_get(self):
+        # No idle connection and no overflow headroom left: this checkout blocks.
+        if self.checkedin() == 0 and self._max_overflow > -1 and self.overflow() >= self._max_overflow:
+            start = time.perf_counter()
+            conn = super()._do_get()
+            self.stats["waits"] += 1
+            self.stats["wait_seconds"] += time.perf_counter() - start
+            return conn
+        return super()._do_get()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_stats(engine):
+    return dict(getattr(engine.pool, "stats", {}))
+
+
+def create_db_engine(mysql_conn_str, pool_size=5, max_overflow=10, pool_pre_ping=False, pool_recycle=-1):
+    connect_args = {"local_infile": True} if mysql_conn_str.startswith("mysql") else {}
+    engine = create_engine(
+        mysql_conn_str, connect_args=connect_args, poolclass=MeteredQueuePool,
+        pool_size=pool_size, max_overflow=max_overflow,
+        pool_pre_ping=pool_pre_ping, pool_recycle=pool_recycle,
+    )
+
+    @event.listens_for(engine, "connect")
+    def count_connect(dbapi_connection, connection_record):
+        engine.pool.stats["connects"] += 1
+
+    @event.listens_for(engine, "checkout")
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        engine.pool.stats["checkouts"] += 1
 
-def create_db_engine(mysql_conn_str):
-    engine = create_engine(mysql_conn_str)
     logger.info(f"🔍 Engine type: {type(engine)}")
     return engine
 
+def engine_options(options):
+    """create_db_engine keyword arguments from the config's etl.db_pool block."""
+    pool_opts = (options or {}).get("db_pool") or {}
+    return {k: pool_opts[k] for k in ("pool_size", "max_overflow", "pool_pre_ping", "pool_recycle") if k in pool_opts}
+
+
+@contextmanager
+def transaction(engine):
+    # A Connection is already inside the caller's per-file transaction, which owns the commit.
+    if isinstance(engine, Connection):
+        yield engine
+    else:
+        with engine.begin() as conn:
+            yield conn
+
+
+@contextmanager
+def section_savepoint(engine):
+    # Inside a per-file transaction a failed section rolls back to its savepoint only.
+    if isinstance(engine, Connection):
+        with engine.begin_nested():
+            yield
+    else:
+        yield
+
+
 def update_file_tracker(engine, filename, status, row_count=None, error_message=None):
     sql = text("""
         INSERT INTO file_tracker (source_file, load_date, status, rows_loaded, error_message)
         VALUES (:filename, NOW(), :status, :row_count, :error_message)
     """)
-    with engine.begin() as conn:
+    with transaction(engine) as conn:
         conn.execute(sql, {
             "filename": filename,
             "status": status,
@@ -45,14 +121,125 @@ def is_file_already_processed(engine, filename):
         return False
 
 
+# Statuses that mean a file is done and must not be loaded again.
+PROCESSED_STATUSES = ('SUCCESS', 'PARTIAL')
+PROCESSED_LOOKUP_CHUNK = 500
+
+
+def fetch_processed_files(engine, filenames, chunk_size=PROCESSED_LOOKUP_CHUNK):
+    """Return the subset of `filenames` already loaded, in one query per chunk.
+
+    Served by the file_tracker (source_file, status) index, see ensure_file_tracker_index.
+    """
+    sql = text("""
+        SELECT DISTINCT source_file FROM file_tracker
+        WHERE source_file IN :filenames AND status IN :statuses
+    """).bindparams(bindparam("filenames", expanding=True), bindparam("statuses", expanding=True))
+    processed = set()
+    filenames = list(filenames)
+    try:
+        with engine.connect() as conn:
+            for i in range(0, len(filenames), chunk_size):
+                rows = conn.execute(sql, {"filenames": filenames[i:i + chunk_size], "statuses": list(PROCESSED_STATUSES)})
+                processed.update(row[0] for row in rows)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to check file_tracker for {len(filenames)} files: {e}")
+    return processed
+
+
+FILE_TRACKER_INDEX = "idx_file_tracker_source_status"
+
+
+def ensure_file_tracker_index(engine):
+    """Create the file_tracker (source_file, status) index if it is missing.
+
+    Equivalent DDL:
+        CREATE INDEX idx_file_tracker_source_status ON file_tracker (source_file, status);
+    It turns both the per-file and the batched "already processed" lookups into index seeks.
+    """
+    try:
+        with transaction(engine) as conn:
+            exists = conn.execute(text("""
+                SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'file_tracker' AND index_name = :index_name
+            """), {"index_name": FILE_TRACKER_INDEX}).scalar()
+            if not exists:
+                conn.execute(text(f"CREATE INDEX {FILE_TRACKER_INDEX} ON file_tracker (source_file, status)"))
+                logger.info(f"🗂️ Created index {FILE_TRACKER_INDEX} on file_tracker")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not ensure index on file_tracker: {e}")
+
+
+def insert_chunksize(df):
+    return max(1, INSERT_MAX_VALUES // max(1, len(df.columns)))
+
+
+def load_data_lines(df):
+    """Render `df` as tab-separated lines in MySQL's default LOAD DATA escaping."""
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == bool:
+            values = values.astype(int)
+        nulls = values.isna()
+        values = (values.astype(str)
+                        .str.replace("\\", "\\\\", regex=False)
+                        .str.replace("\t", "\\t", regex=False)
+                        .str.replace("\n", "\\n", regex=False)
+                        .str.replace("\r", "\\r", regex=False))
+        values[nulls] = "\\N"
+        columns.append(values)
+    return columns[0].str.cat(columns[1:], sep="\t")
+
+
+def load_data_infile(engine, df, table_name):
+    with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False, encoding="utf-8", newline="") as f:
+        f.write("\n".join(load_data_lines(df)))
+        f.write("\n")
+        tsv_path = f.name
+    try:
+        columns = ", ".join(f"`{c}`" for c in df.columns)
+        sql = text(
+            f"LOAD DATA LOCAL INFILE :path INTO TABLE `{table_name}` CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})"
+        )
+        with transaction(engine) as conn:
+            conn.execute(sql, {"path": tsv_path})
+    finally:
+        os.remove(tsv_path)
+
+
+def bulk_load_dataframe(engine, df, table_name):
+    """Append `df` to `table_name` with the fastest path for its size.
+
+    Returns (method, rows, seconds).
+    """
+    start = time.perf_counter()
+    method = "insert"
+    if len(df) >= BULK_LOAD_MIN_ROWS and engine.dialect.name == "mysql":
+        try:
+            load_data_infile(engine, df, table_name)
+            method = "load_data"
+        except Exception as e:
+            logger.warning(f"⚠️ LOAD DATA LOCAL INFILE into {table_name} failed, falling back to INSERT: {e}")
+    if method == "insert":
+        df.to_sql(table_name, con=engine, if_exists='append', index=False,
+                  method='multi', chunksize=insert_chunksize(df), dtype=sql_dtypes(table_name, df.columns))
+    return method, len(df), time.perf_counter() - start
+
+
 def insert_dataframe(engine, df, table_name, filename, retries=3, delay=5):
+    if isinstance(engine, Connection):
+        retries = 1  # a failed statement can't be retried inside the file's transaction
     attempt = 0
     while attempt < retries:
         try:
             df["source_file"] = filename
             df["load_timestamp"] = datetime.now()
-            df.to_sql(table_name, con=engine, if_exists='append', index=False)
-            logger.info(f"✅ Loaded {len(df)} rows into {table_name} from {filename}")
+            apply_schema(df, table_name)
+            method, rows, seconds = bulk_load_dataframe(engine, df, table_name)
+            rate = rows / seconds if seconds > 0 else float(rows)
+            logger.info(f"✅ Loaded {rows} rows into {table_name} from {filename} via {method} ({rate:,.0f} rows/s)")
             return
         except Exception as e:
             logger.error(f"❌ Insert attempt {attempt + 1} failed for {table_name}: {e}\n{traceback.format_exc()}")
@@ -0,0 +1,105 @@
+import re
+from collections import namedtuple
+from night_audit_etl_pipeline.extractors import BUSINESS_DATE_RE, PROPERTY_CODE_RE, USER_RE, DATE_RE
+
+
+# Sections with irregular row layouts; regular ones are SectionSpecs in grammar.py.
+# How the lines of one report section are picked out of the document:
+#   start / stops - markers opening and closing a span; both marker lines are routed
+#                   so the section extractor sees the same boundaries it always did
+#   page_scoped   - a span ends at the page break (the extractor resets per page)
+#   whole_page    - route every line of any page containing `start`
+#   carry         - markers routed wherever they appear, for state the extractor
+#                   tracks outside its spans (e.g. the current transaction code)
+SectionRoute = namedtuple("SectionRoute", ["name", "start", "stops", "page_scoped", "whole_page", "carry"],
+                          defaults=((), False, False, ()))
+
+LINE_ROUTES = [
+    SectionRoute("inhouse", "In House List", whole_page=True),
+    SectionRoute("hotel_journal_details", "Hotel Journal Detail",
+                 ("Hotel Journal Summary", "Date/Time of Printing", "Totals:", "Software Version"),
+                 page_scoped=True, carry=("Transaction Code:",)),
+    SectionRoute("advance_deposit_journal", "Advance Deposit Journal", ("Advance Deposit Ledger",)),
+]
+
+# marker -> (regex, field) for the report metadata gathered in the same pass; last match wins
+METADATA_MARKERS = {
+    "Business Date:": (BUSINESS_DATE_RE, "business_date"),
+    "Property Code:": (PROPERTY_CODE_RE, "prop_code"),
+    "User:": (USER_RE, "user_id"),
+    "Date/Time of Printing:": (DATE_RE, "report_date"),
+}
+
+Dispatch = namedtuple("Dispatch", ["sections", "metadata"])
+
+
+def compile_prefilter(routes, extra_markers=()):
+    """One alternation over every marker, so lines with none of them cost a single scan."""
+    markers = set(extra_markers)
+    for route in routes:
+        markers.add(route.start)
+        markers.update(route.stops)
+        markers.update(route.carry)
+    return re.compile("|".join(re.escape(m) for m in sorted(markers, key=len, reverse=True)))
+
+
+_DEFAULT_PREFILTER = compile_prefilter(LINE_ROUTES, METADATA_MARKERS)
+
+
+def dispatch_lines(list_of_pages, routes=LINE_ROUTES, prefilter=None):
+    """Walk the document's lines once and split them into per-section sub-pages.
+
+    Returns Dispatch(sections, metadata): `sections` maps each route name to the
+    pages (lists of lines) holding its lines, ready for the section's existing
+    extractor; `metadata` is (business_date, prop_code, user_id, report_date) as
+    extract_metadata would return it.
+    """
+    if prefilter is None:
+        prefilter = _DEFAULT_PREFILTER if routes is LINE_ROUTES else compile_prefilter(routes, METADATA_MARKERS)
+    sections = {route.name: [] for route in routes}
+    collecting = {route.name: False for route in routes}
+    metadata = dict.fromkeys(["business_date", "prop_code", "user_id", "report_date"])
+
+    for lines in list_of_pages:
+        page_out = {route.name: [] for route in routes}
+        whole_page_hits = []
+        for route in routes:
+            if route.page_scoped:
+                collecting[route.name] = False
+
+        for line in lines:
+            if not prefilter.search(line):
+                # Common case: no marker, only sections mid-span take the line
+                for name, active in collecting.items():
+                    if active:
+                        page_out[name].append(line)
+                continue
+
+            for marker, (regex, field) in METADATA_MARKERS.items():
+                if marker in line:
+                    match = regex.search(line)
+                    if match:
+                        metadata[field] = match.group(1)
+
+            for route in routes:
+                name = route.name
+                if route.whole_page:
+                    if route.start in line and name not in whole_page_hits:
+                        whole_page_hits.append(name)
+                elif route.start in line:
+                    collecting[name] = True
+                    page_out[name].append(line)
+                elif collecting[name] and any(stop in line for stop in route.stops):
+                    collecting[name] = False
+                    page_out[name].append(line)
+                elif collecting[name] or any(marker in line for marker in route.carry):
+                    page_out[name].append(line)
+
+        for name in whole_page_hits:
+            page_out[name] = list(lines)
+        for name, routed in page_out.items():
+            if routed:
+                sections[name].append(routed)
+
+    meta = (metadata["business_date"], metadata["prop_code"], metadata["user_id"], metadata["report_date"])
+    return Dispatch(sections, meta)
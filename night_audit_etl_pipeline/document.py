@@ -0,0 +1,233 @@
+import io
+import os
+import hashlib
+import logging
+import tempfile
+import pandas as pd
+from night_audit_etl_pipeline.line_index import LineIndex
+from night_audit_etl_pipeline.metrics import timed
+
+
+logger = logging.getLogger("night_audit_etl")
+
+
+# Report headers as they appear in the fitz text layer, used to map sections to pages.
+SECTION_HEADERS = [
+    "A/R Aging", "Final Transaction Closeout", "Gross Room Revenue", "In House List",
+    "Hotel Statistics", "Ledger Activity Report", "Ledger Summary", "No Show Report",
+    "Rate Discrepancy Report", "Reservation Activity Report", "Hotel Journal Detail",
+    "Hotel Journal Summary", "Shift Reconciliation Closeout", "Tax Exempt Revenue Summary",
+    "Revenue by Rate Code", "Advance Deposit Journal",
+]
+
+# Sections whose extractors consume Camelot tables; only their pages are handed to Camelot.
+TABLE_SECTIONS = ["Hotel Journal Summary", "Final Transaction Closeout", "Gross Room Revenue", "Revenue by Rate Code"]
+
+# Camelot only reads files: documents that arrived as bytes are spilled here (RAM-backed on Linux)
+TMPFS_DIR = "/dev/shm"
+
+
+def spill_dir():
+    """TMPFS_DIR when usable, else None for the platform's temp directory."""
+    return TMPFS_DIR if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK) else None
+
+
+def build_section_index(page_texts, headers=SECTION_HEADERS):
+    """Map each section header to its (first_page, last_page), 1-based.
+
+    A page without any header is treated as a continuation of the section whose
+    header appeared last on the previous page.
+    """
+    index = {}
+    current = None
+    for page_no, text in enumerate(page_texts, start=1):
+        found = sorted((text.find(h), h) for h in headers if h in text)
+        if found:
+            current = found[-1][1]
+            on_page = [h for _, h in found]
+        elif current:
+            on_page = [current]
+        else:
+            continue
+        for header in on_page:
+            first, _ = index.get(header, (page_no, page_no))
+            index[header] = (first, page_no)
+    return index
+
+
+def pages_spec(section_index, sections):
+    """Camelot `pages=` string covering the given sections, or None if none were found."""
+    pages = set()
+    for name in sections:
+        if name in section_index:
+            first, last = section_index[name]
+            pages.update(range(first, last + 1))
+    if not pages:
+        return None
+    ranges, start, prev = [], None, None
+    for page in sorted(pages):
+        if start is None:
+            start = prev = page
+        elif page == prev + 1:
+            prev = page
+        else:
+            ranges.append((start, prev))
+            start = prev = page
+    ranges.append((start, prev))
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+class _PageText:
+    # Stand-in for a pdfplumber page: extractors that walk `pdf.pages` and call
+    # `extract_text()` get the cached text instead of re-running the text layer.
+    def __init__(self, text):
+        self._text = text
+
+    def extract_text(self):
+        return self._text
+
+
+class _TableFrame:
+    # Table restored from the page cache; Camelot extractors only read `.df`.
+    def __init__(self, rows):
+        self.df = pd.DataFrame(rows)
+
+
+class AuditDocument:
+    """One night audit PDF, parsed at most once per text/table layer.
+
+    The raw bytes are read once; fitz page text, pdfplumber lines and Camelot
+    tables are each materialised on first access and reused by every extractor.
+    A document built straight from bytes (`on_disk=False`) never needs a local
+    copy of the file, except for a short-lived one in tmpfs for Camelot.
+    """
+
+    def __init__(self, pdf_path, data=None, on_disk=False):
+        self.pdf_path = pdf_path
+        self.filename = os.path.basename(pdf_path)
+        self.data = data
+        self.on_disk = on_disk
+        self._page_texts = None
+        self._plumber_texts = None
+        self._list_of_pages = None
+        self._line_index = None
+        self._camelot_tables = None
+        self._camelot_error = None
+        self._section_index = None
+        self._sha256 = None
+        self.cached_layers = set()
+
+    @classmethod
+    def from_path(cls, pdf_path):
+        with open(pdf_path, "rb") as f:
+            return cls(pdf_path, f.read(), on_disk=True)
+
+    @property
+    def sha256(self):
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.data).hexdigest()
+        return self._sha256
+
+    # --- cache export/import ---
+    def export_layers(self):
+        """Every layer materialised so far, as plain lists (None if not parsed)."""
+        return {
+            "page_texts": self._page_texts,
+            "plumber_texts": self._plumber_texts,
+            "camelot_tables": [t.df.astype(str).values.tolist() for t in self._camelot_tables]
+            if self._camelot_tables is not None else None,
+        }
+
+    def import_layers(self, layers):
+        if layers.get("page_texts") is not None:
+            self._page_texts = layers["page_texts"]
+        if layers.get("plumber_texts") is not None:
+            self._plumber_texts = layers["plumber_texts"]
+        if layers.get("camelot_tables") is not None:
+            self._camelot_tables = [_TableFrame(rows) for rows in layers["camelot_tables"]]
+        self.cached_layers = {k for k, v in layers.items() if v is not None}
+
+    # --- fitz text layer ---
+    @property
+    def page_texts(self):
+        if self._page_texts is None:
+            import fitz
+            with timed("fitz") as t, fitz.open(stream=self.data, filetype="pdf") as doc:
+                self._page_texts = [page.get_text() for page in doc]
+                t["bytes"] = len(self.data)
+        return self._page_texts
+
+    @property
+    def page_count(self):
+        return len(self.page_texts)
+
+    @property
+    def section_index(self):
+        if self._section_index is None:
+            self._section_index = build_section_index(self.page_texts)
+        return self._section_index
+
+    # --- pdfplumber text layer ---
+    @property
+    def plumber_texts(self):
+        if self._plumber_texts is None:
+            import pdfplumber
+            texts = []
+            with timed("pdfplumber") as t, pdfplumber.open(io.BytesIO(self.data)) as pdf:
+                t["bytes"] = len(self.data)
+                for page in pdf.pages:
+                    texts.append(page.extract_text() or "")
+                    page.close()
+            self._plumber_texts = texts
+        return self._plumber_texts
+
+    @property
+    def list_of_pages(self):
+        if self._list_of_pages is None:
+            self._list_of_pages = [text.split('\n') for text in self.plumber_texts]
+        return self._list_of_pages
+
+    @property
+    def line_index(self):
+        # Same text as joining list_of_pages, held once with line/page offsets
+        if self._line_index is None:
+            self._line_index = LineIndex.from_pages(self.plumber_texts)
+        return self._line_index
+
+    @property
+    def full_text(self):
+        return self.line_index.text
+
+    @property
+    def pages(self):
+        return [_PageText(text) for text in self.plumber_texts]
+
+    # --- Camelot table candidates ---
+    @property
+    def camelot_tables(self):
+        # A failed parse is remembered: every table section then fails with the
+        # same error instead of running Camelot over the pages again.
+        if self._camelot_error is not None:
+            raise self._camelot_error
+        if self._camelot_tables is None:
+            import camelot  # pulls in OpenCV and pdfminer: only paid by files that reach Camelot
+            pages = pages_spec(self.section_index, TABLE_SECTIONS)
+            if pages is None:
+                logger.warning(f"⚠️ No table sections found in {self.filename}, parsing all pages with Camelot")
+                pages = 'all'
+            try:
+                with timed("camelot") as t:
+                    if self.on_disk:
+                        tables = camelot.read_pdf(self.pdf_path, pages=pages, flavor='stream', strip_text='\n')
+                    else:
+                        with tempfile.NamedTemporaryFile(suffix=".pdf", dir=spill_dir()) as spill:
+                            spill.write(self.data)
+                            spill.flush()
+                            tables = camelot.read_pdf(spill.name, pages=pages, flavor='stream', strip_text='\n')
+                    t["rows"] = len(tables)
+            except Exception as e:
+                logger.error(f"❌ Camelot failed on {self.filename}, skipping its table sections: {e}")
+                self._camelot_error = e
+                raise
+            self._camelot_tables = tables
+        return self._camelot_tables
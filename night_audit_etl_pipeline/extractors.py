@@ -1,78 +1,58 @@
 import re
 import pandas as pd
-import camelot
-import fitz
-import pdfplumber
 from datetime import datetime
 import traceback
 import logging
-from night_audit_etl_pipeline.helpers import convert_date, safe_float, is_strictly_numeric, extract_amount , clean_column_names, add_metadata, clean_numeric_column
+from night_audit_etl_pipeline.helpers import convert_date, safe_float, convert_date_column, safe_float_column, is_strictly_numeric, extract_amount , clean_column_names, add_metadata, clean_numeric_column
 from night_audit_etl_pipeline.logger import setup_logger
+from night_audit_etl_pipeline.line_index import as_line_index, text_of
+from night_audit_etl_pipeline.grammar import SectionMachine, spec_frame, AR_AGING, TRANSACTION_CLOSEOUT
 
 
 
 logger = logging.getLogger("night_audit_etl")
 
+# Patterns used on every line of a report, compiled once at import.
+BUSINESS_DATE_RE = re.compile(r'Business Date:\s*(\d{1,2}/\d{1,2}/\d{4})')
+PROPERTY_CODE_RE = re.compile(r'Property Code:\s*(\S+)')
+USER_RE = re.compile(r'User:\s*(\S+)')
+DATE_RE = re.compile(r'(\d{1,2}/\d{1,2}/\d{4})')
+ROOM_RE = re.compile(r'^\d{3}$')
+SHORT_DATE_RE = re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}')
+CONFIRMATION_RE = re.compile(r'(\d{6,8})$')
+JOURNAL_AMOUNT_RE = re.compile(r'(\(?-?\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})?\)?)\s+0\.00$')
+LEDGER_AMOUNT_RE = re.compile(r'-?\(?[\d,.]+\)?')
+TRANSACTION_CODE_RE = re.compile(r"Transaction Code:\s*(.+)")
+DEPOSIT_ROW_RE = re.compile(r"(\d{1,2}/\d{1,2}/\d{2,4})\s+(\S+)\s+(\S+)\s+(\d+)\s+(.+?)\s+(\(?-?\d+\.?\d*\)?)$")
+
 
 def extract_metadata(list_of_pages):
     business_date = prop_code = user_id = report_date = None
     for lines in list_of_pages:
         for line in lines:
             if "Business Date:" in line:
-                match = re.search(r'Business Date:\s*(\d{1,2}/\d{1,2}/\d{4})', line)
+                match = BUSINESS_DATE_RE.search(line)
                 if match: business_date = match.group(1)
             if "Property Code:" in line:
-                match = re.search(r'Property Code:\s*(\S+)', line)
+                match = PROPERTY_CODE_RE.search(line)
                 if match: prop_code = match.group(1)
             if "User:" in line:
-                match = re.search(r'User:\s*(\S+)', line)
+                match = USER_RE.search(line)
                 if match: user_id = match.group(1)
             if "Date/Time of Printing:" in line:
-                match = re.search(r'(\d{1,2}/\d{1,2}/\d{4})', line)
+                match = DATE_RE.search(line)
                 if match: report_date = match.group(1)
     return business_date, prop_code, user_id, report_date
 
 # === Insert all utility and extractor functions here (unchanged) ===
 
 def extract_ar_aging(list_of_pages):
-    rows = []
-    header = ['Account', 'Guest Name', 'Current', '30Days', '60Days', '90Days', '120Days', 'Credits', 'Balance', 'Limit']
-    collecting = False
-    for lines in list_of_pages:
-        for line in lines:
-            if "A/R Aging" in line:
-                collecting = True
-                continue
-            if collecting and any(stop in line for stop in ["Grand Total", "Advance Deposit", "Transaction Code", "Ledger", "Date/Time"]):
-                collecting = False
-                continue
-            if collecting and ("Account Name" in line or not line.strip()):
-                continue
-            tokens = line.strip().split()
-            if len(tokens) >= 10:
-                account = tokens[0]
-                numeric_tail = tokens[-8:]
-                guest_name = " ".join(tokens[1:-8])
-                if re.fullmatch(r"\d+", account) and all(is_strictly_numeric(val) for val in numeric_tail):
-                    rows.append([account, guest_name] + numeric_tail)
-    return pd.DataFrame(rows, columns=header) if rows else pd.DataFrame(columns=header)
+    rows = SectionMachine([AR_AGING]).run(list_of_pages)[AR_AGING.name]
+    return spec_frame(AR_AGING, rows, typed=False)
 
 def extract_transaction_closeout(list_of_pages):
-    pattern = re.compile(r'^(.*?)\s+([-0-9,().]+)\s+([-0-9,().]+)\s+([-0-9,().]+)\s+([-0-9,().]+)\s+([-0-9,().]+)\s+([-0-9,().]+)$')
-    results = []
-    for lines in list_of_pages:
-        collecting = False
-        for line in lines:
-            if "Final Transaction Closeout" in line:
-                collecting = True; continue
-            if collecting and any(k in line for k in ["Date/Time of Printing", "Gross Room Revenue", "Totals:"]):
-                collecting = False; continue
-            if collecting:
-                match = pattern.match(line.strip())
-                if match:
-                    results.append(match.groups())
-    cols = ["Description", "Opening Balance", "Today's Total", "Today's Adjustments", "Today's Net", "PTD Totals", "YTD Totals"]
-    return pd.DataFrame(results, columns=cols) if results else pd.DataFrame(columns=cols)
+    rows = SectionMachine([TRANSACTION_CLOSEOUT]).run(list_of_pages)[TRANSACTION_CLOSEOUT.name]
+    return spec_frame(TRANSACTION_CLOSEOUT, rows, typed=False)
 
 
 # --- Helper Functions ---
@@ -87,16 +67,16 @@ def parse_inhouse_list_with_confirmation(lines):
     records = []
     for line in lines:
         parts = line.split()
-        if len(parts) >= 9 and re.match(r'^\d{3}$', parts[0]) and parts[1].isdigit():
+        if len(parts) >= 9 and ROOM_RE.match(parts[0]) and parts[1].isdigit():
             room = parts[0]
             account = parts[1]
             guest_parts, idx = [], 2
-            while idx < len(parts) and not re.match(r'\d{1,2}/\d{1,2}/\d{2,4}', parts[idx]):
+            while idx < len(parts) and not SHORT_DATE_RE.match(parts[idx]):
                 guest_parts.append(parts[idx])
                 idx += 1
             guest_name_raw = " ".join(guest_parts)
             confirmation_number = ""
-            match = re.search(r'(\d{6,8})$', guest_name_raw)
+            match = CONFIRMATION_RE.search(guest_name_raw)
             if match:
                 confirmation_number = match.group(1)
                 guest_name = guest_name_raw[:match.start()].strip()
@@ -129,14 +109,15 @@ def extract_inhouse_df(list_of_pages):
     df = parse_inhouse_list_with_confirmation(inhouse_lines)
     if df.empty:
         return df
-    df["arrive"] = df["arrive"].apply(convert_date)
-    df["depart"] = df["depart"].apply(convert_date)
-    df["rate"] = df["rate"].apply(safe_float)
-    df["balance"] = df["balance"].apply(safe_float)
+    df["arrive"] = convert_date_column(df["arrive"])
+    df["depart"] = convert_date_column(df["depart"])
+    df["rate"] = safe_float_column(df["rate"])
+    df["balance"] = safe_float_column(df["balance"])
     return df
 
 
 def extract_section_text(text, start_marker, end_marker=None):
+    text = text_of(text)
     start_idx = text.find(start_marker)
     if start_idx == -1:
         return None
@@ -171,20 +152,19 @@ def parse_hotel_statistics(section_text, business_date):
 
 
 def extract_ledger_activity_report_with_metadata(full_text):
-    start_idx = full_text.find('Ledger Activity Report')
-    end_idx = full_text.find('Ledger Summary')
+    index = as_line_index(full_text)
+    start_idx = index.find('Ledger Activity Report')
+    end_idx = index.find('Ledger Summary')
     if start_idx == -1:
         raise Exception("Ledger Activity Report section not found")
-    ledger_text = full_text[start_idx:end_idx] if end_idx != -1 else full_text[start_idx:]
-    lines = ledger_text.splitlines()
-    lines = [line.strip() for line in lines if line.strip()]
+    lines = list(index.lines(start_idx, end_idx if end_idx != -1 else None))
     business_date = user = None
     for line in lines:
         if "Business Date:" in line:
             match = re.search(r'Business Date:\s*([\d/]+)', line)
             if match: business_date = match.group(1)
         if "User:" in line:
-            match = re.search(r'User:\s*(\S+)', line)
+            match = USER_RE.search(line)
             if match: user = match.group(1)
     ledgers = []
     current_entry = {}
@@ -196,19 +176,19 @@ def extract_ledger_activity_report_with_metadata(full_text):
             current_ledger = line
             current_entry = {'ledger_type': current_ledger}
         elif 'Opening Balance' in line:
-            current_entry['opening_balance'] = extract_amount(re.search(r'-?\(?[\d,.]+\)?', line).group(0))
+            current_entry['opening_balance'] = extract_amount(LEDGER_AMOUNT_RE.search(line).group(0))
         elif 'Credits' in line:
-            current_entry['credits'] = extract_amount(re.search(r'-?\(?[\d,.]+\)?', line).group(0))
+            current_entry['credits'] = extract_amount(LEDGER_AMOUNT_RE.search(line).group(0))
         elif 'Adjustments' in line:
-            current_entry['adjustments'] = extract_amount(re.search(r'-?\(?[\d,.]+\)?', line).group(0))
+            current_entry['adjustments'] = extract_amount(LEDGER_AMOUNT_RE.search(line).group(0))
         elif 'Debits' in line:
-            current_entry['debits'] = extract_amount(re.search(r'-?\(?[\d,.]+\)?', line).group(0))
+            current_entry['debits'] = extract_amount(LEDGER_AMOUNT_RE.search(line).group(0))
         elif 'Transfer' in line:
             if 'transfers' not in current_entry:
                 current_entry['transfers'] = 0
-            current_entry['transfers'] += extract_amount(re.search(r'-?\(?[\d,.]+\)?', line).group(0))
+            current_entry['transfers'] += extract_amount(LEDGER_AMOUNT_RE.search(line).group(0))
         elif 'Balance Forward' in line and 'Total Balance Forward' not in line:
-            current_entry['balance_forward'] = extract_amount(re.search(r'-?\(?[\d,.]+\)?', line).group(0))
+            current_entry['balance_forward'] = extract_amount(LEDGER_AMOUNT_RE.search(line).group(0))
         elif 'Total Balance Forward' in line:
             break
     if current_entry:
@@ -220,14 +200,17 @@ def extract_ledger_activity_report_with_metadata(full_text):
 
 
 def extract_ledger_summary_with_metadata(pdf):
-    full_text = "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-    start_idx = full_text.find("Ledger Summary")
+    if hasattr(pdf, "line_index"):
+        index = pdf.line_index
+    else:
+        index = as_line_index("\n".join([page.extract_text() for page in pdf.pages if page.extract_text()]))
+    full_text = index.text
+    start_idx = index.find("Ledger Summary")
     if start_idx == -1:
         logger.warning("⚠️ Ledger Summary section not found.")
         return pd.DataFrame()
 
-    ledger_text = full_text[start_idx:]
-    lines = [line.strip() for line in ledger_text.splitlines() if line.strip()]
+    lines = list(index.lines(start_idx))
 
     # Metadata
     business_date = None
@@ -280,13 +263,14 @@ def extract_ledger_summary_with_metadata(pdf):
 
 
 def extract_no_show_report(list_of_pages, full_text, pdf_path):
-    start_idx = full_text.find("No Show Report")
+    index = as_line_index(full_text)
+    full_text = index.text
+    start_idx = index.find("No Show Report")
     if start_idx == -1:
         logger.warning("⚠️ No Show Report section not found in file:")
         return pd.DataFrame()
 
-    no_show_text = full_text[start_idx:]
-    lines = [line.strip() for line in no_show_text.splitlines() if line.strip()]
+    lines = index.lines(start_idx)
 
     business_date = user_id = None
     if "Business Date:" in full_text:
@@ -455,7 +439,7 @@ def extract_hotel_journal_details(list_of_pages):
             if any(skip in line for skip in skip_keywords):
                 continue
 
-            amount_match = re.search(r'(\(?-?\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})?\)?)\s+0\.00$', line)
+            amount_match = JOURNAL_AMOUNT_RE.search(line)
             if not amount_match:
                 continue
             try:
@@ -537,7 +521,7 @@ def extract_hotel_journal_summary(camelot_tables, filename, business_date):
                                     "transactions", "post_count", "corr_count", "adj_count"]
                     for col in numeric_cols:
                         df[col] = df[col].replace(['', 'NA', 'nan'], None)
-                        df[col] = df[col].apply(lambda x: safe_float(x) if pd.notnull(x) else None)
+                        df[col] = safe_float_column(df[col])
 
                     return df
     except Exception as e:
@@ -923,7 +907,7 @@ def extract_revenue_by_rate_code(camelot_tables, filename):
 
             float_cols = [col for col in df.columns if col not in ['file_name', 'rate_code']]
             for col in float_cols:
-                df[col] = df[col].apply(lambda x: safe_float(x))
+                df[col] = safe_float_column(df[col])
 
             return df
         else:
@@ -940,7 +924,6 @@ def extract_advance_deposit_journal(list_of_pages):
     records = []
     current_transaction_type = None
     collecting = False 
-    date_pattern = r"\d{1,2}/\d{1,2}/\d{2,4}"
 
     for page_idx, lines in enumerate(list_of_pages):
         for line_idx, line in enumerate(lines):
@@ -960,13 +943,13 @@ def extract_advance_deposit_journal(list_of_pages):
                 continue
 
             # Detect Transaction Code
-            transaction_match = re.search(r"Transaction Code:\s*(.+)", line)
+            transaction_match = TRANSACTION_CODE_RE.search(line)
             if transaction_match:
                 current_transaction_type = transaction_match.group(1).strip()
                 continue
 
             # Match deposit record
-            match = re.match(rf"({date_pattern})\s+(\S+)\s+(\S+)\s+(\d+)\s+(.+?)\s+(\(?-?\d+\.?\d*\)?)$", line)
+            match = DEPOSIT_ROW_RE.match(line)
             if match:
                 posting_date_raw, user_id, room_or_type, account_number, account_name, total = match.groups()
 
@@ -0,0 +1,146 @@
+import re
+from collections import namedtuple
+import pandas as pd
+from night_audit_etl_pipeline.helpers import convert_date_column
+
+
+# A report section described as data instead of a hand-written loop:
+#   start / stops / skip - markers opening a span, closing it, and lines to ignore inside it
+#   row                  - regex with one named group per column, matched on the stripped line
+#   columns              - Column(group, label, type) in group order; `label` is the header as
+#                          printed in the report, `type` one of COLUMN_TYPES
+#   page_scoped          - a span ends at the page break
+#   metadata             - add_metadata fields attached before loading
+SectionSpec = namedtuple("SectionSpec", ["name", "title", "table", "start", "stops", "row", "columns",
+                                         "skip", "page_scoped", "metadata"],
+                         defaults=((), False, ()))
+Column = namedtuple("Column", ["name", "label", "type"])
+
+
+def _amounts(series):
+    return series.str.replace(r"[$,)]", "", regex=True).str.replace("(", "-", regex=False).astype(float)
+
+
+COLUMN_TYPES = {
+    "str": lambda series: series,
+    "amount": _amounts,
+    "date": convert_date_column,
+}
+
+# State machine shared by every spec. Events are checked in the order START, STOP,
+# SKIP; any other line is LINE. (state, event) -> (next state, try the row regex)
+IDLE, COLLECTING = 0, 1
+START, STOP, SKIP, LINE = 0, 1, 2, 3
+TRANSITIONS = {
+    (IDLE, START): (COLLECTING, False),
+    (IDLE, STOP): (IDLE, False),
+    (IDLE, SKIP): (IDLE, False),
+    (IDLE, LINE): (IDLE, False),
+    (COLLECTING, START): (COLLECTING, False),
+    (COLLECTING, STOP): (IDLE, False),
+    (COLLECTING, SKIP): (COLLECTING, False),
+    (COLLECTING, LINE): (COLLECTING, True),
+}
+
+
+class SectionMachine:
+    """Specs compiled into one table-driven pass over the document's lines.
+
+    All markers of all specs share one alternation prefilter, so a line with no
+    marker only costs the row regex of the sections currently collecting.
+    """
+
+    def __init__(self, specs):
+        self.specs = list(specs)
+        self._rows = []
+        self._events = []
+        markers = set()
+        for spec in self.specs:
+            row = re.compile(spec.row)
+            if list(row.groupindex) != [c.name for c in spec.columns]:
+                raise ValueError(f"Row groups {list(row.groupindex)} of {spec.name} don't match its columns")
+            self._rows.append(row)
+            self._events.append([(m, START) for m in spec.start] + [(m, STOP) for m in spec.stops]
+                                + [(m, SKIP) for m in spec.skip])
+            markers.update(m for m, _ in self._events[-1])
+        self._prefilter = re.compile("|".join(re.escape(m) for m in sorted(markers, key=len, reverse=True)))
+        self._page_scoped = [i for i, spec in enumerate(self.specs) if spec.page_scoped]
+
+    def _event(self, index, line):
+        for marker, event in self._events[index]:
+            if marker in line:
+                return event
+        return LINE
+
+    def run(self, list_of_pages):
+        """{spec name: [row tuples]} with every value as the raw matched string."""
+        count = len(self.specs)
+        states = [IDLE] * count
+        rows = [[] for _ in range(count)]
+        for lines in list_of_pages:
+            for index in self._page_scoped:
+                states[index] = IDLE
+            for line in lines:
+                line = line.strip()
+                hit = self._prefilter.search(line) is not None
+                for index in range(count):
+                    event = self._event(index, line) if hit else LINE
+                    states[index], parse = TRANSITIONS[states[index], event]
+                    if parse:
+                        match = self._rows[index].match(line)
+                        if match:
+                            rows[index].append(match.groups())
+        return {spec.name: rows[index] for index, spec in enumerate(self.specs)}
+
+
+def spec_frame(spec, rows, typed=True):
+    """Rows as a DataFrame: typed columns named for the table, or raw strings under the report labels."""
+    if not typed:
+        labels = [c.label for c in spec.columns]
+        return pd.DataFrame(rows, columns=labels) if rows else pd.DataFrame(columns=labels)
+    df = pd.DataFrame(rows, columns=[c.name for c in spec.columns])
+    for column in spec.columns:
+        df[column.name] = COLUMN_TYPES[column.type](df[column.name])
+    return df
+
+
+_NUM = r"\(?-?\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})?\)?"
+_CLOSEOUT_NUM = r"[-0-9,().]+"
+
+AR_AGING = SectionSpec(
+    name="ar_aging", title="A/R Aging", table="ar_aging",
+    start=("A/R Aging",),
+    stops=("Grand Total", "Advance Deposit", "Transaction Code", "Ledger", "Date/Time"),
+    skip=("Account Name",),
+    row=(rf"(?P<account>\d+)\s+(?P<guest_name>.+?)\s+(?P<current>{_NUM})\s+(?P<days_30>{_NUM})\s+"
+         rf"(?P<days_60>{_NUM})\s+(?P<days_90>{_NUM})\s+(?P<days_120>{_NUM})\s+(?P<credits>{_NUM})\s+"
+         rf"(?P<balance>{_NUM})\s+(?P<limit_amount>{_NUM})$"),
+    columns=(
+        Column("account", "Account", "str"), Column("guest_name", "Guest Name", "str"),
+        Column("current", "Current", "amount"), Column("days_30", "30Days", "amount"),
+        Column("days_60", "60Days", "amount"), Column("days_90", "90Days", "amount"),
+        Column("days_120", "120Days", "amount"), Column("credits", "Credits", "amount"),
+        Column("balance", "Balance", "amount"), Column("limit_amount", "Limit", "amount"),
+    ),
+    metadata=("prop_code", "user_id", "report_date"),
+)
+
+TRANSACTION_CLOSEOUT = SectionSpec(
+    name="transaction_closeout", title="Transaction Closeout", table="transaction_closeout",
+    start=("Final Transaction Closeout",),
+    stops=("Date/Time of Printing", "Gross Room Revenue", "Totals:"),
+    row=(rf"^(?P<description>.*?)\s+(?P<opening_balance>{_CLOSEOUT_NUM})\s+(?P<todays_total>{_CLOSEOUT_NUM})\s+"
+         rf"(?P<todays_adjustments>{_CLOSEOUT_NUM})\s+(?P<todays_net>{_CLOSEOUT_NUM})\s+"
+         rf"(?P<ptd_totals>{_CLOSEOUT_NUM})\s+(?P<ytd_totals>{_CLOSEOUT_NUM})$"),
+    columns=(
+        Column("description", "Description", "str"), Column("opening_balance", "Opening Balance", "amount"),
+        Column("todays_total", "Today's Total", "amount"), Column("todays_adjustments", "Today's Adjustments", "amount"),
+        Column("todays_net", "Today's Net", "amount"), Column("ptd_totals", "PTD Totals", "amount"),
+        Column("ytd_totals", "YTD Totals", "amount"),
+    ),
+    page_scoped=True,
+    metadata=("prop_code", "user_id", "business_date"),
+)
+
+SECTION_SPECS = [AR_AGING, TRANSACTION_CLOSEOUT]
+SECTION_MACHINE = SectionMachine(SECTION_SPECS)
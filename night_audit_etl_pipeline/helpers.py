@@ -1,4 +1,5 @@
 import re
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -25,7 +26,40 @@ def add_metadata(df, prop_code=None, user_id=None, report_date=None, business_da
     return df
 
 
-def safe_float(val):
+# Night audit files repeat a small set of dates and amounts thousands of times, so
+# the scalar parsers memoise string inputs. The caches live per process, shared by
+# every extractor a worker runs, and drop their oldest entry once full.
+PARSE_CACHE_SIZE = 4096
+DATE_FORMATS = ['%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y']
+
+_date_cache = {}
+_amount_cache = {}
+_last_date_format = DATE_FORMATS[0]
+_parse_cache_counts = {"date_hits": 0, "date_misses": 0, "amount_hits": 0, "amount_misses": 0}
+
+
+def _remember(cache, key, value):
+    if len(cache) >= PARSE_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = value
+    return value
+
+
+def parse_cache_stats():
+    """Copy of this process's hit/miss counters for convert_date and safe_float."""
+    return dict(_parse_cache_counts)
+
+
+def reset_parse_caches():
+    global _last_date_format
+    _date_cache.clear()
+    _amount_cache.clear()
+    _last_date_format = DATE_FORMATS[0]
+    for key in _parse_cache_counts:
+        _parse_cache_counts[key] = 0
+
+
+def _safe_float(val):
     try:
         val = val.strip().replace(",", "").replace("(", "-").replace(")", "")
         return float(val) if val else None
@@ -33,17 +67,45 @@ def safe_float(val):
         return None
 
 
-def convert_date(val):
-    if not val:
-        return None
-    for fmt in ['%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y']:
+def safe_float(val):
+    if type(val) is not str:
+        return _safe_float(val)
+    try:
+        result = _amount_cache[val]
+    except KeyError:
+        _parse_cache_counts["amount_misses"] += 1
+        return _remember(_amount_cache, val, _safe_float(val))
+    _parse_cache_counts["amount_hits"] += 1
+    return result
+
+
+def _convert_date(val):
+    global _last_date_format
+    # The format that matched last time is by far the most likely to match again
+    for fmt in [_last_date_format] + [f for f in DATE_FORMATS if f != _last_date_format]:
         try:
-            return datetime.strptime(val, fmt).date()
+            result = datetime.strptime(val, fmt).date()
         except:
             continue
+        _last_date_format = fmt
+        return result
     return None
 
 
+def convert_date(val):
+    if not val:
+        return None
+    if type(val) is not str:
+        return _convert_date(val)
+    try:
+        result = _date_cache[val]
+    except KeyError:
+        _parse_cache_counts["date_misses"] += 1
+        return _remember(_date_cache, val, _convert_date(val))
+    _parse_cache_counts["date_hits"] += 1
+    return result
+
+
 def is_strictly_numeric(val):
     return bool(re.fullmatch(r"\(?-?\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})?\)?", val.strip()))
 
@@ -53,3 +115,70 @@ def extract_amount(text):
     if '(' in text and ')' in text:
         return -float(text.replace('(', '').replace(')', ''))
     return float(text)
+
+
+# --- Column-level versions of safe_float / convert_date ---
+# Same results as `.apply(safe_float)` / `.apply(convert_date)`. Report columns
+# repeat a handful of values thousands of times, so each distinct value is parsed
+# once (pd.factorize) and the results are broadcast back with a NumPy take.
+
+
+def _null_column(series):
+    return pd.Series([None] * len(series), index=series.index, name=series.name, dtype=object)
+
+
+def _text_values(series):
+    """The column's str values, everything else NaN; None if it has no strings at all."""
+    if series.empty or not (series.dtype == object or pd.api.types.is_string_dtype(series)):
+        return None
+    if pd.api.types.infer_dtype(series, skipna=True) != "string":
+        series = series.where(series.map(type, na_action="ignore") == str)
+    return series if series.notna().any() else None
+
+
+def _parse_amount(val):
+    try:
+        val = val.strip().replace(",", "").replace("$", "").replace("(", "-").replace(")", "")
+        return float(val) if val else np.nan
+    except ValueError:
+        return np.nan
+
+
+def safe_float_column(series):
+    """`series.apply(safe_float)` for a whole column; also strips `$`."""
+    text = _text_values(series)
+    if text is None:
+        return _null_column(series)
+
+    codes, uniques = pd.factorize(text)
+    parsed = np.array([_parse_amount(val) for val in uniques] + [np.nan], dtype=float)
+    values = pd.Series(parsed[codes], index=series.index, name=series.name)  # code -1 -> trailing NaN
+    if values.isna().all():
+        return _null_column(series)
+    return values
+
+
+def convert_date_column(series):
+    """`series.apply(convert_date)` for a whole column: object column of `date` or None."""
+    text = _text_values(series)
+    if text is None:
+        return _null_column(series)
+
+    codes, uniques = pd.factorize(text)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.Series([None] * len(uniques), dtype=object)
+    pending = uniques != ""
+    for fmt in DATE_FORMATS:
+        if not pending.any():
+            break
+        attempt = pd.to_datetime(uniques[pending], format=fmt, errors="coerce")
+        hit = attempt[attempt.notna()]
+        parsed[hit.index] = hit.dt.date
+        pending[hit.index] = False
+
+    # Leftovers, e.g. dates outside pandas' timestamp range, go through strptime
+    if pending.any():
+        parsed[pending] = uniques[pending].map(convert_date)
+
+    lookup = np.append(parsed.to_numpy(dtype=object), None)
+    return pd.Series(lookup[codes], index=series.index, name=series.name, dtype=object)
@@ -0,0 +1,90 @@
+import re
+from array import array
+from bisect import bisect_right
+
+
+# Same boundaries as str.splitlines()
+_LINE_BREAK_RE = re.compile("\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+class LineIndex:
+    """A document's text as one immutable buffer plus line and page offsets.
+
+    Extractors search the buffer directly and walk line ranges through `lines()`,
+    which slices one line at a time instead of copying the rest of the document
+    with `full_text[start:]` and `splitlines()` per section.
+    """
+
+    def __init__(self, text, page_breaks=()):
+        self.text = text
+        self.starts = array("q", [0])
+        self.ends = array("q")
+        for match in _LINE_BREAK_RE.finditer(text):
+            self.ends.append(match.start())
+            self.starts.append(match.end())
+        self.ends.append(len(text))
+        if text and self.starts[-1] == len(text) and len(self.starts) > 1:
+            # splitlines() yields no empty line after a trailing break
+            self.starts.pop()
+            self.ends.pop()
+        self.page_starts = array("q", page_breaks or [0])
+
+    @classmethod
+    def from_pages(cls, page_texts):
+        """Index the page texts joined with newlines, remembering where each page begins."""
+        page_breaks, offset = [], 0
+        for page in page_texts:
+            page_breaks.append(offset)
+            offset += len(page) + 1
+        index = cls("\n".join(page_texts))
+        index.page_starts = array("q", [index.line_at(o) for o in page_breaks] or [0])
+        return index
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __contains__(self, marker):
+        return marker in self.text
+
+    def find(self, marker, start=0):
+        return self.text.find(marker, start)
+
+    def line_at(self, offset):
+        """Line number holding character `offset`."""
+        return max(0, bisect_right(self.starts, offset) - 1)
+
+    def page_of_line(self, line_no):
+        return bisect_right(self.page_starts, line_no) - 1
+
+    def lines(self, start=0, end=None, strip=True, skip_blank=True):
+        """Lines overlapping the character range [start, end), clipped to it.
+
+        With the defaults this yields exactly
+        `[l.strip() for l in text[start:end].splitlines() if l.strip()]`
+        without materialising the slice.
+        """
+        text = self.text
+        end = len(text) if end is None else max(start, min(end, len(text)))
+        first = self.line_at(start)
+        for line_no in range(first, len(self.starts)):
+            line_start = max(self.starts[line_no], start)
+            if line_start >= end:
+                break
+            line = text[line_start:min(self.ends[line_no], end)]
+            if strip:
+                line = line.strip()
+            if skip_blank and not line.strip():
+                continue
+            yield line
+
+
+def as_line_index(text):
+    """Accept either a plain string or an existing LineIndex."""
+    return text if isinstance(text, LineIndex) else LineIndex(text)
+
+
+def text_of(text):
+    return text.text if isinstance(text, LineIndex) else text
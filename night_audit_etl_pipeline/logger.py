@@ -1,10 +1,49 @@
 # night_audit_etl_pipeline/logger.py
 
+import json
 import logging
+import logging.handlers
+import multiprocessing
 import os
 from datetime import datetime
 
-def setup_logger(name="night_audit_etl", log_level="INFO"):
+
+class TqdmStreamHandler(logging.StreamHandler):
+    """StreamHandler that prints through tqdm.write so log lines don't break the progress bar."""
+
+    def emit(self, record):
+        try:
+            from tqdm import tqdm
+        except ImportError:
+            return super().emit(record)
+        try:
+            tqdm.write(self.format(record), file=self.stream)
+        except Exception:
+            self.handleError(record)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, for shipping logs to a search index."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.processName,
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def json_log_path(log_file_path):
+    return os.path.splitext(log_file_path)[0] + ".jsonl"
+
+
+def setup_logger(name="night_audit_etl", log_level="INFO", json_lines=False):
     log_file_path = os.getenv("LOG_FILE_PATH")
 
     if not log_file_path:
@@ -23,8 +62,39 @@ def setup_logger(name="night_audit_etl", log_level="INFO"):
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
 
-        stream_handler = logging.StreamHandler()
+        stream_handler = TqdmStreamHandler()
         stream_handler.setFormatter(formatter)
         logger.addHandler(stream_handler)
 
+        if json_lines:
+            json_handler = logging.FileHandler(json_log_path(log_file_path))
+            json_handler.setFormatter(JsonLinesFormatter())
+            logger.addHandler(json_handler)
+
+    return logger
+
+
+def start_log_listener(name="night_audit_etl"):
+    """Hand `name`'s handlers to a QueueListener in this process; returns (queue, listener).
+
+    Processes set up with init_worker_logging put their records on the queue
+    and only this process touches the log files and the console. The queue is
+    shared, so it is only for processes that are never killed midway (the
+    writers); SupervisedPool workers send theirs over their own pipe instead.
+    Call listener.stop() at exit to drain what is still queued.
+    """
+    log_queue = multiprocessing.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, *logging.getLogger(name).handlers, respect_handler_level=True)
+    listener.start()
+    return log_queue, listener
+
+
+def init_worker_logging(log_queue, name="night_audit_etl", log_level="INFO"):
+    """Route `name`'s records to the parent's listener; replaces any handlers inherited through fork."""
+    logger = logging.getLogger(name)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
+    logger.propagate = False
     return logger
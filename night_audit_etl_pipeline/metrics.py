@@ -0,0 +1,136 @@
+import os
+import csv
+import json
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+
+logger = logging.getLogger("night_audit_etl")
+
+# Timings recorded in this process since the last drain(); workers drain after every file
+# and ship the records back with the file's result.
+_records = []
+
+RECORD_FIELDS = ["stage", "section", "wall_seconds", "cpu_seconds", "rows", "bytes"]
+PROMETHEUS_FILE = "night_audit_etl.prom"
+
+
+@contextmanager
+def timed(stage, section=None):
+    """Record wall and CPU time spent in the block under (stage, section).
+
+    Yields the record: set its "rows" and "bytes" to attribute output to the
+    block. Works as a decorator too. Blocks can nest (Camelot runs inside the
+    extractor that first needs its tables), so stage totals can overlap.
+    """
+    record = {"stage": stage, "section": section, "rows": 0, "bytes": 0}
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record["wall_seconds"] = time.perf_counter() - wall
+        record["cpu_seconds"] = time.process_time() - cpu
+        _records.append(record)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+def drain():
+    """Records since the last drain, oldest first, and forget them."""
+    global _records
+    records, _records = _records, []
+    return records
+
+
+def aggregate(results):
+    """Per (stage, section) totals over the `metrics` of every file result, slowest first."""
+    totals = {}
+    for result in results:
+        for m in result.get("metrics") or ():
+            key = (m["stage"], m["section"] or "")
+            total = totals.setdefault(key, {
+                "stage": key[0], "section": key[1], "calls": 0, "wall_seconds": 0.0,
+                "cpu_seconds": 0.0, "max_wall_seconds": 0.0, "rows": 0, "bytes": 0,
+            })
+            total["calls"] += 1
+            total["wall_seconds"] += m["wall_seconds"]
+            total["cpu_seconds"] += m["cpu_seconds"]
+            total["max_wall_seconds"] = max(total["max_wall_seconds"], m["wall_seconds"])
+            total["rows"] += m["rows"]
+            total["bytes"] += m["bytes"]
+    return sorted(totals.values(), key=lambda t: t["wall_seconds"], reverse=True)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text(stages, results, wall_seconds, finished):
+    """Prometheus text exposition of a run, for node_exporter's textfile collector."""
+    lines = []
+    for field, help_text in [("wall_seconds", "Wall time spent in the stage during the last run."),
+                             ("cpu_seconds", "CPU time spent in the stage during the last run."),
+                             ("rows", "Rows produced by the stage during the last run."),
+                             ("bytes", "Bytes produced by the stage during the last run."),
+                             ("calls", "Times the stage ran during the last run.")]:
+        name = f"night_audit_stage_{field}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{stage="{_label(s["stage"])}",section="{_label(s["section"])}"}} {s[field]}' for s in stages]
+
+    statuses = {}
+    for r in results:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    lines += ["# HELP night_audit_files Files by status in the last run.", "# TYPE night_audit_files gauge"]
+    lines += [f'night_audit_files{{status="{_label(status)}"}} {count}' for status, count in sorted(statuses.items())]
+    lines += ["# HELP night_audit_run_wall_seconds Wall time of the last run.", "# TYPE night_audit_run_wall_seconds gauge",
+              f"night_audit_run_wall_seconds {wall_seconds or 0.0}",
+              "# HELP night_audit_run_finished_timestamp_seconds When the last run finished.",
+              "# TYPE night_audit_run_finished_timestamp_seconds gauge",
+              f"night_audit_run_finished_timestamp_seconds {finished.timestamp():.0f}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_run_report(results, options=None, wall_seconds=None):
+    """Write the run's JSON and CSV reports and the Prometheus file to `metrics.dir`.
+
+    Does nothing unless `metrics.enabled` is set. Returns the paths written.
+    """
+    metrics_opts = (options or {}).get("metrics") or {}
+    if not metrics_opts.get("enabled"):
+        return None
+    out_dir = metrics_opts.get("dir", "./metrics")
+    os.makedirs(out_dir, exist_ok=True)
+    finished = datetime.now()
+    stem = os.path.join(out_dir, f"run_{finished.strftime('%Y-%m-%d_%H-%M-%S_%f')}")
+    stages = aggregate(results)
+
+    with open(f"{stem}.json", "w") as f:
+        json.dump({
+            "finished": finished.isoformat(timespec="seconds"),
+            "wall_seconds": wall_seconds,
+            "stages": stages,
+            "files": [{k: r.get(k) for k in ("filename", "status", "rows", "seconds", "metrics")} for r in results],
+        }, f, indent=2, default=str)
+
+    with open(f"{stem}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["filename"] + RECORD_FIELDS)
+        writer.writeheader()
+        for r in results:
+            for m in r.get("metrics") or ():
+                writer.writerow({"filename": r["filename"], **{k: m[k] for k in RECORD_FIELDS}})
+
+    # Replaced atomically so the collector never scrapes a half-written file
+    prom_path = os.path.join(out_dir, PROMETHEUS_FILE)
+    with open(f"{prom_path}.tmp", "w") as f:
+        f.write(prometheus_text(stages, results, wall_seconds, finished))
+    os.replace(f"{prom_path}.tmp", prom_path)
+
+    if stages:
+        top = ", ".join(f"{s['stage']}/{s['section'] or '-'} {s['wall_seconds']:.1f}s" for s in stages[:3])
+        logger.info(f"📈 Slowest stages: {top}")
+    logger.info(f"📈 Run report written to {stem}.json, {stem}.csv and {prom_path}")
+    return [f"{stem}.json", f"{stem}.csv", prom_path]
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+import logging
+from importlib import metadata
+import msgspec
+
+
+logger = logging.getLogger("night_audit_etl")
+
+DEFAULT_CACHE_DIR = "./cache/pages"
+DEFAULT_MAX_SIZE_MB = 2048
+CACHE_SUFFIX = ".msgpack"
+CACHE_FORMAT = 1  # bump when the stored layers or Camelot page selection change
+
+# A parser upgrade can change extracted text, so library versions are part of the key.
+EXTRACTOR_PACKAGES = ["PyMuPDF", "pdfplumber", "camelot-py"]
+
+
+def extractor_versions():
+    versions = []
+    for package in EXTRACTOR_PACKAGES:
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=unknown")
+    return ";".join([f"format={CACHE_FORMAT}"] + versions)
+
+
+class PageCache:
+    """Content-addressed store of extracted page text and Camelot tables.
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus extractor library
+    versions and evicted least-recently-used once the directory exceeds
+    `max_size_mb`.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._versions = extractor_versions()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_options(cls, options):
+        cache_opts = (options or {}).get("page_cache") or {}
+        if not cache_opts.get("enabled"):
+            return None
+        return cls(cache_opts.get("dir", DEFAULT_CACHE_DIR), cache_opts.get("max_size_mb", DEFAULT_MAX_SIZE_MB))
+
+    def key_for(self, doc):
+        return hashlib.sha256(f"{doc.sha256}|{self._versions}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def load(self, doc):
+        """Fill `doc` with any cached layers. Returns True on a cache hit."""
+        path = self._path(self.key_for(doc))
+        try:
+            with open(path, "rb") as f:
+                entry = msgspec.msgpack.decode(f.read())
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️ Dropping unreadable page cache entry {path}: {e}")
+            self._remove(path)
+            return False
+
+        os.utime(path)  # LRU: a hit makes the entry most recent
+        doc.import_layers(entry)
+        logger.info(f"📦 Page cache hit for {doc.filename} ({', '.join(sorted(doc.cached_layers))})")
+        return True
+
+    def store(self, doc):
+        """Write every layer `doc` has materialised, if it adds to what was cached."""
+        entry = doc.export_layers()
+        layers = {k for k, v in entry.items() if v is not None}
+        if not layers or layers <= doc.cached_layers:
+            return
+
+        path = self._path(self.key_for(doc))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(msgspec.msgpack.encode(entry))
+        os.replace(tmp_path, path)
+        doc.cached_layers = layers
+        self.evict()
+
+    def entries(self):
+        """(path, size, last_used) for every entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(CACHE_SUFFIX):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self, max_bytes=None):
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def purge(self, older_than_days=None):
+        cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+        removed = 0
+        for path, _, last_used in self.entries():
+            if cutoff is None or last_used < cutoff:
+                self._remove(path)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or purge the night audit page cache.")
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR, help="cache directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="show entry count and total size")
+    sub.add_parser("list", help="list entries, least recently used first")
+    purge = sub.add_parser("purge", help="delete entries")
+    purge.add_argument("--older-than-days", type=float, default=None, help="only entries unused for this long")
+    purge.add_argument("--max-size-mb", type=float, default=None, help="evict LRU entries down to this size instead")
+    args = parser.parse_args(argv)
+
+    cache = PageCache(args.dir)
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"{len(entries)} entries, {total / 1024 / 1024:.1f} MB in {args.dir}")
+    elif args.command == "list":
+        for path, size, last_used in cache.entries():
+            used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_used))
+            print(f"{os.path.basename(path)}  {size / 1024:10.1f} KB  {used}")
+    elif args.command == "purge":
+        if args.max_size_mb is not None:
+            removed = cache.evict(int(args.max_size_mb * 1024 * 1024))
+        else:
+            removed = cache.purge(args.older_than_days)
+        print(f"Removed {removed} entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
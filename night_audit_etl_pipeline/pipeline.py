@@ -0,0 +1,175 @@
+import os
+import time
+import queue
+import logging
+import threading
+from multiprocessing import cpu_count
+from SFTP_to_local.sftp_sync import SFTPConnectionPool, SyncManifest, paramiko_connector, sync_directory
+from night_audit_etl_pipeline.processor import (
+    fetch_processed, is_audit_pdf, process_pdf_task, send_run_summary, tracker_engine, worker_pool
+)
+from night_audit_etl_pipeline.metrics import write_run_report
+from night_audit_etl_pipeline.scheduler import makespan_report, plan_schedule
+
+
+logger = logging.getLogger("night_audit_etl")
+
+_DOWNLOADS_DONE = object()
+
+
+def download_in_background(sftp_opts, local_dir, arrivals, manifest, connect=None, max_memory_bytes=None):
+    """Run the SFTP sync on a thread, feeding each finished file into `arrivals`.
+
+    `arrivals` is bounded, so once the parsers fall behind the transfer threads
+    block on it instead of racing ahead. The thread's `failures` attribute lists
+    the files that could not be fetched. Files fetched into memory are not in
+    `manifest` until the caller records them.
+    """
+    def run():
+        pool = SFTPConnectionPool(connect or paramiko_connector(
+            sftp_opts["hostname"], sftp_opts.get("port", 22), sftp_opts["username"], sftp_opts["key_path"]
+        ), size=sftp_opts.get("workers", 4))
+        try:
+            results = sync_directory(pool, sftp_opts["remote_dir"], local_dir, workers=sftp_opts.get("workers", 4),
+                                     manifest=manifest, on_file=arrivals.put, max_memory_bytes=max_memory_bytes)
+            thread.failures.extend(r.name for r in results if r.status == "FAILED")
+        except Exception as e:
+            logger.error(f"❌ SFTP sync failed: {e}")
+            thread.failures.append(f"SFTP sync: {e}")
+        finally:
+            pool.close()
+            arrivals.put(_DOWNLOADS_DONE)
+
+    thread = threading.Thread(target=run, name="sftp-sync", daemon=True)
+    thread.failures = []
+    thread.start()
+    return thread
+
+
+def spill_to_disk(pdf_folder, filename, data):
+    """Write an in-memory PDF to `pdf_folder` so the next run picks it up from disk."""
+    path = os.path.join(pdf_folder, filename)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    logger.warning(f"💾 Kept {filename} in {pdf_folder} for the next run")
+
+
+def run_pipeline(pdf_folder, mysql_conn_str, sftp_opts, logger_initializer=None, options=None, connect=None):
+    """Download from SFTP and parse in one run: each PDF is handed to the worker pool as soon as it lands.
+
+    PDFs already in `pdf_folder` but not yet loaded go first. At most
+    `pipeline.max_in_flight` downloaded files wait for or sit in a parse worker
+    at any time; beyond that the downloads pause.
+
+    With `pipeline.in_memory`, PDFs up to `in_memory_max_mb` go from the SFTP
+    read straight to a worker as bytes and never touch `pdf_folder`, unless
+    parsing them doesn't succeed: those are written out so a later run retries them.
+    Either way they only go into the SFTP manifest after that, so a run that dies
+    with them still in memory fetches them again next time.
+    """
+    options = options or {}
+    pipeline_opts = options.get("pipeline") or {}
+    num_workers = max(1, cpu_count())
+    max_in_flight = pipeline_opts.get("max_in_flight") or 2 * num_workers
+    max_memory_bytes = None
+    if pipeline_opts.get("in_memory"):
+        max_memory_bytes = int(pipeline_opts.get("in_memory_max_mb", 64) * 1024 * 1024)
+    os.makedirs(pdf_folder, exist_ok=True)
+    from tqdm import tqdm
+
+    with tracker_engine(mysql_conn_str, options) as tracker:
+        local_files = sorted(f for f in os.listdir(pdf_folder) if is_audit_pdf(f))
+        processed = fetch_processed(tracker, local_files)
+        results = [{"filename": f, "status": "SKIPPED", "rows": 0} for f in local_files if f in processed]
+        seen = set(local_files)
+        plan = plan_schedule(pdf_folder, [f for f in local_files if f not in processed], options)
+        logger.info(f"🚀 Pipeline: {len(plan)} local files to load, "
+                    f"downloading new ones with {num_workers} workers...")
+
+        started = time.perf_counter()
+        first_submit = None
+        arrivals = queue.Queue(maxsize=max_in_flight)
+        manifest = SyncManifest.for_directory(pdf_folder)
+        downloader = download_in_background(sftp_opts, pdf_folder, arrivals, manifest, connect, max_memory_bytes)
+        downloading = True
+        run_results = []
+        in_memory = {}  # filename -> FETCHED SyncResult, until its task finishes
+
+        def settle(filename, spill):
+            """Release an in-memory file once loaded, or written out when `spill`, and record it as synced."""
+            fetched = in_memory.pop(filename, None)
+            if fetched is None:
+                return
+            if spill:
+                spill_to_disk(pdf_folder, filename, fetched.data)
+            manifest.record(fetched.remote, fetched.sha256)
+
+        try:
+            with worker_pool(num_workers, mysql_conn_str, logger_initializer, options) as pool, \
+                    tqdm(desc="Processing PDFs") as progress:
+
+                def submit(planned):
+                    nonlocal first_submit
+                    for p in planned:
+                        args = (pdf_folder, p.filename, mysql_conn_str, options)
+                        if p.filename in in_memory:
+                            args += (in_memory[p.filename].data,)
+                        pool.submit(process_pdf_task, args)
+                    if planned and first_submit is None:
+                        first_submit = time.perf_counter() - started
+                        logger.info(f"⏱️ First PDF submitted {first_submit:.1f}s into the run")
+
+                submit(plan)
+                while True:
+                    arrived = []
+                    while downloading and pool.outstanding + len(arrived) < max_in_flight:
+                        idle = not pool.outstanding and not arrived
+                        try:
+                            item = arrivals.get(timeout=1.0) if idle else arrivals.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is _DOWNLOADS_DONE:
+                            downloading = False
+                        elif item.status != "FAILED" and is_audit_pdf(item.name) and item.name not in seen:
+                            seen.add(item.name)
+                            arrived.append(item.name)
+                            if item.data is not None:
+                                in_memory[item.name] = item
+                    if arrived:
+                        done = fetch_processed(tracker, arrived)
+                        results.extend({"filename": f, "status": "SKIPPED", "rows": 0} for f in arrived if f in done)
+                        for f in done:
+                            settle(f, spill=False)
+                        buffers = {f: r.data for f, r in in_memory.items()}
+                        planned = plan_schedule(pdf_folder, [f for f in arrived if f not in done], options, buffers)
+                        plan.extend(planned)
+                        submit(planned)
+
+                    if not downloading and not pool.outstanding:
+                        break
+                    for task in pool.poll(timeout=0.2):
+                        progress.update(1)
+                        filename = task.args[1]
+                        if task.status == "ERROR":
+                            logger.error(f"❌ {filename} failed in worker:\n{task.value}")
+                            run_results.append({"filename": filename, "status": "FAIL", "rows": 0})
+                        elif task.value:
+                            run_results.append(task.value)
+                        loaded = task.status == "OK" and task.value and task.value["status"] == "SUCCESS"
+                        settle(filename, spill=not loaded)
+
+            downloader.join()
+        finally:
+            manifest.close()
+
+    makespan = makespan_report(plan, run_results, num_workers, time.perf_counter() - started)
+    results.extend(run_results)
+    notes = None
+    if downloader.failures:
+        logger.error(f"❌ {len(downloader.failures)} downloads failed")
+        notes = "⬇️ Failed Downloads:\n" + "\n".join(downloader.failures)
+    write_run_report(results, options, makespan["actual_seconds"])
+    send_run_summary(results, makespan, notes)
+    return results
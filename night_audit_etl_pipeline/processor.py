@@ -1,19 +1,28 @@
-from multiprocessing import Pool, cpu_count
-from tqdm import tqdm
+from multiprocessing import Process, Queue, cpu_count
+from multiprocessing.util import Finalize
 import os
-import pdfplumber
-import fitz
-import camelot
+import time
+import queue
+import functools
+from contextlib import contextmanager
 import pandas as pd
 import traceback
 import logging
 from datetime import datetime
-from sqlalchemy import create_engine
-from night_audit_etl_pipeline.config_loader import config
 from night_audit_etl_pipeline.logger import setup_logger
 from night_audit_etl_pipeline.db_utils import *
 from night_audit_etl_pipeline.email_alerts import send_email
-from night_audit_etl_pipeline.helpers import convert_date, safe_float, is_strictly_numeric, extract_amount , clean_column_names, add_metadata, clean_numeric_column
+from night_audit_etl_pipeline.document import AuditDocument
+from night_audit_etl_pipeline.dispatcher import dispatch_lines
+from night_audit_etl_pipeline.grammar import SECTION_MACHINE, spec_frame
+from night_audit_etl_pipeline.page_cache import PageCache
+from night_audit_etl_pipeline import metrics
+from night_audit_etl_pipeline.metrics import frame_bytes, timed
+from night_audit_etl_pipeline.sinks import DatabaseSink, QueueSink, sink_type, local_sink
+from night_audit_etl_pipeline.writer import run_writer
+from night_audit_etl_pipeline.scheduler import plan_schedule, makespan_report
+from night_audit_etl_pipeline.supervisor import ParentChannel, SupervisedPool
+from night_audit_etl_pipeline.helpers import convert_date, safe_float, parse_cache_stats, convert_date_column, safe_float_column, is_strictly_numeric, extract_amount , clean_column_names, add_metadata, clean_numeric_column
 from night_audit_etl_pipeline.extractors import *
 
 
@@ -21,42 +30,227 @@ from night_audit_etl_pipeline.extractors import *
 
 logger = logging.getLogger("night_audit_etl")
 
+# One pooled engine per worker process, created by init_worker and reused for every file.
+_worker_engine = None
+# Set instead of the engine in pipeline mode, where parsed files go (through the parent) to writer processes.
+_worker_write_queue = None
 
-def finalize_etl_run(engine, filename, section_statuses):
+
+def init_worker(logger_initializer, conn_str, options, relay_writes=False):
+    global _worker_engine, _worker_write_queue
+    if logger_initializer:
+        logger_initializer()
+    if relay_writes:
+        _worker_write_queue = ParentChannel("write")
+        return
+    if sink_type(options) != "mysql":
+        return
+    _worker_engine = create_db_engine(conn_str, **engine_options(options))
+    # Pool workers leave via multiprocessing's exit hooks, not atexit
+    Finalize(None, dispose_worker_engine, exitpriority=10)
+
+
+def dispose_worker_engine():
+    global _worker_engine
+    if _worker_engine is not None:
+        logger.info(f"🔌 Worker {os.getpid()} connection pool: {pool_stats(_worker_engine)}")
+        _worker_engine.dispose()
+        _worker_engine = None
+
+
+def finalize_etl_run(sink, filename, section_statuses):
     loaded_rows = sum(v if isinstance(v, int) else 0 for _, v in section_statuses)
     failed_sections = [name for name, v in section_statuses if v == 'FAIL']
 
     status = 'PARTIAL' if failed_sections else 'SUCCESS'
     message = f"Failed sections: {', '.join(failed_sections)}" if failed_sections else None
-    update_file_tracker(engine, filename, status, loaded_rows, message)
+    sink.record_file(filename, status, loaded_rows, message)
 
     logger.info(f"✅ Completed {filename} | Rows loaded: {loaded_rows} | Failed: {failed_sections if failed_sections else 'None'}")
 
 
+def record_abandoned_file(status, result_status, args, detail):
+    # Runs in the parent for files whose worker was killed or died, so nothing else will record them.
+    # A short-lived engine keeps open connections out of the replacement workers forked later.
+    _, filename, conn_str, options = args[:4]
+    message = f"Timed out after {detail:.0f}s" if status == 'TIMEOUT' else f"Worker died (exit code {detail})"
+    logger.error(f"❌ {filename}: {message}")
+    if sink_type(options) != "mysql":
+        local_sink(options).record_file(filename, status, None, message)
+        return {"filename": filename, "status": result_status, "rows": 0}
+    engine = create_db_engine(conn_str)
+    try:
+        update_file_tracker(engine, filename, status, None, message)
+    except Exception as e:
+        logger.error(f"❌ Could not record {status} for {filename}: {e}")
+    finally:
+        engine.dispose()
+    return {"filename": filename, "status": result_status, "rows": 0}
 
 
 
-def process_pdf_folder(pdf_folder_path, mysql_conn_str, logger_initializer=None):
-    pdf_files = sorted(f for f in os.listdir(pdf_folder_path) if f.endswith(".pdf") and "night audit" in f.lower())
-    args_list = [(pdf_folder_path, f, mysql_conn_str) for f in pdf_files] 
-    num_workers = min(cpu_count(), len(pdf_files))
 
-    logger.info(f"🚀 Starting multiprocessing with {num_workers} workers...")
 
+def cache_hit_rate(counts, kind):
+    hits, misses = counts.get(f"{kind}_hits", 0), counts.get(f"{kind}_misses", 0)
+    return f"{hits / (hits + misses):.1%}" if hits + misses else "n/a"
+
+
+def is_audit_pdf(filename):
+    return filename.endswith(".pdf") and "night audit" in filename.lower()
+
+
+@contextmanager
+def tracker_engine(mysql_conn_str, options):
+    """Engine for the parent's file_tracker lookups, kept for the whole run.
+
+    The file_tracker index is ensured once here rather than on every lookup.
+    Yields None when the sink doesn't use the database.
+    """
+    if sink_type(options) != "mysql":
+        yield None
+        return
+    engine = create_db_engine(mysql_conn_str, **engine_options(options))
+    try:
+        ensure_file_tracker_index(engine)
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def fetch_processed(engine, filenames):
+    """Names among `filenames` already loaded; none without a tracker_engine."""
+    if engine is None:
+        return set()
+    # One batched lookup instead of a query per file inside each worker
+    return fetch_processed_files(engine, filenames)
+
+
+def put_for_writers(write_queue, writers, item, timeout=5):
+    """Put `item` on the writers' queue; False once no writer is left to take it.
+
+    The parent relays every parsed file through here, so it must never wait on
+    writers that are gone: that would also stall the pool's timeout checks.
+    """
+    while any(w.is_alive() for w in writers):
+        try:
+            write_queue.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def relay_to_writers(write_queue, writers, conn_str):
+    def relay(item):
+        if put_for_writers(write_queue, writers, item):
+            return
+        filename = item[0]
+        logger.error(f"❌ No writer process left to load {filename}")
+        engine = create_db_engine(conn_str)
+        try:
+            update_file_tracker(engine, filename, 'FAILURE', None, "No writer process left to load it")
+        except Exception as e:
+            logger.error(f"❌ Could not record FAILURE for {filename}: {e}")
+        finally:
+            engine.dispose()
+    return relay
+
+
+def stop_writers(write_queue, writers):
+    for _ in writers:
+        if not put_for_writers(write_queue, writers, None):
+            break
+    for writer in writers:
+        writer.join()
+        if writer.exitcode:
+            logger.error(f"💀 Writer {writer.pid} exited with code {writer.exitcode}")
+    # Files still queued for dead writers would keep this process from exiting
+    write_queue.cancel_join_thread()
+
+
+@contextmanager
+def worker_pool(num_workers, mysql_conn_str, logger_initializer, options):
+    """SupervisedPool of parse workers, plus the writer processes when `writer.processes` is set.
+
+    Workers log and hand parsed files to the writers through the parent over
+    their own pipes, so one killed on a timeout can't leave a shared queue
+    locked or half-written. The writers are never killed and use queues.
+    """
+    # Pipeline mode: workers only parse; writer processes batch the inserts across files
+    writer_opts = options.get("writer") or {}
+    num_writers = writer_opts.get("processes", 0) if sink_type(options) == "mysql" else 0
+    write_queue, writers = None, []
+    if num_writers:
+        write_queue = Queue(maxsize=writer_opts.get("queue_size", 2 * num_workers))
+        writers = [Process(target=run_writer, args=(write_queue, mysql_conn_str, options, logger_initializer))
+                   for _ in range(num_writers)]
+        for writer in writers:
+            writer.start()
+        logger.info(f"🖊️ Started {num_writers} writer processes")
+
+    supervisor_opts = options.get("supervisor") or {}
+    try:
+        with SupervisedPool(num_workers, initializer=init_worker,
+                            initargs=(logger_initializer, mysql_conn_str, options, bool(writers)),
+                            maxtasksperchild=supervisor_opts.get("maxtasksperchild"),
+                            max_rss_mb=supervisor_opts.get("max_rss_mb"),
+                            task_timeout=supervisor_opts.get("task_timeout_seconds"),
+                            on_timeout=functools.partial(record_abandoned_file, 'TIMEOUT', 'TIMEOUT'),
+                            on_worker_death=functools.partial(record_abandoned_file, 'FAILURE', 'FAIL'),
+                            log_name="night_audit_etl",
+                            on_message={"write": relay_to_writers(write_queue, writers, mysql_conn_str)}
+                            if writers else None) as pool:
+            yield pool
+        logger.info(f"🧹 Worker pool: {pool.stats}")
+    finally:
+        if writers:
+            stop_writers(write_queue, writers)
+
+
+def process_pdf_folder(pdf_folder_path, mysql_conn_str, logger_initializer=None, options=None):
+    options = options or {}
+    pdf_files = sorted(f for f in os.listdir(pdf_folder_path) if is_audit_pdf(f))
+    if sink_type(options) != "mysql":
+        logger.info(f"📁 Sink '{sink_type(options)}': skipping the database, every file is parsed")
+    with tracker_engine(mysql_conn_str, options) as tracker:
+        processed = fetch_processed(tracker, pdf_files)
+
+    results = [{"filename": f, "status": "SKIPPED", "rows": 0} for f in pdf_files if f in processed]
+    pending = [f for f in pdf_files if f not in processed]
+    logger.info(f"⏭️ Skipping {len(results)} already processed files, {len(pending)} to load")
+
+    num_workers = max(1, min(cpu_count(), len(pending)))
+    # Biggest files first so a month-end audit doesn't start last and run alone
+    plan = plan_schedule(pdf_folder_path, pending, options)
+    args_list = [(pdf_folder_path, p.filename, mysql_conn_str, options) for p in plan]
 
-    results = []
+    logger.info(f"🚀 Starting multiprocessing with {num_workers} workers...")
 
-    with Pool(processes=num_workers, initializer=logger_initializer) as pool:
+    from tqdm import tqdm
+    started = time.perf_counter()
+    run_results = []
+    with worker_pool(num_workers, mysql_conn_str, logger_initializer, options) as pool:
         for result in tqdm(pool.imap_unordered(process_pdf_task, args_list), total=len(args_list), desc="Processing PDFs"):
             if result:
-                results.append(result)
+                run_results.append(result)
+    makespan = makespan_report(plan, run_results, num_workers, time.perf_counter() - started)
+    results.extend(run_results)
+    metrics.write_run_report(results, options, makespan["actual_seconds"])
+    send_run_summary(results, makespan)
 
 
+def send_run_summary(results, makespan, notes=None):
     total_files = len(results)
     total_rows = sum(r.get("rows", 0) for r in results)
     skipped_files = [r["filename"] for r in results if r["status"] == "SKIPPED"]
     failed_files = [r["filename"] for r in results if r["status"] == "FAIL"]
     successful_files = [r["filename"] for r in results if r["status"] == "SUCCESS"]
+    timed_out_files = [r["filename"] for r in results if r["status"] == "TIMEOUT"]
+    cache_counts = {}
+    for r in results:
+        for key, count in r.get("parse_cache", {}).items():
+            cache_counts[key] = cache_counts.get(key, 0) + count
 
     subject = "[ETL Summary] Night Audit ETL Completed"
     body = (
@@ -64,13 +258,20 @@ def process_pdf_folder(pdf_folder_path, mysql_conn_str, logger_initializer=None)
         f"📄 Files Succeeded: {len(successful_files)}\n"
         f"⏭️ Files Skipped: {len(skipped_files)}\n"
         f"❌ Files Failed: {len(failed_files)}\n"
-        f"📊 Total Rows Loaded: {total_rows}\n\n"
+        f"⏰ Files Timed Out: {len(timed_out_files)}\n"
+        f"📊 Total Rows Loaded: {total_rows}\n"
+        f"⏱️ Makespan: {makespan['actual_seconds']:.0f}s (projected {makespan['projected_seconds']:.0f}s)\n"
+        f"🗃️ Parse cache hit rate: dates {cache_hit_rate(cache_counts, 'date')}, amounts {cache_hit_rate(cache_counts, 'amount')}\n\n"
     )
 
     if skipped_files:
         body += f"\n⏭️ Skipped Files:\n" + "\n".join(skipped_files)
     if failed_files:
         body += f"\n❌ Failed Files:\n" + "\n".join(failed_files)
+    if timed_out_files:
+        body += f"\n⏰ Timed Out Files:\n" + "\n".join(timed_out_files)
+    if notes:
+        body += f"\n{notes}"
 
     send_email(subject, body)
 
@@ -78,65 +279,108 @@ def process_pdf_folder(pdf_folder_path, mysql_conn_str, logger_initializer=None)
 
 
 def process_pdf_task(args):
-    pdf_folder, filename, conn_str = args
+    # An optional fifth element carries the PDF's bytes when it was never written to pdf_folder
+    pdf_folder, filename, conn_str, options = args[:4]
+    data = args[4] if len(args) > 4 else None
     full_path = os.path.join(pdf_folder, filename)
-    local_engine = create_db_engine(conn_str)  #---- added
-
-    if is_file_already_processed(local_engine, filename):
-        logger.info(f"⏭️ Skipping already processed file in worker: {filename}")
-        return {"filename": filename, "status": "SKIPPED", "rows": 0}
-    
-    
-    return process_pdf(full_path, filename, local_engine)
-
-
-def handle_section(engine, section_name, extract_func, table_name, filename,  list_of_pages=None, full_text=None,  
+    if _worker_write_queue is not None:
+        sink = QueueSink(_worker_write_queue)
+    elif sink_type(options) != "mysql":
+        sink = local_sink(options)
+    else:
+        engine = _worker_engine or create_db_engine(conn_str, **engine_options(options))
+        sink = DatabaseSink(engine, single_transaction=options.get("single_transaction", False))
+    started = time.perf_counter()
+    cache_before = parse_cache_stats()
+    metrics.drain()  # anything left over from a file that raised
+    result = process_pdf(full_path, filename, sink, page_cache=PageCache.from_options(options), data=data)
+    if result:
+        result["seconds"] = time.perf_counter() - started
+        result["metrics"] = metrics.drain()
+        result["parse_cache"] = {k: v - cache_before[k] for k, v in parse_cache_stats().items()}
+    return result
+
+
+def handle_section(sink, section_name, extract_func, table_name, filename,  list_of_pages=None, full_text=None,  
                    prop_code=None, user_id=None, report_date=None, business_date=None,
                    clean_map=None, numeric_cols=None, postprocess=None):
     try:
-        df = extract_func(list_of_pages) if list_of_pages else extract_func(full_text)
-        if postprocess:
-            df = postprocess(df)
-        if not df.empty:
-            if clean_map: df = clean_column_names(df, clean_map)
-            if numeric_cols: df = clean_numeric_column(df, numeric_cols)
-            df = add_metadata(df, prop_code, user_id, report_date, business_date)
-            insert_dataframe(engine, df, table_name, filename)
-            logger.info(f"✅ Processed {section_name}")
-            return (section_name, len(df))
-        else:
-            logger.warning(f"⚠️ No {section_name} data in {filename}")
-            return (section_name, "EMPTY")
+        with sink.section():
+            with timed("extract", section_name) as t:
+                df = extract_func(list_of_pages) if list_of_pages is not None else extract_func(full_text)
+                t["rows"] = len(df) if df is not None else 0
+            if postprocess:
+                with timed("postprocess", section_name):
+                    df = postprocess(df)
+            if not df.empty:
+                with timed("clean", section_name):
+                    if clean_map: df = clean_column_names(df, clean_map)
+                    if numeric_cols: df = clean_numeric_column(df, numeric_cols)
+                    df = add_metadata(df, prop_code, user_id, report_date, business_date)
+                with timed(sink.write_stage, section_name) as t:
+                    t["rows"], t["bytes"] = len(df), frame_bytes(df)
+                    sink.write(df, table_name, filename)
+                logger.info(f"✅ Processed {section_name}")
+                return (section_name, len(df))
+            else:
+                logger.warning(f"⚠️ No {section_name} data in {filename}")
+                return (section_name, "EMPTY")
     except Exception as e:
         logger.error(f"❌ {section_name} extraction failed: {e}\n{traceback.format_exc()}")
         return (section_name, "FAIL")
     
 
 
-def handle_custom_section(engine, section_name, extract_func, filename, insert_specs, postprocess=None):
+def handle_spec_section(sink, spec, rows, filename, metadata):
     try:
-        result = extract_func()
-        if not isinstance(result, tuple):
-            result = (result,)  
-
-        elif isinstance(result, tuple):
-            result = list(result) 
-
-        for df, (table_name, extras) in zip(result, insert_specs):
-            if isinstance(df, pd.DataFrame) and not df.empty:
-                if df.index.name or df.index.names != [None]:
-                    df = df.reset_index()
-                df = clean_column_names(df)
-                df = df.dropna(how="all")
-                if postprocess:
-                    df = postprocess(df)
-                if extras:
-                    for col, val in extras.items():
-                        df[col] = val
-                insert_dataframe(engine, df, table_name, filename)
-                logger.info(f"✅ Processed {section_name} → {table_name} ({len(df)} rows)")
+        with sink.section():
+            with timed("clean", spec.title):
+                df = spec_frame(spec, rows)
+            if not df.empty:
+                df = add_metadata(df, **{field: metadata[field] for field in spec.metadata})
+                with timed(sink.write_stage, spec.title) as t:
+                    t["rows"], t["bytes"] = len(df), frame_bytes(df)
+                    sink.write(df, spec.table, filename)
+                logger.info(f"✅ Processed {spec.title}")
+                return (spec.title, len(df))
             else:
-                logger.warning(f"⚠️ No {section_name} data for {table_name} in {filename}")
+                logger.warning(f"⚠️ No {spec.title} data in {filename}")
+                return (spec.title, "EMPTY")
+    except Exception as e:
+        logger.error(f"❌ {spec.title} extraction failed: {e}\n{traceback.format_exc()}")
+        return (spec.title, "FAIL")
+
+
+def handle_custom_section(sink, section_name, extract_func, filename, insert_specs, postprocess=None):
+    try:
+        with sink.section():
+            with timed("extract", section_name):
+                result = extract_func()
+            if not isinstance(result, tuple):
+                result = (result,)  
+
+            elif isinstance(result, tuple):
+                result = list(result) 
+
+            for df, (table_name, extras) in zip(result, insert_specs):
+                if isinstance(df, pd.DataFrame) and not df.empty:
+                    if df.index.name or df.index.names != [None]:
+                        df = df.reset_index()
+                    with timed("clean", section_name):
+                        df = clean_column_names(df)
+                        df = df.dropna(how="all")
+                    if postprocess:
+                        with timed("postprocess", section_name):
+                            df = postprocess(df)
+                    if extras:
+                        for col, val in extras.items():
+                            df[col] = val
+                    with timed(sink.write_stage, section_name) as t:
+                        t["rows"], t["bytes"] = len(df), frame_bytes(df)
+                        sink.write(df, table_name, filename)
+                    logger.info(f"✅ Processed {section_name} → {table_name} ({len(df)} rows)")
+                else:
+                    logger.warning(f"⚠️ No {section_name} data for {table_name} in {filename}")
     except Exception as e:
         logger.error(f"❌ {section_name} extraction failed: {e}\n{traceback.format_exc()}")
 
@@ -144,8 +388,8 @@ def handle_custom_section(engine, section_name, extract_func, filename, insert_s
 
 
 
-def extract_ledger_summary_wrapper(full_text_or_pages, pdf=None, business_date=None, user_id=None):
-    return extract_ledger_summary_with_metadata(pdf)
+def extract_ledger_summary_wrapper(full_text_or_pages, doc=None, business_date=None, user_id=None):
+    return extract_ledger_summary_with_metadata(doc)
 
 def extract_no_show_wrapper(full_text_or_pages, pdf=None, business_date=None, user_id=None):
     return extract_no_show_report(full_text_or_pages["pages"], full_text_or_pages["text"], full_text_or_pages["pdf_path"])
@@ -160,38 +404,73 @@ def extract_rate_discrepancy_wrapper(full_text_or_pages, pdf=None, business_date
     return pd.DataFrame()
 
 
-def process_pdf(pdf_path, filename, engine):
+def process_pdf(pdf_path, filename, sink, page_cache=None, data=None):
     logger.info(f"📄 Starting processing file: {filename}")
     try:
-        with pdfplumber.open(pdf_path) as pdf, fitz.open(pdf_path) as doc:
-            page_texts = [page.get_text() for page in doc]
-            list_of_pages = [page.extract_text().split('\n') for page in pdf.pages]
-            full_text = "\n".join(["\n".join(p) for p in list_of_pages])
-            camelot_tables = camelot.read_pdf(pdf_path, pages='all', flavor='stream', strip_text='\n')
+        # One AuditDocument per file: each text layer is extracted once and shared by
+        # every extractor; Camelot tables are parsed on first use.
+        with timed("open") as t:
+            doc = AuditDocument(pdf_path, data) if data is not None else AuditDocument.from_path(pdf_path)
+            t["bytes"] = len(doc.data)
+        if page_cache:
+            with timed("page_cache"):
+                page_cache.load(doc)
+        # Touch both text layers so an unreadable PDF fails here rather than per section
+        doc.page_texts
+        doc.list_of_pages
     except Exception as e:
         logger.error(f"❌ Failed to open PDF: {filename} | Error: {e}")
-        update_file_tracker(filename, 'FAILURE', None, f"Open PDF error: {e}")
+        sink.record_file(filename, 'FAILURE', None, f"Open PDF error: {e}")
         return
 
-    business_date, prop_code, user_id, report_date = extract_metadata(list_of_pages)
-    section_statuses = []
+    try:
+        with sink.file_scope():
+            section_statuses = load_sections(sink, doc, filename)
+            finalize_etl_run(sink, filename, section_statuses)
+    except Exception as e:
+        logger.error(f"❌ Load for {filename} rolled back: {e}\n{traceback.format_exc()}")
+        sink.record_file(filename, 'FAILURE', None, f"Load error: {e}")
+        return {"filename": filename, "status": "FAIL", "rows": 0}
 
-    section_statuses.append(handle_section(
-        engine, "A/R Aging", extract_ar_aging, "ar_aging", filename,
-        list_of_pages=list_of_pages, prop_code=prop_code, user_id=user_id, report_date=report_date,
-        clean_map={"30days": "days_30", "60days": "days_60", "90days": "days_90", "120days": "days_120", "limit": "limit_amount"},
-        numeric_cols=['current','days_30','days_60','days_90','days_120','credits','balance','limit_amount']
-    ))
+    if page_cache:
+        try:
+            page_cache.store(doc)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to write page cache for {filename}: {e}")
 
-    section_statuses.append(handle_section(
-        engine, "Transaction Closeout", extract_transaction_closeout, "transaction_closeout", filename,
-        list_of_pages=list_of_pages, prop_code=prop_code, user_id=user_id, business_date=business_date,
-        clean_map={"'": ""}, numeric_cols=['opening_balance','todays_total','todays_adjustments','todays_net','ptd_totals','ytd_totals']
-    ))
+    status = "FAIL" if any(status == "FAIL" for _, status in section_statuses) else "SUCCESS"
+    loaded_rows = sum(v if isinstance(v, int) else 0 for _, v in section_statuses)
+
+    return {
+        "filename": filename,
+        "status": status,
+        "rows": loaded_rows
+    }
+
+
+def load_sections(sink, doc, filename):
+    pdf_path = doc.pdf_path
+    page_texts = doc.page_texts
+    list_of_pages = doc.list_of_pages
+    line_index = doc.line_index
+
+    # One walk over the lines finds the metadata and every line-based section;
+    # each extractor then only sees its own section's lines.
+    dispatch = dispatch_lines(list_of_pages)
+    routed = dispatch.sections
+    business_date, prop_code, user_id, report_date = dispatch.metadata
+    section_statuses = []
+
+    # Sections described declaratively in grammar.py, all parsed in one pass
+    metadata = {"prop_code": prop_code, "user_id": user_id, "report_date": report_date, "business_date": business_date}
+    with timed("extract", "grammar"):
+        spec_rows = SECTION_MACHINE.run(list_of_pages)
+    for spec in SECTION_MACHINE.specs:
+        section_statuses.append(handle_spec_section(sink, spec, spec_rows[spec.name], filename, metadata))
 
     section_statuses.append(handle_section(
-        engine, "In-House List", extract_inhouse_df, "inhouse_list_data", filename,
-        list_of_pages=list_of_pages, prop_code=prop_code, business_date=business_date
+        sink, "In-House List", extract_inhouse_df, "inhouse_list_data", filename,
+        list_of_pages=routed["inhouse"], prop_code=prop_code, business_date=business_date
     ))
 
     # Hotel Statistics Sections
@@ -200,10 +479,10 @@ def process_pdf(pdf_path, filename, engine):
         "performance_statistics": ("Performance Statistics", "Revenue"),
         "guest_statistics": ("Guest Statistics", "Today's Activity")
     }.items():
-        section_text = extract_section_text(full_text, start, end)
+        section_text = extract_section_text(line_index, start, end)
         if section_text:
             section_statuses.append(handle_section(
-                engine, name, lambda x: parse_hotel_statistics(x, business_date), name, filename,
+                sink, name, lambda x: parse_hotel_statistics(x, business_date), name, filename,
                 full_text=section_text, business_date=business_date
             ))
         else:
@@ -212,70 +491,70 @@ def process_pdf(pdf_path, filename, engine):
 
     # Ledger Activity
     section_statuses.append(handle_section(
-        engine, "Ledger Activity", extract_ledger_activity_report_with_metadata, "ledger_activity", filename,
-        full_text=full_text
+        sink, "Ledger Activity", extract_ledger_activity_report_with_metadata, "ledger_activity", filename,
+        full_text=line_index
     ))
 
         # Ledger Summary
     section_statuses.append(handle_section(
-        engine, "Ledger Summary", lambda _: extract_ledger_summary_wrapper(None, pdf), "ledger_summary", filename
+        sink, "Ledger Summary", lambda _: extract_ledger_summary_wrapper(None, doc), "ledger_summary", filename
     ))
 
     # No Show Report
     section_statuses.append(handle_section(
-        engine, "No Show Report", lambda _: extract_no_show_wrapper({
+        sink, "No Show Report", lambda _: extract_no_show_wrapper({
             "pages": list_of_pages,
-            "text": full_text,
+            "text": line_index,
             "pdf_path": pdf_path
         }), "no_show_report", filename
     ))
 
     # Rate Discrepancy
     section_statuses.append(handle_section(
-        engine, "Rate Discrepancy", lambda _: extract_rate_discrepancy_wrapper({
+        sink, "Rate Discrepancy", lambda _: extract_rate_discrepancy_wrapper({
             "page_texts": page_texts
         }), "rate_discrepancy", filename
     ))
 
 
     section_statuses.append(handle_section(
-        engine, "Hotel Journal Summary",
-        lambda _: extract_hotel_journal_summary(camelot_tables, filename, business_date),
+        sink, "Hotel Journal Summary",
+        lambda _: extract_hotel_journal_summary(doc.camelot_tables, filename, business_date),
         "hotel_journal_summary",
         filename
     ))
 
     # 12. Hotel Journal Detail
     section_statuses.append(handle_section(
-    engine, "Hotel Journal Detail",
+    sink, "Hotel Journal Detail",
     lambda pages: extract_hotel_journal_details(pages).assign(
-        date=lambda df: df["date"].apply(convert_date),
-        posting_date=lambda df: df["posting_date"].apply(convert_date)
+        date=lambda df: convert_date_column(df["date"]),
+        posting_date=lambda df: convert_date_column(df["posting_date"])
     ),
     "hotel_journal_detail",
     filename,
-    list_of_pages=list_of_pages
+    list_of_pages=routed["hotel_journal_details"]
     ))
 
 
     # ✅ Reservation Activity
     handle_custom_section(
-        engine, "Reservation Activity",
+        sink, "Reservation Activity",
         lambda: extract_reservation_activity(page_texts),
         filename,
         insert_specs=[("reservation_activity", {})],
         postprocess=lambda df: df.assign(
-            arrive=df['arrive'].apply(convert_date),
-            depart=df['depart'].apply(convert_date),
-            reserve_date=df['reserve_date'].apply(convert_date),
-            rate=df['rate'].apply(safe_float)
+            arrive=convert_date_column(df['arrive']),
+            depart=convert_date_column(df['depart']),
+            reserve_date=convert_date_column(df['reserve_date']),
+            rate=safe_float_column(df['rate'])
         )
     )
 
     # ✅ Shift Reconciliation
     handle_custom_section(
-        engine, "Shift Reconciliation",
-        lambda: extract_shift_reconciliation(pdf),
+        sink, "Shift Reconciliation",
+        lambda: extract_shift_reconciliation(doc),
         filename,
         insert_specs=[
             ("shift_reconciliation", {}),
@@ -284,10 +563,11 @@ def process_pdf(pdf_path, filename, engine):
     )
 
     # ✅ Tax Exempt
-    tax_dfs = extract_tax_exempt(page_texts)
+    with timed("extract", "Tax Exempt"):
+        tax_dfs = extract_tax_exempt(page_texts)
     tax_business_date = tax_dfs[-1]
     handle_custom_section(
-        engine, "Tax Exempt",
+        sink, "Tax Exempt",
         lambda: tax_dfs[:4],
         filename,
         insert_specs=[
@@ -299,35 +579,25 @@ def process_pdf(pdf_path, filename, engine):
     )
 
     handle_custom_section(
-    engine, "Gross Room Revenue",
-    lambda: extract_gross_room_revenue(camelot_tables, filename, business_date),
+    sink, "Gross Room Revenue",
+    lambda: extract_gross_room_revenue(doc.camelot_tables, filename, business_date),
     filename,
     insert_specs=[("gross_room_revenue_detail", {})]
     )
 
 
     handle_custom_section(
-    engine, "Revenue by Rate Code",
-    lambda: extract_revenue_by_rate_code(camelot_tables, filename),
+    sink, "Revenue by Rate Code",
+    lambda: extract_revenue_by_rate_code(doc.camelot_tables, filename),
     filename,
     insert_specs=[("revenue_by_rate_code", {})]
     )
 
 
     handle_custom_section(
-    engine, "Advance Deposit Journal",
-    lambda: extract_advance_deposit_journal(list_of_pages),
+    sink, "Advance Deposit Journal",
+    lambda: extract_advance_deposit_journal(routed["advance_deposit_journal"]),
     filename,
     insert_specs=[("advance_deposit_journal", {"business_date": pd.to_datetime(business_date).date() if business_date else None})]
     )
-        # --- Final summary ---
-    finalize_etl_run(engine,filename, section_statuses)
-
-    status = "FAIL" if any(status == "FAIL" for _, status in section_statuses) else "SUCCESS"
-    loaded_rows = sum(v if isinstance(v, int) else 0 for _, v in section_statuses)
-
-    return {
-        "filename": filename,
-        "status": status,
-        "rows": loaded_rows
-    }
\ No newline at end of file
+    return section_statuses
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import heapq
+import logging
+from collections import namedtuple
+
+
+logger = logging.getLogger("night_audit_etl")
+
+# Rough per-file cost model; only the relative order matters for scheduling, the
+# absolute values just make the projected makespan readable in seconds.
+DEFAULT_SECONDS_PER_PAGE = 0.5
+DEFAULT_SECONDS_PER_MB = 0.2
+
+PlannedFile = namedtuple("PlannedFile", ["filename", "size_bytes", "pages", "cost"])
+
+
+def probe_pdf(path, data=None):
+    """(size_bytes, page_count) from the file size and the PDF page tree only; `data` for in-memory PDFs."""
+    import fitz
+    size_bytes = len(data) if data is not None else os.path.getsize(path)
+    try:
+        with (fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(path)) as doc:
+            pages = doc.page_count
+    except Exception as e:
+        logger.warning(f"⚠️ Could not probe {os.path.basename(path)}, scheduling by size only: {e}")
+        pages = None
+    return size_bytes, pages
+
+
+def estimate_cost(size_bytes, pages, seconds_per_page=DEFAULT_SECONDS_PER_PAGE, seconds_per_mb=DEFAULT_SECONDS_PER_MB):
+    return (pages or 0) * seconds_per_page + size_bytes / (1024 * 1024) * seconds_per_mb
+
+
+def lpt_makespan(costs, num_workers):
+    """Makespan of greedily assigning `costs`, in the given order, to the least loaded worker."""
+    loads = [0.0] * max(1, num_workers)
+    for cost in costs:
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+
+def plan_schedule(pdf_folder, filenames, options=None, buffers=None):
+    """Order files for dispatch: largest estimated cost first, or by name with `order: name`.
+
+    `buffers` maps filenames held in memory to their bytes; those are probed in place.
+    """
+    schedule_opts = (options or {}).get("schedule") or {}
+    per_page = schedule_opts.get("seconds_per_page", DEFAULT_SECONDS_PER_PAGE)
+    per_mb = schedule_opts.get("seconds_per_mb", DEFAULT_SECONDS_PER_MB)
+
+    plan = []
+    for filename in filenames:
+        size_bytes, pages = probe_pdf(os.path.join(pdf_folder, filename), (buffers or {}).get(filename))
+        plan.append(PlannedFile(filename, size_bytes, pages, estimate_cost(size_bytes, pages, per_page, per_mb)))
+
+    if schedule_opts.get("order", "lpt") == "lpt":
+        plan.sort(key=lambda p: p.cost, reverse=True)
+    return plan
+
+
+def makespan_report(plan, results, num_workers, wall_seconds):
+    """Projected vs actual makespan for a finished run."""
+    busy = [r["seconds"] for r in results if r.get("seconds") is not None]
+    report = {
+        "workers": num_workers,
+        "files": len(plan),
+        "projected_seconds": lpt_makespan([p.cost for p in plan], num_workers),
+        "actual_seconds": wall_seconds,
+        # Best this run could have done with perfect balancing of the observed per-file times
+        "lower_bound_seconds": max(sum(busy) / max(1, num_workers), max(busy, default=0.0)),
+    }
+    logger.info(
+        f"⏱️ Makespan: actual {report['actual_seconds']:.1f}s, projected {report['projected_seconds']:.1f}s, "
+        f"lower bound {report['lower_bound_seconds']:.1f}s over {num_workers} workers"
+    )
+    return report
@@ -0,0 +1,166 @@
+import logging
+import pandas as pd
+from sqlalchemy.types import Date, DateTime, Float, String, Text
+from night_audit_etl_pipeline.grammar import SECTION_SPECS
+from night_audit_etl_pipeline.helpers import convert_date_column, safe_float_column
+
+
+logger = logging.getLogger("night_audit_etl")
+
+# Column kinds: in-memory dtype and the SQLAlchemy type handed to to_sql.
+#   category - low-cardinality codes repeated on every row
+#   amount   - money; stays float64, float32 can't hold cents beyond ~100k exactly
+#   count    - room nights, percentages and counters, downcast to float32
+#   date     - datetime64 in memory, DATE in MySQL
+COLUMN_KINDS = {
+    "str": (None, Text()),
+    "category": ("category", String(64)),
+    "amount": ("float64", Float(precision=53)),
+    "count": ("float32", Float()),
+    "date": ("datetime64[ns]", Date()),
+    "datetime": ("datetime64[ns]", DateTime()),
+}
+
+# Added by add_metadata, the sinks or the extractors to most tables
+COMMON_COLUMNS = {
+    "source_file": "category",
+    "load_timestamp": "datetime",
+    "property_code": "category",
+    "user": "category",
+    "user_id": "category",
+    "business_date": "date",
+    "report_date": "date",
+}
+
+TABLE_SCHEMAS = {
+    "inhouse_list_data": {
+        "room": "str", "account": "str", "guest_name": "str", "confirmation_notes": "str",
+        "arrive": "date", "depart": "date", "ppl": "str", "type": "category", "rate_code": "category",
+        "rate": "amount", "gtd": "category", "source": "category", "market": "category", "balance": "amount",
+    },
+    "hotel_journal_detail": {
+        "transaction_code": "category", "date": "date", "posting_date": "date", "time": "str",
+        "am_pm": "category", "shift_id": "category", "room": "str", "account_type": "category",
+        "account_number": "str", "guest_name": "str", "amount": "amount",
+    },
+    "hotel_journal_summary": {
+        "description": "category", "postings": "amount", "corrections": "amount", "adjustments": "amount",
+        "totals": "amount", "transactions": "count", "post_count": "count", "corr_count": "count",
+        "adj_count": "count",
+    },
+    "advance_deposit_journal": {
+        "posting_date": "date", "room": "str", "account_type": "category", "account_number": "str",
+        "account_name": "str", "total": "amount", "transaction_type": "category",
+    },
+    "ledger_activity": {
+        "ledger_type": "category", "opening_balance": "amount", "credits": "amount", "adjustments": "amount",
+        "debits": "amount", "transfers": "amount", "balance_forward": "amount",
+    },
+    "ledger_summary": {
+        "section": "category", "field_name": "category", "amount": "amount",
+    },
+    "no_show_report": {
+        "account": "str", "guest_name": "str", "arrival_date": "date", "departure_date": "date",
+        "source": "category", "gtd": "category", "rate_plan": "category", "rate": "amount",
+        "balance": "amount", "payment": "amount", "auth_status": "category",
+    },
+    "rate_discrepancy": {
+        "start_date": "date", "guest_name": "str", "end_date": "date", "room": "str", "account": "str",
+        "adults_children": "category", "rate_plan": "category", "market": "category", "source": "category",
+        "configured_rate": "amount", "override_rate": "amount", "difference": "amount",
+    },
+    "reservation_activity": {
+        "account": "str", "guest_name": "str", "arrive": "date", "depart": "date", "nights": "count",
+        "status": "category", "rate": "amount", "rate_code": "category", "type": "category", "room": "str",
+        "source": "category", "crs_conf_no": "str", "gtd": "category", "reserve_date": "date",
+    },
+    "shift_reconciliation": {
+        "shift_id": "category", "description": "category", "total": "amount",
+    },
+    "shift_summary": {
+        "shift_id": "category", "beginning_bank": "amount", "closing_bank": "amount",
+        "over_short": "amount", "auto_close": "category",
+    },
+    "gross_room_revenue_detail": {
+        "description": "category", "opening_balance": "amount", "today_total": "amount",
+        "adjustments": "amount", "net": "amount", "monthly_total": "amount", "ytd_total": "amount",
+    },
+    "revenue_by_rate_code": {
+        "rate_code": "category", "room_nights": "count", "room_nights_percent": "count",
+        "room_revenue": "amount", "room_revenue_percent": "count", "daily_avg": "amount",
+        "ptd_room_nights": "count", "ptd_room_revenue": "amount", "ptd_avg": "amount",
+        "ytd_room_nights": "count", "ytd_room_revenue": "amount", "ytd_avg": "amount",
+    },
+}
+
+# Sections parsed by grammar.py already declare their column types
+for _spec in SECTION_SPECS:
+    TABLE_SCHEMAS[_spec.table] = {c.name: c.type for c in _spec.columns}
+
+
+def column_kinds(table_name):
+    """{column: kind} for `table_name`; tables without a schema only get the common columns."""
+    return {**COMMON_COLUMNS, **TABLE_SCHEMAS.get(table_name, {})}
+
+
+def _convert(series, kind):
+    if kind == "category":
+        return series.astype("category")
+    if kind in ("amount", "count"):
+        if series.dtype == object:
+            series = safe_float_column(series)
+        return pd.to_numeric(series, errors="coerce").astype(COLUMN_KINDS[kind][0])
+    if kind in ("date", "datetime"):
+        if series.dtype == object:
+            # Extractors that reformat dates emit ISO; everything else goes through the
+            # report's own formats (month first), never dateutil guessing
+            text = series.map(lambda v: isinstance(v, str), na_action="ignore").fillna(False).astype(bool)
+            if text.any():
+                parsed = pd.to_datetime(series.where(text), format="ISO8601", errors="coerce").astype(object)
+                report = text & parsed.isna()
+                if report.any():
+                    parsed[report] = convert_date_column(series[report])
+                series = series.where(~text, parsed)
+        converted = pd.to_datetime(series, errors="coerce")
+        return converted.dt.normalize() if kind == "date" else converted
+    return series
+
+
+def _missing(series):
+    # Blank strings were never values either; the parsers turn them into None
+    missing = series.isna()
+    if series.dtype == object:
+        missing |= series.map(lambda v: isinstance(v, str) and not v.strip())
+    return missing.sum()
+
+
+def apply_schema(df, table_name):
+    """Cast `df`'s columns to the registry dtypes in place and return it.
+
+    Columns the registry doesn't know are left alone, and so is any column whose
+    conversion would turn a present value into a null: the database keeps
+    coercing those the way it always has.
+    """
+    for column, kind in column_kinds(table_name).items():
+        if column not in df or COLUMN_KINDS[kind][0] is None:
+            continue
+        series = df[column]
+        if str(series.dtype) == COLUMN_KINDS[kind][0] or (
+                kind in ("date", "datetime") and pd.api.types.is_datetime64_any_dtype(series)):
+            continue
+        try:
+            converted = _convert(series, kind)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"⚠️ Kept {table_name}.{column} as {series.dtype}: {e}")
+            continue
+        if converted.isna().sum() > _missing(series):
+            logger.debug(f"⚠️ Kept {table_name}.{column} as {series.dtype}: values don't all parse as {kind}")
+            continue
+        df[column] = converted
+    return df
+
+
+def sql_dtypes(table_name, columns):
+    """SQLAlchemy `dtype=` mapping for to_sql, limited to `columns`."""
+    kinds = column_kinds(table_name)
+    return {c: COLUMN_KINDS[kinds[c]][1] for c in columns if c in kinds}
@@ -0,0 +1,275 @@
+import os
+import re
+import glob
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date, datetime
+import pandas as pd
+from night_audit_etl_pipeline.db_utils import insert_dataframe, section_savepoint, update_file_tracker
+from night_audit_etl_pipeline.schemas import apply_schema, column_kinds
+
+
+logger = logging.getLogger("night_audit_etl")
+
+
+# A sink is where handle_section / handle_custom_section send finished section frames.
+#   write_stage   - metrics stage name for time spent in write()
+#   file_scope()  - wraps everything written for one PDF
+#   section()     - wraps one section; an exception inside discards only that section
+#   write()       - one frame for one target table
+#   record_file() - the file_tracker row for the PDF
+
+
+class DatabaseSink:
+    """Insert straight into MySQL from the parse worker."""
+
+    write_stage = "write"
+
+    def __init__(self, engine, single_transaction=False):
+        self.engine = engine
+        self.single_transaction = single_transaction
+        self._conn = None
+
+    @property
+    def connectable(self):
+        return self._conn if self._conn is not None else self.engine
+
+    @contextmanager
+    def file_scope(self):
+        if not self.single_transaction:
+            yield
+            return
+        # All sections and the file_tracker row commit together, so a crash midway
+        # leaves nothing behind and the file is simply picked up again next run.
+        with self.engine.connect() as conn, conn.begin():
+            self._conn = conn
+            try:
+                yield
+            finally:
+                self._conn = None
+
+    def section(self):
+        return section_savepoint(self.connectable)
+
+    def write(self, df, table_name, filename):
+        insert_dataframe(self.connectable, df, table_name, filename)
+
+    def record_file(self, filename, status, row_count=None, error_message=None):
+        update_file_tracker(self.connectable, filename, status, row_count, error_message)
+
+
+class BufferingSink(ABC):
+    """Hold a PDF's frames until record_file, dropping those of failed sections.
+
+    Subclasses decide where a finished file goes in flush_file.
+    """
+
+    # write() only buffers; the rows are loaded later (by a writer process in pipeline mode)
+    write_stage = "enqueue"
+
+    def __init__(self):
+        self._frames = []
+
+    @contextmanager
+    def file_scope(self):
+        self._frames = []
+        try:
+            yield
+        finally:
+            self._frames = []
+
+    @contextmanager
+    def section(self):
+        mark = len(self._frames)
+        try:
+            yield
+        except Exception:
+            del self._frames[mark:]
+            raise
+
+    def write(self, df, table_name, filename):
+        df["source_file"] = filename
+        df["load_timestamp"] = datetime.now()
+        self._frames.append((table_name, apply_schema(df, table_name)))
+        logger.info(f"📤 Queued {len(df)} rows for {table_name} from {filename}")
+
+    def record_file(self, filename, status, row_count=None, error_message=None):
+        frames, self._frames = self._frames, []
+        self.flush_file(filename, frames, status, row_count, error_message)
+
+    @abstractmethod
+    def flush_file(self, filename, frames, status, row_count, error_message):
+        """Deliver a finished file: its (table_name, frame) pairs and file_tracker values."""
+
+
+class QueueSink(BufferingSink):
+    """Collect a PDF's frames and hand them to a writer process in one message.
+
+    Sending whole files keeps each file on a single writer, which commits its
+    rows and its file_tracker row in the same transaction.
+    """
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+
+    def flush_file(self, filename, frames, status, row_count, error_message):
+        self.queue.put((filename, frames, status, row_count, error_message))
+
+
+class NullSink(BufferingSink):
+    """Parse-only runs: count what would have been loaded and drop it."""
+
+    def flush_file(self, filename, frames, status, row_count, error_message):
+        rows = sum(len(df) for _, df in frames)
+        logger.info(f"🗑️ Discarded {rows} rows in {len(frames)} frames from {filename} ({status})")
+
+
+class ParquetSink(BufferingSink):
+    """Write each PDF's sections as Parquet under table/property=/business_date=.
+
+    Files are named after the source PDF and numbered within each table, so
+    reprocessing a PDF replaces its files, and a successful rerun removes the
+    ones it no longer produces, instead of duplicating rows. The file_tracker
+    row goes to `file_tracker/<pdf>.parquet`.
+    """
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def flush_file(self, filename, frames, status, row_count, error_message):
+        stem = os.path.splitext(filename)[0]
+        parts = {}  # table -> frames written so far, numbers the files within each table
+        written = set()
+        for table_name, df in frames:
+            part = parts[table_name] = parts.get(table_name, -1) + 1
+            for (prop, business_date), group in partition_frame(df):
+                directory = os.path.join(self.root, table_name, f"property={prop}", f"business_date={business_date}")
+                path = os.path.join(directory, f"{stem}-{part}.parquet")
+                write_parquet(group, path, table_name)
+                written.add(os.path.normpath(path))
+        # Failure records come without frames; the last good run's files stay until a new one replaces them
+        if status in ("SUCCESS", "PARTIAL") and written:
+            self.remove_stale_parts(stem, written)
+        tracker = pd.DataFrame([{
+            "source_file": filename, "load_date": datetime.now(), "status": status,
+            "rows_loaded": row_count, "error_message": error_message,
+        }])
+        write_parquet(tracker, os.path.join(self.root, "file_tracker", f"{stem}.parquet"))
+        logger.info(f"🧱 Wrote {sum(len(df) for _, df in frames)} rows for {filename} to {self.root}")
+
+
+    def remove_stale_parts(self, stem, written):
+        """Delete the stem's files from an earlier run that this run didn't rewrite.
+
+        A reprocessed PDF can yield fewer frames, or rows under other
+        partitions; leftovers would be read twice as part of the dataset.
+        """
+        name_re = re.compile(re.escape(stem) + r"-\d+\.parquet")
+        pattern = os.path.join(glob.escape(self.root), "*", "property=*", "business_date=*", f"{glob.escape(stem)}-*.parquet")
+        for path in glob.glob(pattern):
+            if name_re.fullmatch(os.path.basename(path)) and os.path.normpath(path) not in written:
+                os.remove(path)
+                logger.info(f"🧹 Removed stale {path}")
+
+
+def partition_frame(df):
+    """Yield ((property, business_date), rows) with the partition columns dropped from the rows."""
+    prop = df["property_code"].astype(str) if "property_code" in df else pd.Series("unknown", index=df.index)
+    if "business_date" in df:
+        business_date = pd.to_datetime(df["business_date"], errors="coerce").dt.strftime("%Y-%m-%d").fillna("unknown")
+    else:
+        business_date = pd.Series("unknown", index=df.index)
+    data = df.drop(columns=[c for c in ("property_code", "business_date") if c in df])
+    for key, index in data.groupby([prop, business_date], sort=False).groups.items():
+        yield key, data.loc[index]
+
+
+def arrow_schema(df, table_name=None):
+    """Explicit Arrow schema from the schema registry, else the frame's dtypes; never inferred per file.
+
+    Inference would type an all-null column as `null` in one file and `string`
+    in the next, and the partitions could no longer be read as one dataset.
+    """
+    pa = _pyarrow()
+    registry_types = {
+        "str": pa.string(), "category": pa.string(), "amount": pa.float64(), "count": pa.float32(),
+        "date": pa.date32(), "datetime": pa.timestamp("us"),
+    }
+    kinds = column_kinds(table_name) if table_name else {}
+    fields = []
+    for name, series in df.items():
+        if name in kinds and _has_registry_dtype(series, kinds[name]):
+            arrow_type = registry_types[kinds[name]]
+        elif pd.api.types.is_bool_dtype(series):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(series):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_float_dtype(series):
+            arrow_type = pa.float64()
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            arrow_type = pa.timestamp("us")
+        else:
+            sample = series.dropna()
+            sample = sample.iloc[0] if len(sample) else None
+            if isinstance(sample, datetime):
+                arrow_type = pa.timestamp("us")
+            elif isinstance(sample, date):
+                arrow_type = pa.date32()
+            elif isinstance(sample, (int, float)) and not isinstance(sample, bool):
+                arrow_type = pa.float64()
+            else:
+                arrow_type = pa.string()
+        fields.append(pa.field(str(name), arrow_type))
+    return pa.schema(fields)
+
+
+def _has_registry_dtype(series, kind):
+    # apply_schema leaves a column alone when converting it would lose values
+    # (e.g. one unparseable date); those are typed from what they actually hold.
+    if kind in ("amount", "count"):
+        return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    if kind in ("date", "datetime"):
+        return pd.api.types.is_datetime64_any_dtype(series)
+    return isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series)
+
+
+def _pyarrow():
+    # Optional dependency, only needed for the parquet sink
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The parquet sink needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def write_parquet(df, path, table_name=None):
+    pa = _pyarrow()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    schema = arrow_schema(df, table_name)
+    table = pa.Table.from_pandas(df.reset_index(drop=True), schema=schema, preserve_index=False)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pa.parquet.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+SINK_TYPES = ("mysql", "parquet", "null")
+
+
+def sink_type(options):
+    kind = ((options or {}).get("sink") or {}).get("type", "mysql")
+    if kind not in SINK_TYPES:
+        raise ValueError(f"Unknown sink type {kind!r}, expected one of {', '.join(SINK_TYPES)}")
+    return kind
+
+
+def local_sink(options):
+    """The sink for runs that never touch the database (`sink.type` parquet or null)."""
+    sink_opts = (options or {}).get("sink") or {}
+    if sink_type(options) == "parquet":
+        return ParquetSink(sink_opts.get("dir", "parquet"))
+    return NullSink()
@@ -0,0 +1,309 @@
+import time
+import logging
+import logging.handlers
+import itertools
+import threading
+import traceback
+from collections import deque, namedtuple
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+import psutil
+
+
+logger = logging.getLogger("night_audit_etl")
+
+# status is OK, ERROR (value is the worker traceback), TIMEOUT or DIED
+# (value is whatever the on_timeout / on_worker_death hook returned).
+TaskResult = namedtuple("TaskResult", ["task_id", "args", "status", "value", "seconds"])
+
+
+# The worker's end of its pipe, for ParentChannel; None outside a supervised worker.
+_parent_conn = None
+_send_lock = threading.Lock()
+
+
+def _send(message):
+    with _send_lock:
+        _parent_conn.send(message)
+
+
+class ParentChannel:
+    """Queue-like handle a worker uses to pass `kind` messages to the parent over its own pipe.
+
+    The parent hands each one to the pool's `on_message[kind]`. Unlike a queue
+    shared by all workers, a worker killed halfway through a put can only
+    break its own pipe, which the parent throws away with it.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def put(self, item):
+        if _parent_conn is None:
+            raise RuntimeError("ParentChannel only works inside a SupervisedPool worker")
+        _send(("relay", self.kind, item))
+
+    put_nowait = put
+
+
+def _relay_logs(log_name):
+    logger = logging.getLogger(log_name)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(ParentChannel("log")))
+    logger.propagate = False
+
+
+def _handle_log(record):
+    logging.getLogger(record.name).handle(record)
+
+
+def _worker_main(conn, initializer, initargs, maxtasksperchild, max_rss_bytes, log_name):
+    global _parent_conn
+    _parent_conn = conn
+    if initializer:
+        initializer(*initargs)
+    if log_name:
+        _relay_logs(log_name)
+    proc = psutil.Process()
+    done = 0
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        task_id, func, args = message
+        try:
+            value, ok = func(args), True
+        except Exception:
+            value, ok = traceback.format_exc(), False
+        done += 1
+        rss = proc.memory_info().rss
+        retire = bool(maxtasksperchild and done >= maxtasksperchild) or bool(max_rss_bytes and rss > max_rss_bytes)
+        _send(("result", task_id, ok, value, rss, retire))
+        if retire:
+            break
+    # Returning normally lets multiprocessing run the Finalize hooks set up by the initializer;
+    # the pipe stays open until the process exits so they can still log
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.task = None  # (task_id, args, started) while busy
+
+
+class SupervisedPool:
+    """Process pool that recycles workers and kills the ones that hang.
+
+    Every worker has its own pipe, so the parent always knows which file a worker
+    is on and can kill it without corrupting a queue shared with the others.
+    Anything else a worker sends must take the same route to stay safe: records
+    of the `log_name` logger (replacing the handlers the initializer set on it)
+    are handled by the parent's logger of the same name, and items put on a
+    `ParentChannel(kind)` go to `on_message[kind](item)` in the parent.
+    Workers are replaced after `maxtasksperchild` files or once their RSS passes
+    `max_rss_mb`. A file running longer than `task_timeout` seconds gets its
+    worker killed and replaced, and `on_timeout(args, elapsed)` supplies the
+    result; a worker that dies mid-file is handled the same way through
+    `on_worker_death(args, exitcode)`.
+    """
+
+    def __init__(self, processes, initializer=None, initargs=(), maxtasksperchild=None,
+                 max_rss_mb=None, task_timeout=None, on_timeout=None, on_worker_death=None,
+                 log_name=None, on_message=None):
+        self.initializer = initializer
+        self.initargs = initargs
+        self.maxtasksperchild = maxtasksperchild
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024) if max_rss_mb else None
+        self.task_timeout = task_timeout
+        self.on_timeout = on_timeout
+        self.on_worker_death = on_worker_death
+        self.log_name = log_name
+        self.on_message = dict(on_message or {})
+        if log_name:
+            self.on_message.setdefault("log", _handle_log)
+        self.stats = {"recycled": 0, "timeouts": 0, "deaths": 0}
+        self._ids = itertools.count()
+        self._pending = deque()
+        self._workers = [self._spawn() for _ in range(max(1, processes))]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def _spawn(self):
+        parent_conn, child_conn = Pipe()
+        process = Process(target=_worker_main, daemon=True,
+                          args=(child_conn, self.initializer, self.initargs,
+                                self.maxtasksperchild, self.max_rss_bytes, self.log_name))
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _replace(self, worker, kill=False):
+        if kill and worker.process.is_alive():
+            worker.process.kill()
+        else:
+            self._drain(worker)
+        worker.process.join()
+        worker.conn.close()
+        index = self._workers.index(worker)
+        self._workers[index] = self._spawn()
+
+    @property
+    def outstanding(self):
+        return len(self._pending) + sum(1 for w in self._workers if w.task is not None)
+
+    def submit(self, func, args):
+        task_id = next(self._ids)
+        self._pending.append((task_id, func, args))
+        self._dispatch()
+        return task_id
+
+    def _dispatch(self):
+        for worker in list(self._workers):
+            if not self._pending:
+                return
+            if worker.task is not None:
+                continue
+            if not worker.process.is_alive():
+                self._replace(worker)
+                continue
+            task_id, func, args = self._pending.popleft()
+            try:
+                worker.conn.send((task_id, func, args))
+            except (BrokenPipeError, OSError):
+                self._pending.appendleft((task_id, func, args))
+                self._replace(worker)
+                continue
+            worker.task = (task_id, args, time.monotonic())
+
+    def poll(self, timeout=None):
+        """Wait up to `timeout` seconds (None = until something finishes) and return finished tasks."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._dispatch()
+            busy = [w for w in self._workers if w.task is not None]
+            if not busy:
+                return []
+
+            wait_for = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self.task_timeout:
+                now = time.monotonic()
+                next_deadline = max(0.0, min(w.task[2] + self.task_timeout for w in busy) - now)
+                wait_for = next_deadline if wait_for is None else min(wait_for, next_deadline)
+            wait([w.conn for w in busy] + [w.process.sentinel for w in busy], wait_for)
+
+            results = [r for r in map(self._check, busy) if r is not None]
+            self._dispatch()
+            # Relayed messages wake the wait too; keep waiting until a task is done
+            if results or (deadline is not None and time.monotonic() >= deadline):
+                return results
+
+    def _check(self, worker):
+        task_id, args, started = worker.task
+        elapsed = time.monotonic() - started
+        try:
+            message = self._receive(worker)
+        except (EOFError, OSError):
+            return self._worker_died(worker, args, elapsed)
+        if message is not None:
+            _, ok, value, rss, retire = message
+            worker.task = None
+            if retire:
+                logger.info(f"♻️ Recycling worker {worker.process.pid} after task {task_id} "
+                            f"(RSS {rss / 1024 / 1024:.0f} MB)")
+                self.stats["recycled"] += 1
+                self._replace(worker)
+            return TaskResult(task_id, args, "OK" if ok else "ERROR", value, elapsed)
+        if not worker.process.is_alive():
+            return self._worker_died(worker, args, elapsed)
+        if self.task_timeout and elapsed > self.task_timeout:
+            logger.error(f"⏰ Task {task_id} exceeded {self.task_timeout}s, killing worker {worker.process.pid}")
+            self.stats["timeouts"] += 1
+            worker.task = None
+            self._replace(worker, kill=True)
+            value = self.on_timeout(args, elapsed) if self.on_timeout else None
+            return TaskResult(task_id, args, "TIMEOUT", value, elapsed)
+        return None
+
+    def _receive(self, worker):
+        """Pass on what the worker relayed and return its task result, or None if it hasn't sent one yet."""
+        while worker.conn.poll():
+            message = worker.conn.recv()
+            if message[0] == "result":
+                return message[1:]
+            self._relay(*message[1:])
+        return None
+
+    def _relay(self, kind, item):
+        handler = self.on_message.get(kind)
+        if handler is None:
+            logger.warning(f"⚠️ Dropped a {kind!r} message from a worker: no handler")
+            return
+        handler(item)
+
+    def _drain(self, worker, timeout=5):
+        # A worker on its way out can still log (exit hooks); read up to its end of the pipe
+        deadline = time.monotonic() + timeout
+        try:
+            while worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                message = worker.conn.recv()
+                if message[0] == "relay":
+                    self._relay(*message[1:])
+        except (EOFError, OSError):
+            pass
+
+    def _worker_died(self, worker, args, elapsed):
+        task_id = worker.task[0]
+        worker.task = None
+        worker.process.join()
+        exitcode = worker.process.exitcode
+        logger.error(f"💀 Worker {worker.process.pid} died (exit code {exitcode}) during task {task_id}")
+        self.stats["deaths"] += 1
+        self._replace(worker)
+        value = self.on_worker_death(args, exitcode) if self.on_worker_death else None
+        return TaskResult(task_id, args, "DIED", value, elapsed)
+
+    def imap_unordered(self, func, iterable):
+        """Like Pool.imap_unordered; timed-out or lost tasks yield their hook's result."""
+        for args in iterable:
+            self.submit(func, args)
+        while self.outstanding:
+            for result in self.poll():
+                if result.status == "ERROR":
+                    raise RuntimeError(f"Task {result.task_id} failed in worker:\n{result.value}")
+                yield result.value
+
+    def close(self, timeout=30):
+        """Stop workers once they are idle, letting them run their exit hooks."""
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            self._drain(worker, timeout)
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.conn.close()
+        self._workers = []
+
+    def terminate(self):
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.process.join()
+            worker.conn.close()
+        self._workers = []
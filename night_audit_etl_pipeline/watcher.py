@@ -0,0 +1,58 @@
+import os
+import time
+import logging
+
+
+logger = logging.getLogger("night_audit_etl")
+
+
+class FolderWatcher:
+    """Polls a folder and reports each file once it has stopped changing.
+
+    A file is ready when two consecutive polls see the same size and mtime and
+    the mtime is at least `settle_seconds` old, so a PDF still being copied or
+    uploaded into the folder is left alone until the writer is done with it.
+    A ready file that later changes (re-uploaded) is reported again.
+    """
+
+    def __init__(self, folder, settle_seconds=10, accept=None, clock=time.time):
+        self.folder = folder
+        self.settle_seconds = settle_seconds
+        self.accept = accept or (lambda name: True)
+        self.clock = clock
+        self._seen = {}      # name -> (size, mtime) at the last poll
+        self._reported = {}  # name -> (size, mtime) when reported ready
+
+    def _scan(self):
+        found = {}
+        try:
+            entries = list(os.scandir(self.folder))
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Watched folder {self.folder} does not exist")
+            return found
+        for entry in entries:
+            if not self.accept(entry.name):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue  # renamed or removed since the listing
+            if entry.is_file():
+                found[entry.name] = (st.st_size, st.st_mtime)
+        return found
+
+    def poll(self):
+        """Names that became ready since the last poll, sorted."""
+        now = self.clock()
+        found = self._scan()
+        ready = []
+        for name, signature in found.items():
+            if self._reported.get(name) == signature:
+                continue
+            if self._seen.get(name) == signature and now - signature[1] >= self.settle_seconds:
+                self._reported[name] = signature
+                ready.append(name)
+        self._seen = found
+        for name in set(self._reported) - set(found):
+            del self._reported[name]
+        return sorted(ready)
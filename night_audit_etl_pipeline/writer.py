@@ -0,0 +1,102 @@
+import os
+import queue
+import logging
+import traceback
+import pandas as pd
+from night_audit_etl_pipeline.db_utils import (
+    bulk_load_dataframe, create_db_engine, engine_options, pool_stats, update_file_tracker
+)
+from night_audit_etl_pipeline.schemas import apply_schema
+
+
+logger = logging.getLogger("night_audit_etl")
+
+DEFAULT_BATCH_ROWS = 50000
+DEFAULT_BATCH_FILES = 20
+DEFAULT_FLUSH_SECONDS = 5
+
+
+class BatchWriter:
+    """Accumulate parsed files and load them in large per-table batches.
+
+    Each flush concatenates every pending frame per target table, bulk loads the
+    tables and writes the file_tracker rows in one transaction. If a batch fails
+    it is retried file by file so one bad file can't block the others.
+    """
+
+    def __init__(self, engine, batch_rows=DEFAULT_BATCH_ROWS, batch_files=DEFAULT_BATCH_FILES):
+        self.engine = engine
+        self.batch_rows = batch_rows
+        self.batch_files = batch_files
+        self.pending = []
+        self.pending_rows = 0
+
+    def add(self, item):
+        filename, frames, status, row_count, error_message = item
+        self.pending.append(item)
+        self.pending_rows += sum(len(df) for _, df in frames)
+        if self.pending_rows >= self.batch_rows or len(self.pending) >= self.batch_files:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending, self.pending_rows = self.pending, [], 0
+        try:
+            self._load(batch)
+        except Exception as e:
+            logger.error(f"❌ Batch of {len(batch)} files failed, retrying per file: {e}\n{traceback.format_exc()}")
+            for item in batch:
+                try:
+                    self._load([item])
+                except Exception as file_error:
+                    filename = item[0]
+                    logger.error(f"❌ Writer failed to load {filename}: {file_error}")
+                    try:
+                        update_file_tracker(self.engine, filename, 'FAILURE', None, f"Writer error: {file_error}")
+                    except Exception as tracker_error:
+                        # Database down: the file has no tracker row either, so the next run retries it
+                        logger.error(f"❌ Writer could not record FAILURE for {filename}: {tracker_error}")
+
+    def _load(self, batch):
+        by_table = {}
+        for _, frames, _, _, _ in batch:
+            for table_name, df in frames:
+                by_table.setdefault(table_name, []).append(df)
+
+        with self.engine.connect() as conn, conn.begin():
+            for table_name, dfs in by_table.items():
+                # Categoricals with different categories concat to object; cast them back
+                df = apply_schema(pd.concat(dfs, ignore_index=True), table_name) if len(dfs) > 1 else dfs[0]
+                method, rows, seconds = bulk_load_dataframe(conn, df, table_name)
+                rate = rows / seconds if seconds > 0 else float(rows)
+                logger.info(f"✅ Writer loaded {rows} rows into {table_name} from {len(dfs)} frames via {method} ({rate:,.0f} rows/s)")
+            for filename, _, status, row_count, error_message in batch:
+                update_file_tracker(conn, filename, status, row_count, error_message)
+        logger.info(f"💾 Writer committed {len(batch)} files")
+
+
+def run_writer(write_queue, conn_str, options, logger_initializer=None):
+    """Writer process entry point: drain `write_queue` until a None sentinel arrives."""
+    if logger_initializer:
+        logger_initializer()
+    writer_opts = (options or {}).get("writer") or {}
+    engine = create_db_engine(conn_str, **engine_options(options))
+    writer = BatchWriter(engine, writer_opts.get("batch_rows", DEFAULT_BATCH_ROWS),
+                         writer_opts.get("batch_files", DEFAULT_BATCH_FILES))
+    flush_seconds = writer_opts.get("flush_seconds", DEFAULT_FLUSH_SECONDS)
+    logger.info(f"🖊️ Writer {os.getpid()} started")
+    try:
+        while True:
+            try:
+                item = write_queue.get(timeout=flush_seconds)
+            except queue.Empty:
+                writer.flush()  # parsers are slow right now; don't sit on finished files
+                continue
+            if item is None:
+                break
+            writer.add(item)
+        writer.flush()
+    finally:
+        logger.info(f"🔌 Writer {os.getpid()} connection pool: {pool_stats(engine)}")
+        engine.dispose()
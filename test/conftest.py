@@ -0,0 +1,31 @@
+import pytest
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import create_engine, event
+
+
+@pytest.fixture
+def sqlite_engine():
+    # pysqlite needs explicit BEGIN handling for SAVEPOINT to work;
+    # NOW() stands in for MySQL's in the file_tracker upsert
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        dbapi_connection.create_function("NOW", 0, lambda: datetime.now().isoformat())
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def tracker_db(sqlite_engine):
+    """sqlite_engine with an empty file_tracker table."""
+    pd.DataFrame(columns=["source_file", "load_date", "status", "rows_loaded", "error_message"]).to_sql(
+        "file_tracker", sqlite_engine, index=False)
+    return sqlite_engine
@@ -0,0 +1,24 @@
+import json
+from night_audit_etl_pipeline import config_loader
+
+
+def test_config_read_once_and_copied(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"pdf_folder": "${PDF_DIR}/in", "etl": {"sink": {"type": "null"}}}))
+    monkeypatch.setenv("PDF_DIR", "/data")
+    monkeypatch.setenv("NIGHT_AUDIT_CONFIG", str(path))
+    config_loader._load_config.cache_clear()
+
+    first = config_loader.config()
+    assert first["pdf_folder"] == "/data/in"
+    first["etl"]["sink"]["type"] = "mysql"
+
+    path.write_text("{}")  # not read again
+    assert config_loader.config() == {"pdf_folder": "/data/in", "etl": {"sink": {"type": "null"}}}
+    config_loader._load_config.cache_clear()
+
+
+def test_default_path_is_next_to_the_module(monkeypatch):
+    monkeypatch.delenv("NIGHT_AUDIT_CONFIG", raising=False)
+    assert config_loader.config_path() == config_loader.DEFAULT_CONFIG_PATH
+    assert config_loader.config()["etl"]["sink"]["type"] == "mysql"
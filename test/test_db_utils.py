@@ -0,0 +1,107 @@
+import time
+import threading
+import pytest
+import pandas as pd
+from datetime import date
+from sqlalchemy import create_engine
+from night_audit_etl_pipeline.db_utils import (
+    insert_dataframe, bulk_load_dataframe, load_data_lines, insert_chunksize, section_savepoint,
+    create_db_engine, pool_stats, fetch_processed_files
+)
+
+
+def test_load_data_lines_escaping():
+    df = pd.DataFrame({
+        "guest_name": ["Doe\tJohn", "C:\\temp", None],
+        "amount": [1.5, None, -2.0],
+        "posting_date": [date(2025, 1, 1), None, date(2025, 1, 2)],
+    })
+    assert load_data_lines(df).tolist() == [
+        "Doe\\tJohn\t1.5\t2025-01-01",
+        "C:\\\\temp\t\\N\t\\N",
+        "\\N\t-2.0\t2025-01-02",
+    ]
+
+
+def test_insert_chunksize_bounds_values_per_statement():
+    df = pd.DataFrame(columns=[f"c{i}" for i in range(10)])
+    assert insert_chunksize(df) == 2000
+
+
+def test_insert_dataframe_multi_row_insert():
+    engine = create_engine("sqlite://")
+    df = pd.DataFrame({"account": [str(i) for i in range(2500)], "balance": [float(i) for i in range(2500)]})
+
+    method, rows, seconds = bulk_load_dataframe(engine, df.copy(), "staging")
+    assert (method, rows) == ("insert", 2500)
+
+    insert_dataframe(engine, df, "ar_aging", "Night Audit 2025-01-01.pdf")
+    loaded = pd.read_sql("SELECT COUNT(*) AS n, MAX(source_file) AS source_file FROM ar_aging", engine)
+    assert loaded.loc[0, "n"] == 2500
+    assert loaded.loc[0, "source_file"] == "Night Audit 2025-01-01.pdf"
+
+
+def test_insert_dataframe_reports_throughput_to_the_etl_log(caplog):
+    caplog.set_level("INFO", logger="night_audit_etl")
+    insert_dataframe(create_engine("sqlite://"), pd.DataFrame({"account": ["1", "2"]}), "ar_aging", "a.pdf")
+    [record] = [r for r in caplog.records if "rows/s" in r.getMessage()]
+    assert record.name == "night_audit_etl"
+    assert "Loaded 2 rows into ar_aging from a.pdf via insert" in record.getMessage()
+
+
+def test_section_savepoint_rolls_back_only_failed_section(sqlite_engine):
+    engine = sqlite_engine
+    filename = "Night Audit 2025-01-01.pdf"
+    with engine.connect() as conn, conn.begin():
+        with section_savepoint(conn):
+            insert_dataframe(conn, pd.DataFrame({"account": ["1", "2"]}), "ar_aging", filename)
+        with pytest.raises(RuntimeError):
+            with section_savepoint(conn):
+                insert_dataframe(conn, pd.DataFrame({"description": ["Cash"]}), "transaction_closeout", filename)
+                raise RuntimeError("extractor failed after insert")
+
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM ar_aging", engine).loc[0, "n"] == 2
+    assert pd.read_sql("SELECT name FROM sqlite_master WHERE name = 'transaction_closeout'", engine).empty
+
+
+def test_file_transaction_rollback_discards_all_sections(sqlite_engine):
+    engine = sqlite_engine
+    with pytest.raises(RuntimeError):
+        with engine.connect() as conn, conn.begin():
+            insert_dataframe(conn, pd.DataFrame({"account": ["1"]}), "ar_aging", "a.pdf")
+            raise RuntimeError("worker crashed")
+    assert pd.read_sql("SELECT name FROM sqlite_master WHERE name = 'ar_aging'", engine).empty
+
+
+def test_create_db_engine_counts_checkouts_and_waits(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'etl.db'}", pool_size=1, max_overflow=0)
+    conn = engine.connect()
+
+    def second_checkout():
+        with engine.connect():
+            pass
+
+    waiter = threading.Thread(target=second_checkout)
+    waiter.start()
+    time.sleep(0.1)
+    conn.close()
+    waiter.join()
+
+    stats = pool_stats(engine)
+    assert stats["connects"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["waits"] == 1
+    assert stats["wait_seconds"] > 0
+    engine.dispose()
+
+
+def test_fetch_processed_files_chunks_lookup(sqlite_engine):
+    engine = sqlite_engine
+    pd.DataFrame({
+        "source_file": ["a.pdf", "b.pdf", "c.pdf", "d.pdf"],
+        "status": ["SUCCESS", "PARTIAL", "FAILURE", "TIMEOUT"],
+    }).to_sql("file_tracker", engine, index=False)
+
+    processed = fetch_processed_files(engine, ["a.pdf", "b.pdf", "c.pdf", "d.pdf", "e.pdf"], chunk_size=2)
+    assert processed == {"a.pdf", "b.pdf"}
+    assert fetch_processed_files(engine, []) == set()
@@ -0,0 +1,64 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from night_audit_etl_pipeline.dispatcher import dispatch_lines, SectionRoute
+from night_audit_etl_pipeline.extractors import (
+    extract_metadata, extract_inhouse_df,
+    extract_hotel_journal_details, extract_advance_deposit_journal
+)
+
+
+PAGES = [
+    [
+        "Property Code: HX123 User: night1",
+        "Business Date: 01/01/2025",
+        "A/R Aging",
+        "Account Name Current 30Days",
+        "169773 John Doe 525.00 325.00 225.66 0.00 0.00 0.00 1,075.66 5,000.00",
+        "Grand Total",
+        "Final Transaction Closeout",
+        "Cash 1,000.00 500.00 200.00 700.00 7,000.00 77,000.00",
+        "Date/Time of Printing: 01/02/2025 03:00 AM",
+    ],
+    [
+        "Credit Card 2,000.00 1,000.00 300.00 1,300.00 13,000.00 133,000.00",
+        "In House List",
+        "101 123456 John Doe 1234567 01/01/25 01/03/25 2 KING BAR 129.00 GTD WEB RET 0.00",
+    ],
+    [
+        "Transaction Code: MISC",
+        "Hotel Journal Detail",
+        "01/01/25 01/01/25 03:00 PM user1 1 101 CASH 123456 John Doe $125.00 0.00",
+        "Hotel Journal Summary",
+        "Advance Deposit Journal",
+        "Transaction Code: DEPOSIT",
+    ],
+    [
+        "01/01/25 user1 101 123456 John Doe 100.00",
+        "Advance Deposit Ledger",
+        "01/01/25 user2 Guest 234567 Jane Smith (50.00)",
+    ],
+]
+
+
+def test_dispatch_matches_full_document_extractors():
+    dispatch = dispatch_lines(PAGES)
+    routed = dispatch.sections
+
+    assert dispatch.metadata == extract_metadata(PAGES) == ("01/01/2025", "HX123", "night1", "01/02/2025")
+    for name, extractor in [
+        ("inhouse", extract_inhouse_df),
+        ("hotel_journal_details", extract_hotel_journal_details),
+        ("advance_deposit_journal", extract_advance_deposit_journal),
+    ]:
+        assert_frame_equal(extractor(routed[name]), extractor(PAGES))
+
+    assert extract_hotel_journal_details(routed["hotel_journal_details"]).loc[0, "transaction_code"] == "MISC"
+    assert len(extract_advance_deposit_journal(routed["advance_deposit_journal"])) == 1
+    assert routed["inhouse"] == [PAGES[1]]
+
+
+def test_dispatch_custom_route_and_missing_sections():
+    routes = [SectionRoute("notes", "Notes", ("Stop",))]
+    dispatch = dispatch_lines([["x", "Notes", "a", "Stop", "b"], ["c"]], routes)
+    assert dispatch.sections == {"notes": [["Notes", "a", "Stop"]]}
+    assert dispatch_lines([["nothing here"]]).sections["inhouse"] == []
@@ -0,0 +1,108 @@
+import fitz
+import pytest
+from night_audit_etl_pipeline.document import AuditDocument, build_section_index, pages_spec, TABLE_SECTIONS
+from night_audit_etl_pipeline.extractors import extract_shift_reconciliation
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        y = 72
+        for line in lines:
+            page.insert_text((72, y), line)
+            y += 14
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    data = make_pdf([
+        ["Business Date: 01/01/2025", "Shift Reconciliation Closeout", "101 Cash (CA) 500.00", "Grand Total"],
+        ["Summary by User Id / Shift Id", "101 user1 100.00 600.00 100.00 0.00", "Date/Time of Printing"],
+    ])
+    path = tmp_path / "Night Audit 2025-01-01.pdf"
+    path.write_bytes(data)
+    return path
+
+
+def test_audit_document_text_layers(sample_pdf):
+    doc = AuditDocument.from_path(str(sample_pdf))
+    assert doc.filename == "Night Audit 2025-01-01.pdf"
+    assert doc.page_count == 2
+    assert "Shift Reconciliation Closeout" in doc.page_texts[0]
+    assert doc.list_of_pages[1][0] == "Summary by User Id / Shift Id"
+    assert "101 Cash (CA) 500.00" in doc.full_text
+
+
+def test_audit_document_extracts_text_once(sample_pdf, monkeypatch):
+    doc = AuditDocument.from_path(str(sample_pdf))
+    doc.list_of_pages
+    monkeypatch.setattr("pdfplumber.open",
+                        lambda *a, **k: pytest.fail("pdfplumber reopened"))
+    shift_df, shift_cash_df = extract_shift_reconciliation(doc)
+    assert shift_df.loc[0, "total"] == 500.00
+    assert shift_cash_df.loc[0, "user_id"] == "user1"
+    assert doc.list_of_pages[0][0] == "Business Date: 01/01/2025"
+
+
+def test_in_memory_document_spills_only_for_camelot(tmp_path, monkeypatch):
+    data = make_pdf([["Hotel Journal Summary", "Cash (CA) 100.00 0.00 0.00 100.00"]])
+    monkeypatch.setattr("night_audit_etl_pipeline.document.TMPFS_DIR", str(tmp_path))
+    seen = []
+
+    def read_pdf(path, **kwargs):
+        with open(path, "rb") as f:
+            seen.append((path, f.read()))
+        return []
+
+    monkeypatch.setattr("camelot.read_pdf", read_pdf)
+    doc = AuditDocument("Night Audit 2025-01-01.pdf", data)
+    assert "Hotel Journal Summary" in doc.page_texts[0] and "Hotel Journal Summary" in doc.full_text
+    assert doc.camelot_tables == []
+
+    [(path, spilled)] = seen
+    assert path.startswith(str(tmp_path)) and spilled == data
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_build_section_index_continuation_pages():
+    page_texts = [
+        "Business Date: 01/01/2025\nA/R Aging\n...",
+        "Final Transaction Closeout\n...\nGross Room Revenue\n...",
+        "ROOM CHARGE (RM) 1,000.00",
+        "Revenue by Rate Code\nSRD 10",
+        "Hotel Journal Summary",
+    ]
+    index = build_section_index(page_texts)
+    assert index["A/R Aging"] == (1, 1)
+    assert index["Final Transaction Closeout"] == (2, 2)
+    assert index["Gross Room Revenue"] == (2, 3)
+    assert index["Revenue by Rate Code"] == (4, 4)
+    assert "No Show Report" not in index
+
+
+def test_pages_spec_collapses_ranges():
+    index = {"Gross Room Revenue": (2, 3), "Revenue by Rate Code": (4, 4), "Hotel Journal Summary": (9, 9)}
+    assert pages_spec(index, TABLE_SECTIONS) == "2-4,9"
+    assert pages_spec({}, TABLE_SECTIONS) is None
+
+
+def test_camelot_failure_is_not_retried(tmp_path, monkeypatch):
+    data = make_pdf([["Hotel Journal Summary", "Cash (CA) 100.00 0.00 0.00 100.00"]])
+    monkeypatch.setattr("night_audit_etl_pipeline.document.TMPFS_DIR", str(tmp_path))
+    calls = []
+
+    def read_pdf(path, **kwargs):
+        calls.append(path)
+        raise ValueError("unsupported layout")
+
+    monkeypatch.setattr("camelot.read_pdf", read_pdf)
+    doc = AuditDocument("Night Audit 2025-01-01.pdf", data)
+    for _ in range(3):
+        with pytest.raises(ValueError, match="unsupported layout"):
+            doc.camelot_tables
+    assert len(calls) == 1
+    assert doc.export_layers()["camelot_tables"] is None
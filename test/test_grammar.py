@@ -0,0 +1,61 @@
+import pytest
+from pandas.testing import assert_frame_equal
+from night_audit_etl_pipeline.grammar import (
+    SectionMachine, SectionSpec, Column, spec_frame, AR_AGING, TRANSACTION_CLOSEOUT, SECTION_MACHINE
+)
+from night_audit_etl_pipeline.helpers import clean_column_names, clean_numeric_column
+
+
+PAGES = [
+    [
+        "169773 Stray Row 1.00 1.00 1.00 1.00 1.00 1.00 1.00 1.00",
+        "A/R Aging",
+        "Account Name Current 30Days",
+        "169773 John Doe 525.00 325.00 225.66 0.00 0.00 0.00 1,075.66 5,000.00",
+        "200100 Acme  Corp Ltd (12.00) 0.00 0.00 0.00 0.00 0.00 (12.00) 0.00",
+        "Grand Total",
+        "Final Transaction Closeout",
+        "Cash 1,000.00 500.00 200.00 700.00 7,000.00 77,000.00",
+    ],
+    [
+        "Credit Card 2,000.00 1,000.00 300.00 1,300.00 13,000.00 133,000.00",
+    ],
+]
+
+
+def test_machine_runs_all_specs_in_one_pass():
+    rows = SECTION_MACHINE.run(PAGES)
+    assert [r[0] for r in rows["ar_aging"]] == ["169773", "200100"]
+    # Closeout is page scoped: the row after the page break is outside the section
+    assert [r[0] for r in rows["transaction_closeout"]] == ["Cash"]
+
+
+def test_typed_frame_matches_legacy_cleaning():
+    rows = SECTION_MACHINE.run(PAGES)["ar_aging"]
+    legacy = clean_column_names(
+        spec_frame(AR_AGING, rows, typed=False),
+        {"30days": "days_30", "60days": "days_60", "90days": "days_90", "120days": "days_120", "limit": "limit_amount"})
+    legacy = clean_numeric_column(legacy, ['current', 'days_30', 'days_60', 'days_90', 'days_120', 'credits', 'balance', 'limit_amount'])
+    typed = spec_frame(AR_AGING, rows)
+    assert_frame_equal(typed, legacy)
+    assert typed.loc[1, "current"] == -12.0
+
+    closeout = spec_frame(TRANSACTION_CLOSEOUT, SECTION_MACHINE.run(PAGES)["transaction_closeout"])
+    assert closeout.columns.tolist()[:3] == ["description", "opening_balance", "todays_total"]
+    assert closeout.loc[0, "ytd_totals"] == 77000.0
+
+
+def test_new_spec_and_column_validation():
+    notes = SectionSpec(
+        name="deposits", title="Deposits", table="deposits", start=("Deposits",), stops=("End",),
+        row=r"(?P<posted>\d{1,2}/\d{1,2}/\d{4})\s+(?P<amount>\S+)$",
+        columns=(Column("posted", "Posted", "date"), Column("amount", "Amount", "amount")),
+    )
+    rows = SectionMachine([notes]).run([["Deposits", "01/02/2025 $1,250.00", "End", "01/03/2025 9.00"]])
+    df = spec_frame(notes, rows["deposits"])
+    assert df["amount"].tolist() == [1250.0]
+    assert str(df.loc[0, "posted"]) == "2025-01-02"
+    assert spec_frame(notes, []).empty
+
+    with pytest.raises(ValueError):
+        SectionMachine([notes._replace(columns=notes.columns[:1])])
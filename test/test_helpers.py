@@ -1,4 +1,6 @@
 import pandas as pd
+from datetime import date
+from night_audit_etl_pipeline import helpers
 from night_audit_etl_pipeline.helpers import (
     clean_column_names,
     clean_numeric_column,
@@ -6,7 +8,9 @@ from night_audit_etl_pipeline.helpers import (
     safe_float,
     convert_date,
     is_strictly_numeric,
-    extract_amount
+    extract_amount,
+    safe_float_column,
+    convert_date_column
 )
 
 
@@ -78,3 +82,37 @@ def test_extract_amount():
     assert extract_amount("1,000.00") == 1000.00
     assert extract_amount("(1,000.00)") == -1000.00
     assert extract_amount("500") == 500.00
+
+
+def test_safe_float_column_matches_safe_float():
+    values = pd.Series(["1,234.56", "(1,000.00)", " 99.99 ", "", None, float("nan"), "abc", "1e3", "--5", "-", 3.5])
+    result = safe_float_column(values)
+    expected = values.apply(safe_float)
+    assert result.dtype == expected.dtype == "float64"
+    pd.testing.assert_series_equal(result, expected)
+    assert safe_float_column(pd.Series(["$1,250.00"])).tolist() == [1250.0]
+    assert safe_float_column(pd.Series([None, ""], dtype=object)).tolist() == [None, None]
+
+
+def test_convert_date_column_matches_convert_date():
+    values = pd.Series(["01/02/2025", "1/2/25", "01-02-2025", "", None, "13/45/2020", "01/02/0001", "garbage", 5])
+    result = convert_date_column(values)
+    assert result.dtype == object
+    assert result.tolist() == values.apply(convert_date).tolist()
+
+
+def test_parse_caches_count_hits():
+    helpers.reset_parse_caches()
+    assert convert_date("01/02/25") == convert_date("01/02/25") == date(2025, 1, 2)
+    assert convert_date("01/02/2025") == date(2025, 1, 2)
+    assert safe_float("(5.00)") == safe_float("(5.00)") == -5.0
+    assert safe_float(None) is None
+    assert helpers.parse_cache_stats() == {"date_hits": 1, "date_misses": 2, "amount_hits": 1, "amount_misses": 1}
+
+
+def test_parse_cache_is_bounded(monkeypatch):
+    helpers.reset_parse_caches()
+    monkeypatch.setattr(helpers, "PARSE_CACHE_SIZE", 2)
+    for day in range(1, 6):
+        convert_date(f"01/0{day}/2025")
+    assert list(helpers._date_cache) == ["01/04/2025", "01/05/2025"]
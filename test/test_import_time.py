@@ -0,0 +1,40 @@
+import os
+import sys
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only; a worker that never opens a PDF never pays for them
+LAZY_MODULES = {"camelot", "cv2", "fitz", "pymupdf", "pdfplumber", "tqdm"}
+
+# `python -X importtime -c "import night_audit_etl_pipeline.processor"` baseline:
+# ~0.6s, nearly all of it pandas (~0.4s) and SQLAlchemy (~0.15s). The budget is
+# loose on purpose; the module check above is what catches a stray eager import.
+IMPORT_BUDGET_SECONDS = 3.0
+
+
+def import_profile(module, tmp_path):
+    """{module: cumulative microseconds} from -X importtime for a fresh interpreter importing `module`."""
+    env = dict(os.environ, NIGHT_AUDIT_CONFIG=str(tmp_path / "missing.json"))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def test_processor_import_is_lazy(tmp_path):
+    # The config path doesn't exist: importing must not read it
+    profile = import_profile("night_audit_etl_pipeline.processor", tmp_path)
+    assert "night_audit_etl_pipeline.processor" in profile
+    assert LAZY_MODULES.isdisjoint(profile), LAZY_MODULES & set(profile)
+    assert profile["night_audit_etl_pipeline.processor"] / 1e6 < IMPORT_BUDGET_SECONDS
+
+
+def test_daemon_import_is_lazy(tmp_path):
+    profile = import_profile("night_audit_etl_pipeline.daemon", tmp_path)
+    assert LAZY_MODULES.isdisjoint(profile), LAZY_MODULES & set(profile)
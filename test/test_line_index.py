@@ -0,0 +1,30 @@
+from pandas.testing import assert_frame_equal
+from night_audit_etl_pipeline.line_index import LineIndex
+from night_audit_etl_pipeline.extractors import extract_ledger_activity_report_with_metadata, extract_section_text
+
+
+TEXT = "Header\r\n  Ledger Activity Report \n\nGuest\nOpening Balance 100.00\x0cDebits 25.00\nLedger Summary\ntail\n"
+
+
+def test_lines_match_slice_and_splitlines():
+    index = LineIndex(TEXT)
+    assert len(index) == len(TEXT.splitlines())
+    for start in range(len(TEXT) + 1):
+        for end in (None, start + 7, len(TEXT) - 3):
+            expected = [l.strip() for l in TEXT[start:end].splitlines() if l.strip()]
+            assert list(index.lines(start, end)) == expected
+
+
+def test_page_offsets():
+    index = LineIndex.from_pages(["Page one\nsecond line", "", "Page three"])
+    assert index.text == "Page one\nsecond line\n\nPage three"
+    assert list(index.page_starts) == [0, 2, 3]
+    assert index.page_of_line(index.line_at(index.find("Page three"))) == 2
+
+
+def test_extractors_accept_line_index():
+    text = ("Ledger Activity Report\nBusiness Date: 01/01/2025\nUser: auditor\nGuest\n"
+            "Opening Balance 1,000.00\nCredits (50.00)\nTotal Balance Forward 950.00\nLedger Summary")
+    assert_frame_equal(extract_ledger_activity_report_with_metadata(LineIndex(text)),
+                       extract_ledger_activity_report_with_metadata(text))
+    assert extract_section_text(LineIndex(text), "Guest", "Ledger Summary") == extract_section_text(text, "Guest", "Ledger Summary")
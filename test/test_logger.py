@@ -0,0 +1,43 @@
+import json
+import logging
+from multiprocessing import Process
+from night_audit_etl_pipeline.logger import JsonLinesFormatter, init_worker_logging, setup_logger, start_log_listener
+
+
+def log_from_worker(log_queue):
+    logger = init_worker_logging(log_queue, "test_queue_logging")
+    logger.info("hello from worker")
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("worker failed")
+
+
+def test_worker_records_reach_parent_handlers(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_FILE_PATH", str(tmp_path / "logs" / "run.log"))
+    logger = setup_logger("test_queue_logging", json_lines=True)
+    log_queue, listener = start_log_listener("test_queue_logging")
+    try:
+        worker = Process(target=log_from_worker, args=(log_queue,))
+        worker.start()
+        worker.join()
+    finally:
+        listener.stop()
+        for handler in list(logger.handlers):
+            handler.close()
+            logger.removeHandler(handler)
+
+    text = (tmp_path / "logs" / "run.log").read_text()
+    assert "| INFO | hello from worker" in text
+    assert "ZeroDivisionError" in text
+    entries = [json.loads(line) for line in (tmp_path / "logs" / "run.jsonl").read_text().splitlines()]
+    assert [e["message"].splitlines()[0] for e in entries] == ["hello from worker", "worker failed"]
+    assert entries[0]["process"] != "MainProcess"
+
+
+def test_json_lines_formatter():
+    record = logging.LogRecord("night_audit_etl", logging.WARNING, __file__, 1, "⚠️ %s rows", (3,), None)
+    entry = json.loads(JsonLinesFormatter().format(record))
+    assert entry["level"] == "WARNING"
+    assert entry["message"] == "⚠️ 3 rows"
+    assert "exception" not in entry
@@ -0,0 +1,77 @@
+import csv
+import json
+import pandas as pd
+from night_audit_etl_pipeline.metrics import aggregate, drain, frame_bytes, timed, write_run_report
+
+
+def test_timed_records_and_drains():
+    drain()
+    with timed("extract", "In-House List") as t:
+        t["rows"] = 3
+
+    @timed("camelot")
+    def parse_tables():
+        return "tables"
+
+    assert parse_tables() == "tables"
+    records = drain()
+    assert [(r["stage"], r["section"], r["rows"]) for r in records] == [("extract", "In-House List", 3), ("camelot", None, 0)]
+    assert all(r["wall_seconds"] >= 0 and r["cpu_seconds"] >= 0 for r in records)
+    assert drain() == []
+
+
+def test_timed_records_failed_blocks():
+    drain()
+    try:
+        with timed("write", "A/R Aging"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert [r["stage"] for r in drain()] == ["write"]
+
+
+def record(stage, section, wall, rows=0, nbytes=0):
+    return {"stage": stage, "section": section, "wall_seconds": wall, "cpu_seconds": wall / 2, "rows": rows, "bytes": nbytes}
+
+
+RESULTS = [
+    {"filename": "a.pdf", "status": "SUCCESS", "rows": 5, "seconds": 2.0,
+     "metrics": [record("camelot", None, 1.5), record("write", "In-House List", 0.25, 5, 400)]},
+    {"filename": "b.pdf", "status": "FAIL", "rows": 2, "seconds": 1.0,
+     "metrics": [record("camelot", None, 0.5), record("write", "In-House List", 0.25, 2, 100)]},
+    {"filename": "c.pdf", "status": "SKIPPED", "rows": 0},
+]
+
+
+def test_aggregate_across_files():
+    stages = aggregate(RESULTS)
+    assert [(s["stage"], s["section"]) for s in stages] == [("camelot", ""), ("write", "In-House List")]
+    assert stages[0]["calls"] == 2
+    assert stages[0]["wall_seconds"] == 2.0
+    assert stages[0]["max_wall_seconds"] == 1.5
+    assert (stages[1]["rows"], stages[1]["bytes"]) == (7, 500)
+
+
+def test_write_run_report(tmp_path):
+    assert write_run_report(RESULTS, {}) is None
+
+    json_path, csv_path, prom_path = write_run_report(RESULTS, {"metrics": {"enabled": True, "dir": str(tmp_path)}}, 3.5)
+    report = json.load(open(json_path))
+    assert report["wall_seconds"] == 3.5
+    assert report["stages"][0]["stage"] == "camelot"
+    assert [f["filename"] for f in report["files"]] == ["a.pdf", "b.pdf", "c.pdf"]
+
+    rows = list(csv.DictReader(open(csv_path)))
+    assert len(rows) == 4
+    assert rows[1]["filename"] == "a.pdf" and rows[1]["section"] == "In-House List" and rows[1]["rows"] == "5"
+
+    prom = open(prom_path).read()
+    assert 'night_audit_stage_wall_seconds{stage="write",section="In-House List"} 0.5' in prom
+    assert 'night_audit_files{status="SKIPPED"} 1' in prom
+    assert "night_audit_run_wall_seconds 3.5" in prom
+
+
+def test_frame_bytes_counts_strings():
+    small = pd.DataFrame({"name": ["a"] * 10})
+    large = pd.DataFrame({"name": ["a" * 1000] * 10})
+    assert frame_bytes(large) > frame_bytes(small) > 0
@@ -0,0 +1,58 @@
+import os
+import pandas as pd
+from night_audit_etl_pipeline.document import AuditDocument
+from night_audit_etl_pipeline.page_cache import PageCache, main
+
+
+class MockCamelotTable:
+    def __init__(self, data):
+        self.df = pd.DataFrame(data)
+
+
+def make_doc(data=b"%PDF-1.4 sample"):
+    doc = AuditDocument("Night Audit 2025-01-01.pdf", data)
+    doc._page_texts = ["Business Date: 01/01/2025\nA/R Aging", "Revenue by Rate Code"]
+    doc._plumber_texts = ["Business Date: 01/01/2025\nA/R Aging", "Revenue by Rate Code"]
+    doc._camelot_tables = [MockCamelotTable([["Rate Code", "Room Nights"], ["SRD", "10"]])]
+    return doc
+
+
+def test_page_cache_round_trip(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.store(make_doc())
+
+    warm = AuditDocument("Night Audit 2025-01-01.pdf", b"%PDF-1.4 sample")
+    assert cache.load(warm)
+    assert warm.page_texts[1] == "Revenue by Rate Code"
+    assert warm.list_of_pages[0] == ["Business Date: 01/01/2025", "A/R Aging"]
+    assert warm.camelot_tables[0].df.iloc[1].tolist() == ["SRD", "10"]
+    assert warm.cached_layers == {"page_texts", "plumber_texts", "camelot_tables"}
+
+
+def test_page_cache_miss_on_different_bytes(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.store(make_doc())
+    assert not cache.load(AuditDocument("other.pdf", b"%PDF-1.4 other"))
+
+
+def test_page_cache_evicts_least_recently_used(tmp_path):
+    cache = PageCache(str(tmp_path))
+    for i in range(3):
+        cache.store(make_doc(f"pdf {i}".encode()))
+    entries = cache.entries()
+    for age, (path, _, _) in enumerate(entries):
+        os.utime(path, (1000 + age, 1000 + age))
+    cache.load(AuditDocument("a.pdf", b"pdf 0"))  # touch the oldest
+
+    size = entries[0][1]
+    assert cache.evict(max_bytes=2 * size) == 1
+    assert cache.load(AuditDocument("a.pdf", b"pdf 0"))
+    assert len(cache.entries()) == 2
+
+
+def test_page_cache_cli_purge(tmp_path, capsys):
+    PageCache(str(tmp_path)).store(make_doc())
+    main(["--dir", str(tmp_path), "stats"])
+    assert capsys.readouterr().out.startswith("1 entries")
+    main(["--dir", str(tmp_path), "purge"])
+    assert PageCache(str(tmp_path)).entries() == []
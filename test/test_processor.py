@@ -0,0 +1,65 @@
+import time
+import fitz
+from multiprocessing import Process, Queue
+import pandas as pd
+from night_audit_etl_pipeline import metrics, processor
+from night_audit_etl_pipeline.processor import (
+    fetch_processed, process_pdf, put_for_writers, relay_to_writers, stop_writers, tracker_engine
+)
+from night_audit_etl_pipeline.sinks import NullSink
+
+
+def test_tracker_engine_ensures_the_index_once_and_serves_every_lookup(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'etl.db'}"
+    with tracker_engine(url, {}) as engine:
+        pd.DataFrame({"source_file": ["a.pdf", "b.pdf"], "status": ["SUCCESS", "FAILURE"]}).to_sql(
+            "file_tracker", engine, index=False)
+
+    ensured = []
+    monkeypatch.setattr(processor, "ensure_file_tracker_index", ensured.append)
+    with tracker_engine(url, {}) as engine:
+        assert fetch_processed(engine, ["a.pdf", "b.pdf"]) == {"a.pdf"}
+        assert fetch_processed(engine, ["c.pdf"]) == set()
+    assert ensured == [engine]
+
+
+def test_no_tracker_engine_for_local_sinks():
+    with tracker_engine("mysql+pymysql://unused", {"sink": {"type": "null"}}) as engine:
+        assert engine is None
+        assert fetch_processed(engine, ["a.pdf"]) == set()
+
+
+def test_relay_fails_the_file_once_no_writer_is_left(tmp_path, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(processor, "update_file_tracker", lambda engine, *row: recorded.append(row))
+    write_queue = Queue(maxsize=1)
+    write_queue.put(("queued.pdf", [], "SUCCESS", 0, None))
+    writer = Process(target=int)
+    writer.start()
+    writer.join()
+
+    assert not put_for_writers(write_queue, [writer], None, timeout=0.1)
+    relay_to_writers(write_queue, [writer], f"sqlite:///{tmp_path / 'etl.db'}")(("a.pdf", [], "SUCCESS", 1, None))
+    stop_writers(write_queue, [writer])
+    assert recorded == [("a.pdf", "FAILURE", None, "No writer process left to load it")]
+
+
+def test_section_metrics_cover_tax_exempt_and_name_buffered_writes(tmp_path, monkeypatch):
+    extract_tax_exempt = processor.extract_tax_exempt
+    monkeypatch.setattr(processor, "extract_tax_exempt", lambda texts: time.sleep(0.05) or extract_tax_exempt(texts))
+    pdf = fitz.open()
+    page = pdf.new_page()
+    for y, line in enumerate(["Business Date: 01/02/2025   Property Code: P001   User: auditor", "A/R Aging",
+                              "169773 John Doe 525.00 325.00 225.66 0.00 0.00 0.00 1,075.66 5,000.00", "Grand Total"]):
+        page.insert_text((36, 72 + 11 * y), line, fontsize=8)
+    path = tmp_path / "Night Audit P001.pdf"
+    pdf.save(str(path))
+    pdf.close()
+
+    metrics.drain()
+    process_pdf(str(path), path.name, NullSink())
+    records = metrics.drain()
+    stages = {(m["stage"], m["section"]) for m in records}
+    assert sum(m["wall_seconds"] for m in records if (m["stage"], m["section"]) == ("extract", "Tax Exempt")) >= 0.05
+    assert ("enqueue", "A/R Aging") in stages
+    assert not [s for s in stages if s[0] == "write"]
@@ -0,0 +1,38 @@
+import fitz
+from night_audit_etl_pipeline.scheduler import lpt_makespan, plan_schedule, makespan_report
+
+
+def write_pdf(path, num_pages):
+    doc = fitz.open()
+    for i in range(num_pages):
+        doc.new_page().insert_text((72, 72), f"Page {i + 1}")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_lpt_makespan():
+    assert lpt_makespan([5, 4, 3, 3, 2], 2) == 9
+    assert lpt_makespan([10, 1, 1], 3) == 10
+    assert lpt_makespan([], 4) == 0
+
+
+def test_plan_schedule_largest_first(tmp_path):
+    for name, pages in [("a.pdf", 2), ("b.pdf", 30), ("c.pdf", 8)]:
+        write_pdf(tmp_path / name, pages)
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+
+    plan = plan_schedule(str(tmp_path), ["a.pdf", "b.pdf", "broken.pdf", "c.pdf"])
+    assert [p.filename for p in plan] == ["b.pdf", "c.pdf", "a.pdf", "broken.pdf"]
+    assert plan[0].pages == 30
+    assert plan[-1].pages is None
+
+    by_name = plan_schedule(str(tmp_path), ["a.pdf", "b.pdf"], {"schedule": {"order": "name"}})
+    assert [p.filename for p in by_name] == ["a.pdf", "b.pdf"]
+
+
+def test_makespan_report(tmp_path):
+    write_pdf(tmp_path / "a.pdf", 4)
+    plan = plan_schedule(str(tmp_path), ["a.pdf"], {"schedule": {"seconds_per_page": 1, "seconds_per_mb": 0}})
+    report = makespan_report(plan, [{"filename": "a.pdf", "seconds": 3.0}], 2, 3.5)
+    assert report["projected_seconds"] == 4
+    assert report["lower_bound_seconds"] == 3.0
@@ -0,0 +1,77 @@
+import pandas as pd
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.types import Date, Float
+from night_audit_etl_pipeline.db_utils import insert_dataframe
+from night_audit_etl_pipeline.extractors import extract_advance_deposit_journal
+from night_audit_etl_pipeline.schemas import TABLE_SCHEMAS, apply_schema, column_kinds, sql_dtypes
+
+
+def test_apply_schema_casts_registry_columns():
+    df = pd.DataFrame({
+        "market": ["CORP", "CORP", "LEIS"],
+        "rate": ["1,000.00", "(5.00)", ""],
+        "arrive": [date(2025, 1, 1), None, date(2025, 1, 3)],
+        "room": ["101", "102", "103"],
+        "source_file": "a.pdf",
+        "load_timestamp": datetime(2025, 1, 4, 3, 0),
+    })
+    apply_schema(df, "inhouse_list_data")
+
+    assert df["market"].dtype == "category" and df["source_file"].dtype == "category"
+    assert df["rate"].dtype == "float64" and df["rate"].iloc[1] == -5.0 and pd.isna(df["rate"].iloc[2])
+    assert df["arrive"].dtype == "datetime64[ns]" and pd.isna(df["arrive"].iloc[1])
+    assert df["room"].dtype == object
+
+
+def test_apply_schema_keeps_columns_that_would_lose_values():
+    df = pd.DataFrame({"posting_date": ["2025-01-01", "not a date"], "total": ["1.00", "n/a"]})
+    apply_schema(df, "advance_deposit_journal")
+    assert df["posting_date"].tolist() == ["2025-01-01", "not a date"]
+    assert df["total"].tolist() == ["1.00", "n/a"]
+
+
+def test_counts_are_downcast_and_money_is_not():
+    df = pd.DataFrame({"room_nights": [12.0], "room_revenue": [1234567.89]})
+    apply_schema(df, "revenue_by_rate_code")
+    assert df["room_nights"].dtype == "float32"
+    assert df["room_revenue"].iloc[0] == 1234567.89
+
+
+def test_grammar_specs_and_sql_dtypes():
+    assert column_kinds("ar_aging")["balance"] == "amount"
+    assert "transaction_closeout" in TABLE_SCHEMAS
+    dtypes = sql_dtypes("no_show_report", ["arrival_date", "rate", "unknown_column"])
+    assert set(dtypes) == {"arrival_date", "rate"}
+    assert isinstance(dtypes["arrival_date"], Date) and isinstance(dtypes["rate"], Float)
+
+
+def test_date_strings_use_the_report_formats(recwarn):
+    df = pd.DataFrame({
+        "posting_date": ["02/01/2025", "12/31/24", None, ""],
+        "load_timestamp": [datetime(2025, 2, 2, 3, 0)] * 4,
+    })
+    apply_schema(df, "advance_deposit_journal")
+    assert df["posting_date"].dtype == "datetime64[ns]"
+    assert df["posting_date"].iloc[0] == pd.Timestamp(2025, 2, 1)
+    assert df["posting_date"].iloc[1] == pd.Timestamp(2024, 12, 31)
+    assert df["posting_date"].iloc[2:].isna().all()
+    assert not [w for w in recwarn if "infer format" in str(w.message)]
+
+
+def test_extracted_iso_dates_load_as_dates():
+    df = extract_advance_deposit_journal([[
+        "Advance Deposit Journal",
+        "Transaction Code: DEPOSIT",
+        "01/02/25 user1 101 123456 John Doe 100.00",
+        "Advance Deposit Ledger",
+    ]])
+    df["source_file"] = "a.pdf"
+    df["load_timestamp"] = datetime(2025, 1, 3, 3, 0)
+    apply_schema(df, "advance_deposit_journal")
+    assert df["posting_date"].dtype == "datetime64[ns]"
+    assert df["posting_date"].iloc[0] == pd.Timestamp(2025, 1, 2)
+
+    engine = create_engine("sqlite://")
+    insert_dataframe(engine, df, "advance_deposit_journal", "a.pdf")
+    assert pd.read_sql("SELECT posting_date FROM advance_deposit_journal", engine).loc[0, "posting_date"].startswith("2025-01-02")
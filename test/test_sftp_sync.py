@@ -0,0 +1,231 @@
+import os
+import hashlib
+from types import SimpleNamespace
+from SFTP_to_local import sftp_sync
+from SFTP_to_local.sftp_sync import (
+    SFTPConnectionPool, SyncManifest, list_remote, part_path_for, sync_directory, sync_file, RemoteFile
+)
+
+
+class FakeSFTP:
+    """Stand-in for paramiko.SFTPClient serving a local directory."""
+
+    def __init__(self, root, fail_after=None):
+        self.root = root
+        self.fail_after = fail_after  # {filename: bytes to serve before the connection "drops"}
+        self.closed = False
+
+    def listdir_attr(self, path):
+        entries = []
+        for name in sorted(os.listdir(path)):
+            st = os.stat(os.path.join(path, name))
+            entries.append(SimpleNamespace(filename=name, st_size=st.st_size, st_mtime=st.st_mtime, st_mode=st.st_mode))
+        return entries
+
+    def open(self, path, mode="rb"):
+        return FakeFile(path, (self.fail_after or {}).pop(os.path.basename(path), None))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFile:
+    def __init__(self, path, fail_after):
+        self.f = open(path, "rb")
+        self.fail_after = fail_after
+        self.served = 0
+
+    def seek(self, offset):
+        self.f.seek(offset)
+
+    def prefetch(self, file_size=None):
+        pass
+
+    def read(self, size):
+        if self.fail_after is not None and self.served >= self.fail_after:
+            raise EOFError("connection dropped")
+        if self.fail_after is not None:
+            size = min(size, self.fail_after - self.served)
+        data = self.f.read(size)
+        self.served += len(data)
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.f.close()
+
+
+def make_remote(tmp_path, files):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    for name, data in files.items():
+        (remote / name).write_bytes(data)
+    (remote / "notes.txt").write_text("ignored")
+    return str(remote)
+
+
+def test_sync_downloads_in_parallel_and_skips_current_files(tmp_path):
+    remote_dir = make_remote(tmp_path, {f"audit {i}.pdf": os.urandom(1000 + i) for i in range(6)})
+    local_dir = str(tmp_path / "local")
+    pool = SFTPConnectionPool(lambda: FakeSFTP(remote_dir), size=3)
+    results = sync_directory(pool, remote_dir, local_dir, workers=3)
+    assert sorted(r.status for r in results) == ["DOWNLOADED"] * 6
+    assert pool.stats["connects"] <= 3
+    for i in range(6):
+        name = f"audit {i}.pdf"
+        assert open(os.path.join(local_dir, name), "rb").read() == open(os.path.join(remote_dir, name), "rb").read()
+        assert int(os.stat(os.path.join(local_dir, name)).st_mtime) == int(os.stat(os.path.join(remote_dir, name)).st_mtime)
+    assert not [f for f in os.listdir(local_dir) if f.endswith(".part")]
+
+    again = sync_directory(pool, remote_dir, local_dir, workers=3)
+    assert {r.status for r in again} == {"SKIPPED"}
+    pool.close()
+
+
+def test_truncated_local_copy_is_downloaded_again(tmp_path):
+    remote_dir = make_remote(tmp_path, {"a.pdf": b"x" * 5000})
+    local_dir = tmp_path / "local"
+    local_dir.mkdir()
+    (local_dir / "a.pdf").write_bytes(b"x" * 100)
+
+    pool = SFTPConnectionPool(lambda: FakeSFTP(remote_dir))
+    [result] = sync_directory(pool, remote_dir, str(local_dir))
+    assert result.status == "DOWNLOADED"
+    assert (local_dir / "a.pdf").read_bytes() == b"x" * 5000
+
+
+def test_dropped_transfer_resumes_from_part_file(tmp_path):
+    data = os.urandom(10000)
+    remote_dir = make_remote(tmp_path, {"a.pdf": data})
+    local_dir = str(tmp_path / "local")
+    os.makedirs(local_dir)
+    sessions = []
+
+    def connect():
+        sessions.append(FakeSFTP(remote_dir, fail_after={"a.pdf": 4000} if not sessions else None))
+        return sessions[-1]
+
+    pool = SFTPConnectionPool(connect, size=1)
+    [remote] = list_remote(FakeSFTP(remote_dir), remote_dir)
+    result = sync_file(pool, remote_dir, remote, local_dir)
+
+    assert result.status == "RESUMED" and result.bytes == 6000
+    assert open(os.path.join(local_dir, "a.pdf"), "rb").read() == data
+    # The dropped session was closed and replaced, not handed out again
+    assert sessions[0].closed and pool.stats["discarded"] == 1
+
+
+def test_part_file_of_an_older_remote_version_is_not_resumed(tmp_path):
+    remote_dir = make_remote(tmp_path, {"a.pdf": b"new" * 100})
+    local_dir = tmp_path / "local"
+    local_dir.mkdir()
+    [remote] = list_remote(FakeSFTP(remote_dir), remote_dir)
+    stale = RemoteFile("a.pdf", remote.size, remote.mtime - 60)
+    with open(part_path_for(str(local_dir), stale), "wb") as f:
+        f.write(b"old" * 50)
+
+    result = sync_file(SFTPConnectionPool(lambda: FakeSFTP(remote_dir)), remote_dir, remote, str(local_dir))
+    assert result.status == "DOWNLOADED"
+    assert (local_dir / "a.pdf").read_bytes() == b"new" * 100
+    assert os.listdir(local_dir) == ["a.pdf"]
+
+
+def test_manifest_limits_a_run_to_new_and_changed_files(tmp_path):
+    remote_dir = make_remote(tmp_path, {"a.pdf": b"a" * 100, "b.pdf": b"b" * 100})
+    local_dir = str(tmp_path / "local")
+    os.makedirs(local_dir)
+    pool = SFTPConnectionPool(lambda: FakeSFTP(remote_dir))
+    manifest = SyncManifest.for_directory(local_dir)
+
+    first = sync_directory(pool, remote_dir, local_dir, manifest=manifest)
+    assert sorted(r.name for r in first) == ["a.pdf", "b.pdf"]
+    assert manifest.checksum("a.pdf") == hashlib.sha256(b"a" * 100).hexdigest()
+
+    assert sync_directory(pool, remote_dir, local_dir, manifest=manifest) == []
+
+    with open(os.path.join(remote_dir, "b.pdf"), "wb") as f:
+        f.write(b"B" * 150)
+    with open(os.path.join(remote_dir, "c.pdf"), "wb") as f:
+        f.write(b"c" * 10)
+    third = sync_directory(pool, remote_dir, local_dir, manifest=manifest)
+    assert sorted((r.name, r.status) for r in third) == [("b.pdf", "DOWNLOADED"), ("c.pdf", "DOWNLOADED")]
+    assert manifest.checksum("b.pdf") == hashlib.sha256(b"B" * 150).hexdigest()
+    manifest.close()
+
+
+def test_manifest_bootstraps_from_existing_downloads(tmp_path):
+    remote_dir = make_remote(tmp_path, {"a.pdf": b"a" * 100})
+    local_dir = str(tmp_path / "local")
+    pool = SFTPConnectionPool(lambda: FakeSFTP(remote_dir))
+    sync_directory(pool, remote_dir, local_dir)
+
+    manifest = SyncManifest.for_directory(local_dir)
+    [result] = sync_directory(pool, remote_dir, local_dir, manifest=manifest)
+    assert result.status == "SKIPPED"
+    assert manifest.checksum("a.pdf") == hashlib.sha256(b"a" * 100).hexdigest()
+    manifest.close()
+
+
+def test_current_files_are_not_reread_without_a_manifest(tmp_path, monkeypatch):
+    remote_dir = make_remote(tmp_path, {"a.pdf": b"a" * 100})
+    local_dir = str(tmp_path / "local")
+    pool = SFTPConnectionPool(lambda: FakeSFTP(remote_dir))
+    sync_directory(pool, remote_dir, local_dir)
+
+    hashed = []
+    monkeypatch.setattr(sftp_sync, "file_sha256", hashed.append)
+    [result] = sync_directory(pool, remote_dir, local_dir)
+    assert result.status == "SKIPPED" and result.sha256 is None
+    assert hashed == []
+
+
+def test_on_file_sees_each_file_as_it_finishes(tmp_path):
+    remote_dir = make_remote(tmp_path, {f"{i}.pdf": b"x" * (100 * (i + 1)) for i in range(4)})
+    local_dir = str(tmp_path / "local")
+    seen = []
+
+    def on_file(result):
+        # Called from the transfer thread, after the file is complete on disk
+        assert os.path.getsize(os.path.join(local_dir, result.name)) == 100 * (int(result.name[0]) + 1)
+        seen.append(result.name)
+
+    sync_directory(SFTPConnectionPool(lambda: FakeSFTP(remote_dir), size=2), remote_dir, local_dir,
+                   workers=2, on_file=on_file)
+    assert sorted(seen) == ["0.pdf", "1.pdf", "2.pdf", "3.pdf"]
+
+
+def test_small_files_are_fetched_into_memory(tmp_path):
+    remote_dir = make_remote(tmp_path, {"small.pdf": b"s" * 100, "big.pdf": b"b" * 5000})
+    local_dir = str(tmp_path / "local")
+    fetched = {}
+
+    results = sync_directory(SFTPConnectionPool(lambda: FakeSFTP(remote_dir)), remote_dir, local_dir,
+                             on_file=lambda r: fetched.update({r.name: r}), max_memory_bytes=1000)
+
+    assert fetched["small.pdf"].status == "FETCHED" and fetched["small.pdf"].data == b"s" * 100
+    assert fetched["big.pdf"].status == "DOWNLOADED" and fetched["big.pdf"].data is None
+    assert os.listdir(local_dir) == ["big.pdf"]
+    assert all(r.data is None for r in results)
+
+
+def test_fetched_files_stay_out_of_the_manifest_until_recorded(tmp_path):
+    remote_dir = make_remote(tmp_path, {"small.pdf": b"s" * 100})
+    local_dir = str(tmp_path / "local")
+    os.makedirs(local_dir)
+    pool = SFTPConnectionPool(lambda: FakeSFTP(remote_dir))
+    manifest = SyncManifest.for_directory(local_dir)
+    fetched = []
+
+    sync_directory(pool, remote_dir, local_dir, manifest=manifest, on_file=fetched.append, max_memory_bytes=1000)
+    assert manifest.checksum("small.pdf") is None
+
+    # Never loaded or written out (say the run died): the next run fetches it again
+    [again] = sync_directory(pool, remote_dir, local_dir, manifest=manifest, max_memory_bytes=1000)
+    assert again.status == "FETCHED"
+
+    # Once the consumer has it safe, it records the file and later runs skip it
+    manifest.record(fetched[0].remote, fetched[0].sha256)
+    assert sync_directory(pool, remote_dir, local_dir, manifest=manifest, max_memory_bytes=1000) == []
+    manifest.close()
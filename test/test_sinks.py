@@ -0,0 +1,110 @@
+import pytest
+import pandas as pd
+import pyarrow.parquet as pq
+from datetime import date, datetime
+from night_audit_etl_pipeline.sinks import NullSink, ParquetSink, local_sink, sink_type
+
+
+def parse_file(sink, filename):
+    with sink.file_scope():
+        with sink.section():
+            sink.write(pd.DataFrame({
+                "account": ["1", "2"],
+                "balance": [10.0, None],
+                "guest_name": [None, None],
+                "property_code": ["ABC", "ABC"],
+                "business_date": [date(2024, 5, 1), date(2024, 5, 1)],
+            }), "ar_aging", filename)
+        with pytest.raises(ValueError):
+            with sink.section():
+                sink.write(pd.DataFrame({"description": ["Cash"]}), "transaction_closeout", filename)
+                raise ValueError("bad closeout")
+        sink.record_file(filename, "PARTIAL", 2, "Failed sections: Transaction Closeout")
+
+
+def test_parquet_sink_partitions_by_property_and_business_date(tmp_path):
+    parse_file(ParquetSink(str(tmp_path)), "Night Audit ABC.pdf")
+
+    path = tmp_path / "ar_aging" / "property=ABC" / "business_date=2024-05-01" / "Night Audit ABC-0.parquet"
+    table = pq.read_table(path)
+    assert "property_code" not in table.column_names and "business_date" not in table.column_names
+    assert str(table.schema.field("guest_name").type) == "string"
+    assert table.to_pandas()["account"].tolist() == ["1", "2"]
+    assert not (tmp_path / "transaction_closeout").exists()
+
+    tracker = pq.read_table(tmp_path / "file_tracker" / "Night Audit ABC.parquet").to_pandas()
+    assert tracker.loc[0, "status"] == "PARTIAL" and tracker.loc[0, "rows_loaded"] == 2
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_parquet_sink_rewrites_a_reprocessed_file(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    parse_file(sink, "a.pdf")
+    parse_file(sink, "a.pdf")
+    assert len(list((tmp_path / "ar_aging").rglob("*.parquet"))) == 1
+
+
+def test_parquet_sink_without_partition_columns(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    with sink.file_scope():
+        sink.write(pd.DataFrame({"when": [datetime(2024, 5, 1, 3, 0)]}), "ledger_summary", "b.pdf")
+        sink.record_file("b.pdf", "SUCCESS", 1)
+    table = pq.read_table(tmp_path / "ledger_summary" / "property=unknown" / "business_date=unknown" / "b-0.parquet")
+    assert str(table.schema.field("when").type) == "timestamp[us]"
+
+
+def test_null_sink_and_sink_selection(tmp_path):
+    parse_file(NullSink(), "a.pdf")
+    assert sink_type({}) == "mysql"
+    assert isinstance(local_sink({"sink": {"type": "null"}}), NullSink)
+    assert local_sink({"sink": {"type": "parquet", "dir": str(tmp_path)}}).root == str(tmp_path)
+    with pytest.raises(ValueError):
+        sink_type({"sink": {"type": "csv"}})
+
+
+def test_parquet_sink_keeps_columns_apply_schema_left_alone(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    with sink.file_scope():
+        sink.write(pd.DataFrame({
+            "posting_date": ["01/02/25", "garbage"],
+            "total": [10.0, 20.0],
+            "property_code": ["ABC", "ABC"],
+        }), "advance_deposit_journal", "c.pdf")
+        sink.record_file("c.pdf", "SUCCESS", 2)
+    table = pq.read_table(tmp_path / "advance_deposit_journal" / "property=ABC" / "business_date=unknown" / "c-0.parquet")
+    assert str(table.schema.field("posting_date").type) == "string"
+    assert str(table.schema.field("total").type) == "double"
+    assert table.to_pandas()["posting_date"].tolist() == ["01/02/25", "garbage"]
+
+
+def test_parquet_sink_rerun_with_fewer_frames_removes_stale_files(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+
+    def load(frames):
+        with sink.file_scope():
+            for table, business_date in frames:
+                sink.write(pd.DataFrame({"account": ["1"], "property_code": ["ABC"], "business_date": [business_date]}),
+                           table, "a.pdf")
+            sink.record_file("a.pdf", "SUCCESS", len(frames))
+
+    load([("ledger_summary", date(2024, 5, 1)), ("ar_aging", date(2024, 5, 1)), ("ar_aging", date(2024, 5, 2))])
+    (tmp_path / "ar_aging" / "property=ABC" / "business_date=2024-05-01" / "a-1-0.parquet").write_bytes(b"other pdf")
+    load([("ar_aging", date(2024, 5, 2))])
+
+    remaining = sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob("*.parquet") if "file_tracker" not in str(p))
+    assert remaining == [
+        "ar_aging/property=ABC/business_date=2024-05-01/a-1-0.parquet",
+        "ar_aging/property=ABC/business_date=2024-05-02/a-0.parquet",
+    ]
+
+
+def test_parquet_sink_failed_rerun_keeps_the_last_good_files(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    with sink.file_scope():
+        sink.write(pd.DataFrame({"account": ["1"], "property_code": ["ABC"]}), "ar_aging", "a.pdf")
+        sink.record_file("a.pdf", "SUCCESS", 1)
+    sink.record_file("a.pdf", "TIMEOUT", None, "Timed out after 900s")
+
+    assert [p.name for p in (tmp_path / "ar_aging").rglob("*.parquet")] == ["a-0.parquet"]
+    tracker = pq.read_table(tmp_path / "file_tracker" / "a.parquet").to_pandas()
+    assert tracker.loc[0, "status"] == "TIMEOUT"
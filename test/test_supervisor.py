@@ -0,0 +1,94 @@
+import os
+import time
+import logging
+import pytest
+from night_audit_etl_pipeline.supervisor import ParentChannel, SupervisedPool
+
+
+def square(x):
+    return x * x
+
+
+def worker_pid(_):
+    return os.getpid()
+
+
+def slow_or_fast(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def crash(_):
+    os._exit(3)
+
+
+def fail(_):
+    raise ValueError("bad pdf")
+
+
+def test_imap_unordered_results():
+    with SupervisedPool(2) as pool:
+        assert sorted(pool.imap_unordered(square, range(6))) == [0, 1, 4, 9, 16, 25]
+
+
+def test_workers_recycled_after_maxtasksperchild():
+    with SupervisedPool(1, maxtasksperchild=2) as pool:
+        pids = list(pool.imap_unordered(worker_pid, range(5)))
+        assert pool.stats["recycled"] == 2
+    assert len(set(pids)) == 3
+
+
+def test_timeout_kills_worker_and_calls_hook():
+    timed_out = []
+    on_timeout = lambda args, elapsed: timed_out.append(args) or "TIMEOUT"
+    with SupervisedPool(1, task_timeout=0.5, on_timeout=on_timeout) as pool:
+        results = list(pool.imap_unordered(slow_or_fast, [30, 0.01]))
+        assert pool.stats["timeouts"] == 1
+    assert results == ["TIMEOUT", 0.01]
+    assert timed_out == [30]
+
+
+def test_dead_worker_is_replaced():
+    on_death = lambda args, exitcode: ("DIED", exitcode)
+    with SupervisedPool(1, on_worker_death=on_death) as pool:
+        pool.submit(crash, None)
+        pool.submit(square, 3)
+        results = []
+        while pool.outstanding:
+            results.extend(pool.poll(timeout=5))
+    assert [(r.status, r.value) for r in results] == [("DIED", ("DIED", 3)), ("OK", 9)]
+
+
+def test_task_exception_is_raised():
+    with SupervisedPool(1) as pool:
+        with pytest.raises(RuntimeError, match="bad pdf"):
+            list(pool.imap_unordered(fail, [1]))
+
+
+def log_and_relay(x):
+    logging.getLogger("test_supervisor_relay").warning(f"parsed {x}")
+    ParentChannel("out").put(x)
+    return x
+
+
+def test_logs_and_messages_come_back_over_the_worker_pipe(caplog):
+    relayed = []
+    with SupervisedPool(2, log_name="test_supervisor_relay", on_message={"out": relayed.append}) as pool:
+        assert sorted(pool.imap_unordered(log_and_relay, range(4))) == [0, 1, 2, 3]
+    assert sorted(relayed) == [0, 1, 2, 3]
+    assert sorted(r.getMessage() for r in caplog.records if r.name == "test_supervisor_relay") == [
+        "parsed 0", "parsed 1", "parsed 2", "parsed 3"]
+
+
+def test_killed_worker_does_not_block_the_others_messages():
+    relayed = []
+    with SupervisedPool(2, task_timeout=0.5, on_message={"out": relayed.append}) as pool:
+        pool.submit(slow_or_fast, 30)
+        pool.submit(log_and_relay, 1)
+        results = []
+        while pool.outstanding:
+            results.extend(pool.poll(timeout=5))
+        pool.submit(log_and_relay, 2)
+        results.extend(pool.poll(timeout=5))
+    assert sorted(r.status for r in results) == ["OK", "OK", "TIMEOUT"]
+    assert relayed == [1, 2]
@@ -0,0 +1,53 @@
+import os
+from night_audit_etl_pipeline.watcher import FolderWatcher
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def write(path, data, mtime):
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+
+
+def test_file_ready_once_unchanged_and_settled(tmp_path):
+    clock = Clock(1000.0)
+    watcher = FolderWatcher(str(tmp_path), settle_seconds=10, accept=lambda n: n.endswith(".pdf"), clock=clock)
+    write(tmp_path / "a.pdf", b"x" * 10, 995.0)
+    write(tmp_path / "notes.txt", b"x", 900.0)
+
+    assert watcher.poll() == []  # first sighting
+    clock.now = 1003.0
+    write(tmp_path / "a.pdf", b"x" * 20, 1002.0)  # still being written
+    assert watcher.poll() == []
+    clock.now = 1008.0
+    assert watcher.poll() == []  # unchanged but too recent
+    clock.now = 1013.0
+    assert watcher.poll() == ["a.pdf"]
+    clock.now = 1020.0
+    assert watcher.poll() == []  # reported once
+
+
+def test_existing_files_ready_on_second_poll_and_reported_again_when_replaced(tmp_path):
+    clock = Clock(1000.0)
+    watcher = FolderWatcher(str(tmp_path), settle_seconds=10, clock=clock)
+    write(tmp_path / "a.pdf", b"old", 100.0)
+
+    assert watcher.poll() == []
+    assert watcher.poll() == ["a.pdf"]
+
+    write(tmp_path / "a.pdf", b"new copy", 985.0)
+    assert watcher.poll() == []
+    assert watcher.poll() == ["a.pdf"]
+
+    os.remove(tmp_path / "a.pdf")
+    assert watcher.poll() == []
+
+
+def test_missing_folder(tmp_path):
+    assert FolderWatcher(str(tmp_path / "nope")).poll() == []
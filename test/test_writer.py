@@ -0,0 +1,67 @@
+import queue
+import pytest
+import pandas as pd
+from night_audit_etl_pipeline.sinks import QueueSink
+from night_audit_etl_pipeline import writer as writer_module
+from night_audit_etl_pipeline.writer import BatchWriter
+
+
+def queued_file(filename, accounts):
+    """The writer message QueueSink sends for a file with one ar_aging section."""
+    q = queue.Queue()
+    sink = QueueSink(q)
+    with sink.file_scope():
+        sink.write(pd.DataFrame({"account": accounts}), "ar_aging", filename)
+        sink.record_file(filename, "PARTIAL", len(accounts), "Failed sections: Transaction Closeout")
+    return q.get_nowait()
+
+
+def test_queue_sink_sends_one_message_per_file_without_failed_sections():
+    q = queue.Queue()
+    sink = QueueSink(q)
+    with sink.file_scope():
+        with sink.section():
+            sink.write(pd.DataFrame({"account": ["1", "2"]}), "ar_aging", "a.pdf")
+        with pytest.raises(ValueError):
+            with sink.section():
+                sink.write(pd.DataFrame({"description": ["Cash"]}), "transaction_closeout", "a.pdf")
+                raise ValueError("bad closeout")
+        sink.record_file("a.pdf", "PARTIAL", 2, "Failed sections: Transaction Closeout")
+
+    filename, frames, status, rows, message = q.get_nowait()
+    assert (filename, status, rows) == ("a.pdf", "PARTIAL", 2)
+    assert [table for table, _ in frames] == ["ar_aging"]
+    assert frames[0][1]["source_file"].tolist() == ["a.pdf", "a.pdf"]
+    assert q.empty()
+
+
+def test_batch_writer_loads_files_in_one_batch(tracker_db):
+    writer = BatchWriter(tracker_db, batch_rows=100, batch_files=10)
+    writer.add(queued_file("a.pdf", ["1", "2"]))
+    writer.add(queued_file("b.pdf", ["3"]))
+    assert len(writer.pending) == 2
+    writer.flush()
+
+    loaded = pd.read_sql("SELECT account, source_file FROM ar_aging ORDER BY account", tracker_db)
+    assert loaded["source_file"].tolist() == ["a.pdf", "a.pdf", "b.pdf"]
+    tracker = pd.read_sql("SELECT source_file, status FROM file_tracker ORDER BY source_file", tracker_db)
+    assert tracker.values.tolist() == [["a.pdf", "PARTIAL"], ["b.pdf", "PARTIAL"]]
+
+
+def test_batch_writer_flushes_at_row_threshold(tracker_db):
+    writer = BatchWriter(tracker_db, batch_rows=3)
+    writer.add(queued_file("a.pdf", ["1", "2", "3"]))
+    assert writer.pending == []
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM ar_aging", tracker_db).loc[0, "n"] == 3
+
+
+def test_batch_writer_keeps_going_when_the_tracker_is_down(monkeypatch):
+    def database_down(*args):
+        raise OSError("database down")
+
+    monkeypatch.setattr(writer_module, "update_file_tracker", database_down)
+    writer = BatchWriter(None, batch_files=10)
+    monkeypatch.setattr(writer, "_load", database_down)
+    writer.add(("a.pdf", [], "SUCCESS", 0, None))
+    writer.flush()
+    assert writer.pending == []